@@ -0,0 +1,77 @@
+"""Time "did you mean" lookups: difflib over all names vs the fuzzy index.
+
+Uses a synthetic command list the size of a large bot (names plus aliases
+and subcommands) and typos made by one or two random edits.
+Run from the repository root: ``python -m benchmarks.command_suggestions``
+"""
+import random
+import string
+import time
+from difflib import get_close_matches
+from typing import Callable, List
+
+from utils.fuzzy import FuzzyIndex
+
+TERMS = 400  # Command names, aliases and subcommands
+QUERIES = 2_000
+SYLLABLES = ('ba', 'ken', 'ro', 'li', 'mu', 'tar', 'sen', 'vo', 'qui', 'dex',
+             'ly', 'ppo', 'gra', 'nt', 'el')
+
+
+def _typo(rng: random.Random, word: str) -> str:
+    for _ in range(rng.randint(1, 2)):
+        position = rng.randrange(len(word))
+        operation = rng.choice(('insert', 'delete', 'replace'))
+        letter = rng.choice(string.ascii_lowercase)
+        if operation == 'insert':
+            word = word[:position] + letter + word[position:]
+        elif operation == 'delete' and len(word) > 2:
+            word = word[:position] + word[position + 1:]
+        else:
+            word = word[:position] + letter + word[position + 1:]
+    return word
+
+
+def _time(lookup: Callable[[str], object], queries: List[str]) -> float:
+    """Microseconds per lookup."""
+    start = time.perf_counter()
+    for query in queries:
+        lookup(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    terms = sorted({
+        ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(TERMS)
+    })
+    queries = [_typo(rng, rng.choice(terms)) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    index = FuzzyIndex(terms)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def index_lookup(query: str) -> object:
+        return index.search(query, max(1, len(query) // 3))
+
+    cache = {}
+
+    def cached_lookup(query: str) -> object:
+        if query not in cache:
+            cache[query] = index_lookup(query)
+        return cache[query]
+
+    print(f"{len(terms)} terms, {QUERIES} typo queries, "
+          f"index built in {build_ms:.1f}ms")
+    print(f"  {'difflib.get_close_matches':<28}"
+          f"{_time(lambda q: get_close_matches(q, terms, n=1, cutoff=0.6), queries):>10.1f}us")
+    print(f"  {'FuzzyIndex':<28}{_time(index_lookup, queries):>10.1f}us")
+    for query in queries:
+        cached_lookup(query)
+    print(f"  {'FuzzyIndex, repeated typo':<28}"
+          f"{_time(cached_lookup, queries):>10.1f}us")
+
+
+if __name__ == '__main__':
+    main()
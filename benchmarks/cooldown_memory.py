@@ -0,0 +1,81 @@
+"""Simulate a week of cooldown traffic against the old and new stores.
+
+A fake clock drives both stores through seven days of messages. Most
+messages come from returning users and a steady share from users never seen
+before. The old store is the nested dict Leveling used (guild -> user ->
+last message time), which keeps one entry per user forever. The new store
+is the ExpiringMap behind the in-memory state backend.
+
+Run from the repository root: ``python -m benchmarks.cooldown_memory``
+"""
+import random
+import tracemalloc
+from typing import Dict, List
+
+from utils.expiring import ExpiringMap
+
+DAYS = 7
+EVENTS_PER_SECOND = 2
+NEW_USER_RATIO = 0.2  # Share of messages from a user not seen before
+GUILDS = 500
+COOLDOWN = 60  # Seconds, the leveling default
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def simulate(store: str) -> List[float]:
+    """Retained MiB at the end of each simulated day."""
+    rng = random.Random(0)
+    clock = FakeClock()
+    nested: Dict[int, Dict[int, float]] = {}
+    expiring = ExpiringMap(clock=clock)
+    user_count = 0
+    usage: List[float] = []
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for day in range(DAYS):
+        for second in range(86_400):
+            clock.now = day * 86_400 + second
+            for _ in range(EVENTS_PER_SECOND):
+                if not user_count or rng.random() < NEW_USER_RATIO:
+                    index = user_count
+                    user_count += 1
+                else:
+                    index = rng.randrange(user_count)
+                # Snowflake-sized ids derived from the index, so the list of
+                # users seen so far costs no memory of its own
+                user_id = index * 0x9E3779B97F4A7C15 % (1 << 60)
+                guild_id = user_id % GUILDS
+                if store == 'nested dict':
+                    cooldowns = nested.setdefault(guild_id, {})
+                    last = cooldowns.get(user_id, -COOLDOWN)
+                    if clock.now - last >= COOLDOWN:
+                        cooldowns[user_id] = clock.now
+                else:
+                    expiring.set_if_absent(f"xp_cooldown:{guild_id}:{user_id}",
+                                           1, COOLDOWN)
+        usage.append(
+            (tracemalloc.get_traced_memory()[0] - baseline) / 1024**2)
+    tracemalloc.stop()
+    return usage
+
+
+def main() -> None:
+    print(f"{DAYS} days at {EVENTS_PER_SECOND} messages/s, "
+          f"{NEW_USER_RATIO:.0%} from new users, {COOLDOWN}s cooldown")
+    print(f"{'store':<16}" + "".join(f"{f'day {day + 1}':>10}"
+                                     for day in range(DAYS)))
+    for store in ('nested dict', 'ExpiringMap'):
+        usage = simulate(store)
+        print(f"{store:<16}" + "".join(f"{mib:>8.1f}MB" for mib in usage))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Compare eager and lazy import cost of the heavy optional dependencies.
+
+Each measurement runs in a fresh interpreter so nothing is cached.
+matplotlib is left out: lazy_import would still import the package itself,
+so the AniList graph imports pyplot inside the function that draws it.
+Run from the repository root: ``python -m benchmarks.lazy_imports``
+"""
+import subprocess
+import sys
+from typing import Tuple
+
+HEAVY_MODULES = ('requests', 'pycountry', 'pytz', 'rule34')
+RUNS = 3
+
+_SCRIPT = """
+import resource, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def _measure(statement: str) -> Tuple[float, float]:
+    """Best-of-RUNS import seconds and the matching peak RSS in KiB."""
+    best = (float('inf'), 0.0)
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, '-c',
+             _SCRIPT.format(statement=statement)],
+            capture_output=True,
+            text=True,
+            check=True).stdout.split()
+        best = min(best, (float(output[0]), float(output[1])))
+    return best
+
+
+def main() -> None:
+    baseline = _measure('pass')
+    print(f"{'module':<20}{'eager':>12}{'lazy':>12}"
+          f"{'eager RSS':>14}{'lazy RSS':>14}")
+    for name in HEAVY_MODULES:
+        try:
+            eager = _measure(f'import {name}')
+        except subprocess.CalledProcessError:
+            print(f"{name:<20}{'not installed':>12}")
+            continue
+        lazy = _measure('from utils.lazy import lazy_import; '
+                        f'lazy_import({name!r})')
+        print(f"{name:<20}{eager[0] * 1000:>10.1f}ms{lazy[0] * 1000:>10.1f}ms"
+              f"{(eager[1] - baseline[1]) / 1024:>11.1f}MiB"
+              f"{(lazy[1] - baseline[1]) / 1024:>11.1f}MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Measure guild cache memory for the old and new intents/cache profiles.
+
+Builds guilds from synthetic GUILD_CREATE payloads through discord.py's own
+ConnectionState, so member, presence and emoji caching follow the library's
+rules for each intents and member cache setting. Discord only includes the
+member list (and presences) in GUILD_CREATE when the presences intent is on,
+which is what the payloads below mirror.
+
+Run from the repository root: ``python -m benchmarks.member_cache_memory``
+"""
+import gc
+import random
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord.state import ConnectionState
+
+import config
+
+GUILD_COUNTS = (1_000, 10_000)
+MEMBERS_PER_GUILD = 40
+CHANNELS_PER_GUILD = 10
+ROLES_PER_GUILD = 8
+EMOJIS_PER_GUILD = 5
+ONLINE_RATIO = 0.3
+
+
+def _guild_payload(rng: random.Random, guild_id: int,
+                   with_members: bool) -> Dict[str, Any]:
+    members: List[Dict[str, Any]] = []
+    presences: List[Dict[str, Any]] = []
+    if with_members:
+        for _ in range(MEMBERS_PER_GUILD):
+            user_id = str(rng.getrandbits(60))
+            members.append({
+                'user': {
+                    'id': user_id,
+                    'username': f'user{user_id[-6:]}',
+                    'discriminator': '0',
+                    'avatar': None,
+                    'global_name': None,
+                },
+                'roles': [str(guild_id + 1)],
+                'joined_at': '2024-01-01T00:00:00+00:00',
+                'deaf': False,
+                'mute': False,
+                'flags': 0,
+            })
+            if rng.random() < ONLINE_RATIO:
+                presences.append({
+                    'user': {
+                        'id': user_id
+                    },
+                    'status': 'online',
+                    'activities': [{
+                        'name': 'a game',
+                        'type': 0
+                    }],
+                    'client_status': {
+                        'desktop': 'online'
+                    },
+                })
+    return {
+        'id': str(guild_id),
+        'name': f'guild {guild_id}',
+        'owner_id': '1',
+        'member_count': MEMBERS_PER_GUILD,
+        'roles': [{
+            'id': str(guild_id + index),
+            'name': f'role {index}',
+            'permissions': '0',
+            'position': index,
+            'color': 0,
+            'hoist': False,
+            'managed': False,
+            'mentionable': False,
+        } for index in range(ROLES_PER_GUILD)],
+        'channels': [{
+            'id': str(guild_id + 100 + index),
+            'type': 0,
+            'name': f'channel-{index}',
+            'position': index,
+            'permission_overwrites': [],
+        } for index in range(CHANNELS_PER_GUILD)],
+        'emojis': [{
+            'id': str(guild_id + 200 + index),
+            'name': f'emoji{index}',
+            'animated': False,
+        } for index in range(EMOJIS_PER_GUILD)],
+        'stickers': [],
+        'members': members,
+        'presences': presences,
+    }
+
+
+def _measure(guild_count: int, intents: discord.Intents,
+             member_cache_flags: discord.MemberCacheFlags) -> float:
+    """Average bytes retained per guild."""
+    rng = random.Random(0)
+    state = ConnectionState(dispatch=lambda *args, **kwargs: None,
+                            handlers={},
+                            hooks={},
+                            http=None,
+                            intents=intents,
+                            member_cache_flags=member_cache_flags)
+    payloads = [
+        _guild_payload(rng, (index + 1) << 20, intents.presences)
+        for index in range(guild_count)
+    ]
+    gc.collect()
+    tracemalloc.start()
+    guilds: Optional[List[discord.Guild]] = [
+        discord.Guild(data=payload, state=state) for payload in payloads
+    ]
+    del payloads
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del guilds
+    return current / guild_count
+
+
+def main() -> None:
+    extensions = list(config.EXTENSION_INTENTS) + ['cogs.help']
+    auto = config.build_intents(extensions, profile='auto', extra='')
+    presences = config.build_intents(extensions,
+                                     profile='auto',
+                                     extra='presences')
+    profiles = [
+        ('all intents (old)', discord.Intents.all(),
+         discord.MemberCacheFlags.from_intents(discord.Intents.all())),
+        ('auto + presences', presences,
+         config.build_member_cache_flags(presences, policy='auto')),
+        ('auto intents', auto,
+         config.build_member_cache_flags(auto, policy='auto')),
+    ]
+    for guild_count in GUILD_COUNTS:
+        print(f"{guild_count} guilds, {MEMBERS_PER_GUILD} members each")
+        baseline = None
+        for name, intents, flags in profiles:
+            per_guild = _measure(guild_count, intents, flags)
+            baseline = baseline or per_guild
+            print(f"  {name:<32}{per_guild / 1024:8.1f} KiB/guild"
+                  f"{per_guild * guild_count / 1024 ** 2:10.1f} MiB total"
+                  f"{(per_guild - baseline) / baseline:+9.1%}")
+
+
+if __name__ == '__main__':
+    main()
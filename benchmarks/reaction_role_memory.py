@@ -0,0 +1,91 @@
+"""Measure memory per reaction role entry for the old and new layouts.
+
+Run from the repository root: ``python -m benchmarks.reaction_role_memory``
+"""
+import random
+import string
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from modules.reactionrolemod import ReactionRoleEntry, ReactionRoleIndex
+
+GUILDS = 200
+MESSAGES_PER_GUILD = 10
+ROLES_PER_MESSAGE = 5
+
+
+def _rows() -> List[Dict[str, Any]]:
+    rng = random.Random(0)
+    rows = []
+    for _ in range(GUILDS):
+        guild_id = rng.getrandbits(60)
+        for _ in range(MESSAGES_PER_GUILD):
+            message_id = rng.getrandbits(60)
+            channel_id = rng.getrandbits(60)
+            for _ in range(ROLES_PER_MESSAGE):
+                rows.append({
+                    'guild_id': guild_id,
+                    'message_id': message_id,
+                    'channel_id': channel_id,
+                    'role_id': rng.getrandbits(60),
+                    'emoji': '<:custom:1289226179546447973>',
+                    'color': '1',
+                    'custom_id': ''.join(
+                        rng.choices(string.ascii_letters + string.digits,
+                                    k=20)),
+                    'link': None
+                })
+    return rows
+
+
+def build_nested_dicts(rows: List[Dict[str, Any]]) -> Any:
+    """The previous `Dict[str, Dict[str, List[dict]]]` layout."""
+    data: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    for record in rows:
+        messages = data.setdefault(str(record['guild_id']), {})
+        messages.setdefault(str(record['message_id']), []).append({
+            'role_id': str(record['role_id']),
+            'channel_id': str(record['channel_id']),
+            'emoji': str(record['emoji']),
+            'color': str(record['color']),
+            'custom_id': str(record['custom_id']),
+            'link': None
+        })
+    return data
+
+
+def build_index(rows: List[Dict[str, Any]]) -> Any:
+    index = ReactionRoleIndex()
+    for record in rows:
+        index.add(ReactionRoleEntry.from_record(record))
+    return index
+
+
+def measure(builder: Callable[[List[Dict[str, Any]]], Any],
+            rows: List[Dict[str, Any]]) -> float:
+    # Copy the shared strings first so both layouts pay for their own.
+    rows = [{
+        key: (''.join(value) if isinstance(value, str) else value)
+        for key, value in row.items()
+    } for row in rows]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = builder(rows)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return (after - before) / len(rows)
+
+
+def main() -> None:
+    rows = _rows()
+    old = measure(build_nested_dicts, rows)
+    new = measure(build_index, rows)
+    print(f"entries: {len(rows)}")
+    print(f"nested dicts:       {old:8.1f} bytes/entry")
+    print(f"ReactionRoleIndex:  {new:8.1f} bytes/entry")
+    print(f"reduction:          {100 * (1 - new / old):8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Headless Tetris throughput: the list-of-lists engine vs the bitboard one.
+
+Runs thousands of games side by side. Each tick every game takes a random
+input (left, right, rotate or nothing), falls one row under gravity and is
+rendered, which is what a live game does per frame. Games that top out are
+replaced so the count stays constant.
+Run from the repository root: ``python -m benchmarks.tetris_engine``
+"""
+import random
+import time
+from typing import Callable, List
+
+from modules.tetrismod import CELL_EMOJIS, TetrisGame
+
+GAMES = 2_000
+TICKS = 50
+
+
+class LegacyTetrisGame:
+    """The previous engine: a list-of-lists board and a full redraw per frame."""
+    WIDTH = 10
+    HEIGHT = 20
+    SHAPES = [[[1, 1, 1, 1]], [[1, 1], [1, 1]], [[1, 1, 1], [0, 1, 0]],
+              [[1, 1, 1], [1, 0, 0]], [[1, 1, 1], [0, 0, 1]],
+              [[1, 1, 0], [0, 1, 1]], [[0, 1, 1], [1, 1, 0]]]
+
+    def __init__(self, rng: random.Random) -> None:
+        self.rng = rng
+        self.board = [[0 for _ in range(self.WIDTH)]
+                      for _ in range(self.HEIGHT)]
+        self.shape: List = []
+        self.color = 0
+        self.piece_x = 0
+        self.piece_y = 0
+        self.game_over = False
+        self.new_piece()
+
+    def new_piece(self) -> None:
+        self.shape = self.rng.choice(self.SHAPES)
+        self.color = self.rng.randint(1, 7)
+        self.piece_x = self.WIDTH // 2 - len(self.shape[0]) // 2
+        self.piece_y = 0
+        if not self.is_valid_move(self.piece_x, self.piece_y, self.shape):
+            self.game_over = True
+
+    def is_valid_move(self, x: int, y: int, shape: List) -> bool:
+        for i, row in enumerate(shape):
+            for j, cell in enumerate(row):
+                if cell and (y + i >= self.HEIGHT or x + j < 0
+                             or x + j >= self.WIDTH or
+                             (y + i >= 0 and self.board[y + i][x + j])):
+                    return False
+        return True
+
+    def move(self, dx: int, dy: int) -> bool:
+        if self.is_valid_move(self.piece_x + dx, self.piece_y + dy,
+                              self.shape):
+            self.piece_x += dx
+            self.piece_y += dy
+            return True
+        return False
+
+    def rotate(self) -> bool:
+        rotated_shape = list(zip(*self.shape[::-1]))
+        if self.is_valid_move(self.piece_x, self.piece_y, rotated_shape):
+            self.shape = rotated_shape
+            return True
+        return False
+
+    def tick(self) -> None:
+        if self.move(0, 1):
+            return
+        for i, row in enumerate(self.shape):
+            for j, cell in enumerate(row):
+                if cell:
+                    self.board[self.piece_y + i][self.piece_x + j] = self.color
+        for i in range(self.HEIGHT - 1, -1, -1):
+            if all(self.board[i]):
+                del self.board[i]
+                self.board.insert(0, [0 for _ in range(self.WIDTH)])
+        self.new_piece()
+
+    def render(self) -> str:
+        board_copy = [row[:] for row in self.board]
+        for i, row in enumerate(self.shape):
+            for j, cell in enumerate(row):
+                if cell and 0 <= self.piece_y + i < self.HEIGHT and 0 <= self.piece_x + j < self.WIDTH:
+                    board_copy[self.piece_y + i][self.piece_x + j] = self.color
+        return "\n".join("".join(CELL_EMOJIS[cell] for cell in row)
+                         for row in board_copy)
+
+
+def _new_bitboard(rng: random.Random) -> TetrisGame:
+    game = TetrisGame(rng)
+    game.new_piece()
+    return game
+
+
+def run(new_game: Callable[[random.Random], object]) -> float:
+    """Game ticks per second across GAMES simultaneous games."""
+    rng = random.Random(0)
+    games = [new_game(rng) for _ in range(GAMES)]
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        for index, game in enumerate(games):
+            action = rng.randrange(4)
+            if action == 0:
+                game.move(-1, 0)
+            elif action == 1:
+                game.move(1, 0)
+            elif action == 2:
+                game.rotate()
+            game.tick()
+            game.render()
+            if game.game_over:
+                games[index] = new_game(rng)
+    return GAMES * TICKS / (time.perf_counter() - start)
+
+
+def main() -> None:
+    print(f"{GAMES} simultaneous games, {TICKS} ticks each "
+          f"(input, gravity and render per tick)")
+    for name, new_game in (('list of lists', LegacyTetrisGame),
+                           ('bitboard', _new_bitboard)):
+        print(f"  {name:<16}{run(new_game):>12,.0f} ticks/s")
+
+
+if __name__ == '__main__':
+    main()
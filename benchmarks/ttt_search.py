@@ -0,0 +1,55 @@
+"""Bot-vs-bot tic-tac-toe on the 5x5 board with 4 in a row to win.
+
+(5, 5, 4) is a draw with perfect play, so every game between two searches
+should be drawn. One game is played per distinct first move (the others are
+mirror images), first under fixed node budgets, which gives the same games
+on any machine, then under the default time budget.
+Run from the repository root: ``python -m benchmarks.ttt_search``
+"""
+import time
+from typing import Optional, Tuple
+
+from modules.tttengine import SEARCH_TIME_BUDGET, MNKBoard, MNKSearch
+
+WIDTH = HEIGHT = 5
+WIN_LENGTH = 4
+OPENINGS = (12, 7, 6, 2, 1, 0)  # Centre, then out to the corner
+NODE_BUDGETS = (30_000, 60_000, 100_000)
+
+
+def play(first: int,
+         node_budget: Optional[int] = None) -> Tuple[Optional[int], int, float]:
+    """Winner (None for a draw), plies played and the slowest move's time."""
+    board = MNKBoard(WIDTH, HEIGHT, WIN_LENGTH)
+    searches = (MNKSearch(node_budget=node_budget),
+                MNKSearch(node_budget=node_budget))
+    board.play(first)
+    slowest = 0.0
+    while not board.is_over():
+        start = time.perf_counter()
+        cell = searches[board.to_move].choose_move(board)
+        slowest = max(slowest, time.perf_counter() - start)
+        board.play(cell)
+    return board.winner, len(board.history), slowest
+
+
+def report(label: str, node_budget: Optional[int] = None) -> None:
+    results = [play(first, node_budget) for first in OPENINGS]
+    draws = sum(winner is None for winner, _, _ in results)
+    outcomes = " ".join("draw" if winner is None else
+                        f"{'XO'[winner]}@{plies}"
+                        for winner, plies, _ in results)
+    slowest = max(seconds for _, _, seconds in results)
+    print(f"  {label:<16}{draws}/{len(OPENINGS)} drawn  "
+          f"slowest move {slowest * 1000:>5.0f}ms  {outcomes}")
+
+
+def main() -> None:
+    print(f"{WIDTH}x{HEIGHT}, {WIN_LENGTH} in a row; openings {OPENINGS}")
+    for budget in NODE_BUDGETS:
+        report(f"{budget:,} nodes", budget)
+    report(f"{SEARCH_TIME_BUDGET}s per move")
+
+
+if __name__ == '__main__':
+    main()
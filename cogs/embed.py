@@ -9,19 +9,29 @@ from utils.custom_colors import custom_colors
 
 # Import all classes and methods from embedmod.py
 from modules.embedmod import (AuthorModal, BodyModal, ImagesModal, FooterModal,
-                              ScheduleModal, create_embed_view)
+                              ScheduleModal, create_embed_view,
+                              send_scheduled_embed, SCHEDULED_EMBED_JOB)
 from modules.embedtemp import get_template, templates
+from utils.scheduler import scheduler
+from utils.metrics import http_session
 
 
 class EmbedCreator(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = http_session()
         self.embed_object = None
 
+    async def cog_load(self):
+        """Register the job handler for scheduled embeds."""
+        scheduler.register(
+            SCHEDULED_EMBED_JOB,
+            lambda payload: send_scheduled_embed(self.bot, payload))
+
     async def cog_unload(self):
         """Cleanup resources when the cog is unloaded."""
+        scheduler.unregister(SCHEDULED_EMBED_JOB)
         await self.session.close()
 
     @app_commands.command(
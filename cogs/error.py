@@ -1,17 +1,29 @@
 import discord
 from discord.ext import commands
+from discord import app_commands
 import traceback
 import aiohttp
 import asyncio
-from difflib import get_close_matches
-from typing import List, Tuple
+from typing import Dict, Optional, Tuple
 from loguru import logger
 import sys
 from discord.ext.commands import CommandInvokeError
+from utils.expiring import ExpiringMap
+from utils.fuzzy import FuzzyIndex
+from utils.metrics import ERROR_REPORTS_SKIPPED, http_session
+from utils.state import state
 
 DELETE_AFTER: int = 10  # Time in seconds after which the error message will delete itself
 DEFAULT_EMBED_COLOR: int = 0x2f3131  # Default embed color
-MAX_RETRIES: int = 3  # Number of retries for rate limit handling
+ERROR_QUEUE_SIZE: int = 256  # Reports waiting for the worker before new ones are dropped
+# Seconds an error is folded into its first report; no longer than that
+# report's embed stays up, so a repeat after it is gone gets a new one
+COALESCE_WINDOW: float = DELETE_AFTER
+COALESCE_KEYS: int = 4096  # Distinct recent errors remembered for coalescing
+CHANNEL_EMBED_LIMIT: int = 3  # Error embeds per channel per window
+CHANNEL_EMBED_WINDOW: float = 30.0  # Seconds
+MAX_SUGGESTION_DISTANCE: int = 2  # Most typos a "did you mean" may correct
+SUGGESTION_CACHE_SIZE: int = 1024  # Remembered typos before the cache resets
 
 logger.remove()
 logger.add(
@@ -45,30 +57,147 @@ def format_cooldown(seconds: float) -> str:
         return f"{hours:.1f} hours"
 
 
+class ErrorReport:
+    __slots__ = ('ctx', 'error', 'repeats')
+
+    def __init__(self, ctx: commands.Context, error: Exception) -> None:
+        self.ctx = ctx
+        self.error = error
+        self.repeats = 0  # Identical errors folded in before it was sent
+
+
 class Errors(commands.Cog):
-    """Cog to handle and report errors during command execution."""
+    """Cog to handle and report errors during command execution.
+
+    The listener only unwraps the error and queues it. A single worker
+    classifies it, formats tracebacks, logs and sends the embed, so a
+    failing cog under load cannot flood the loop or the API from here.
+    The same error from the same user in a channel within COALESCE_WINDOW is
+    folded into the first report and embeds are capped per channel.
+    """
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot: commands.Bot = bot
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = http_session()
+        # Command names, aliases and subcommands for "did you mean", rebuilt
+        # lazily after cogs change; term -> (is slash command, display name)
+        self.suggestion_index: Optional[FuzzyIndex] = None
+        self.suggestion_targets: Dict[str, Tuple[bool, str]] = {}
+        self.suggestion_cache: Dict[str, Optional[Tuple[int, str]]] = {}
+        self.reports: asyncio.Queue[ErrorReport] = asyncio.Queue(
+            ERROR_QUEUE_SIZE)
+        # (channel, author, error type, message) -> report still within its
+        # window
+        self.recent_reports = ExpiringMap(max_entries=COALESCE_KEYS)
+        self.worker: Optional[asyncio.Task] = None
+
+    async def cog_load(self) -> None:
+        self.worker = asyncio.create_task(self.process_reports())
 
     async def cog_unload(self):
         """Cleanup resources when the cog is unloaded."""
+        if self.worker is not None:
+            self.worker.cancel()
         await self.session.close()
 
-    async def send_error_embed(self, ctx: commands.Context, title: str,
-                               description: str) -> None:
+    @commands.Cog.listener()
+    async def on_commands_changed(self) -> None:
+        self.suggestion_index = None
+
+    def build_suggestion_index(self) -> FuzzyIndex:
+        targets: Dict[str, Tuple[bool, str]] = {}
+        for command in self.bot.tree.walk_commands():
+            if isinstance(command, app_commands.Command):
+                targets[command.qualified_name.lower()] = (
+                    True, command.qualified_name)
+        # Prefix commands win over slash commands of the same name
+        for command in self.bot.walk_commands():
+            for name in (command.name, *command.aliases):
+                invoked = f"{command.full_parent_name} {name}".strip()
+                targets[invoked.lower()] = (False, invoked)
+        self.suggestion_targets = targets
+        self.suggestion_cache.clear()
+        self.suggestion_index = FuzzyIndex(targets, MAX_SUGGESTION_DISTANCE)
+        return self.suggestion_index
+
+    def closest_command(self, attempt: str) -> Optional[Tuple[int, str]]:
+        """(distance, term) of the nearest command name, alias or subcommand."""
+        index = self.suggestion_index or self.build_suggestion_index()
+        attempt = attempt.lower()
+        if attempt in self.suggestion_cache:
+            return self.suggestion_cache[attempt]
+        max_distance = min(MAX_SUGGESTION_DISTANCE, max(1, len(attempt) // 3))
+        matches = index.search(attempt, max_distance)
+        best = min(matches,
+                   key=lambda match:
+                   (match[0], self.suggestion_targets[match[1]][0],
+                    abs(len(match[1]) - len(attempt)), match[1]),
+                   default=None)
+        if len(self.suggestion_cache) >= SUGGESTION_CACHE_SIZE:
+            self.suggestion_cache.clear()
+        self.suggestion_cache[attempt] = best
+        return best
+
+    def queue_report(self, ctx: commands.Context, error: Exception) -> None:
+        """Queue `error` for the worker unless it repeats a recent report."""
+        key = (ctx.channel.id if ctx.channel else None, ctx.author.id,
+               type(error), str(error))
+        report: Optional[ErrorReport] = self.recent_reports.get(key)
+        if report is not None:
+            report.repeats += 1
+            ERROR_REPORTS_SKIPPED.labels('coalesced').inc()
+            return
+        report = ErrorReport(ctx, error)
+        try:
+            self.reports.put_nowait(report)
+        except asyncio.QueueFull:
+            ERROR_REPORTS_SKIPPED.labels('queue_full').inc()
+            return
+        self.recent_reports.set(key, report, COALESCE_WINDOW)
+
+    async def process_reports(self) -> None:
+        while True:
+            report = await self.reports.get()
+            try:
+                await self.report_error(report)
+            except Exception:
+                logger.exception("Failed to report a command error")
+
+    async def report_error(self, report: ErrorReport) -> None:
+        ctx, error = report.ctx, report.error
+        if isinstance(error, discord.HTTPException) and error.status == 429:
+            title, description = self.get_rate_limit_title_and_description(
+                error)
+        else:
+            command_name: str = ctx.command.qualified_name if ctx.command else "Unknown Command"
+            command_signature: str = getattr(ctx.command, 'signature',
+                                             '') if ctx.command else ""
+            title, description = self.get_error_title_and_description(
+                ctx, error, command_name, command_signature)
+        await self.handle_error(ctx, error, description, title,
+                                report.repeats)
+
+    async def send_error_embed(self,
+                               ctx: commands.Context,
+                               title: str,
+                               description: str,
+                               repeats: int = 0) -> None:
         """Send an embed with error information to the context channel."""
+        if ctx.channel is not None and await state.incr(
+                f"error_embeds:{ctx.channel.id}",
+                CHANNEL_EMBED_WINDOW) > CHANNEL_EMBED_LIMIT:
+            ERROR_REPORTS_SKIPPED.labels('rate_limited').inc()
+            return
         _, embed_color = self.get_error_style(title)
         embed: discord.Embed = discord.Embed(
-            title=title,
+            title=f"{title} (×{repeats + 1})" if repeats else title,
             description=f"```py\n{description}```",
             color=embed_color)
 
         try:
-            message: discord.Message = await ctx.send(embed=embed,
-                                                      ephemeral=True)
-            await self.delete_message_with_retry(message)
+            await ctx.send(embed=embed,
+                           ephemeral=True,
+                           delete_after=DELETE_AFTER)
         except discord.NotFound:
             logger.warning(
                 "Channel or message not found when sending error embed.")
@@ -77,47 +206,25 @@ class Errors(commands.Cog):
                 "Bot doesn't have permission to send messages in this channel."
             )
         except discord.HTTPException as e:
-            logger.warning(f"Failed to send or delete an error embed: {e}")
+            logger.warning(f"Failed to send an error embed: {e}")
         except Exception as e:
             logger.error(f"Unexpected error when sending error embed: {e}")
 
-    async def delete_message_with_retry(self,
-                                        message: discord.Message,
-                                        max_retries: int = 3) -> None:
-        """Attempt to delete a message with retries."""
-        for attempt in range(max_retries):
-            try:
-                await asyncio.sleep(DELETE_AFTER)
-                await message.delete()
-                return
-            except discord.NotFound:
-                logger.info("Message already deleted.")
-                return
-            except discord.HTTPException as e:
-                if e.code == 10008:  # Unknown Message error
-                    logger.info("Message no longer exists.")
-                    return
-                if attempt == max_retries - 1:
-                    logger.warning(
-                        f"Failed to delete message after {max_retries} attempts: {e}"
-                    )
-                else:
-                    await asyncio.sleep(2**attempt)  # Exponential backoff
-            except Exception as e:
-                logger.error(f"Unexpected error while deleting message: {e}")
-                return
-
-    async def handle_error(self, ctx: commands.Context,
-                           error: commands.CommandError, description: str,
-                           title: str) -> None:
+    async def handle_error(self,
+                           ctx: commands.Context,
+                           error: commands.CommandError,
+                           description: str,
+                           title: str,
+                           repeats: int = 0) -> None:
         """Handle sending an error embed based on the error type."""
-        await self.send_error_embed(ctx, title, description)
+        await self.send_error_embed(ctx, title, description, repeats)
 
         if not isinstance(error,
                           (commands.CommandNotFound, commands.UserInputError,
                            commands.CheckFailure)):
-            logger.error(
-                f"Error in command {ctx.command}: {error}\n{description}")
+            repeated = f" (×{repeats + 1})" if repeats else ""
+            logger.error(f"Error in command {ctx.command}{repeated}: "
+                         f"{error}\n{description}")
 
         if DEBUG_MODE:
             logger.debug(f"Debug information for error in {ctx.command}:")
@@ -132,7 +239,7 @@ class Errors(commands.Cog):
         match title:
             case "Missing Required Argument" | "Command Not Found" | "User Input Error" | "Invalid End of Quoted String" | "Expected Closing Quote" | "Unexpected Quote" | "Bad Argument":
                 return discord.ButtonStyle.success, 0x57F287  # Green
-            case "Missing Permissions" | "Bot Missing Permissions" | "Command on Cooldown" | "No Private Message" | "Check Failure" | "Disabled Command" | "NSFW Channel Required":
+            case "Missing Permissions" | "Bot Missing Permissions" | "Command on Cooldown" | "Rate Limited" | "No Private Message" | "Check Failure" | "Disabled Command" | "NSFW Channel Required":
                 return discord.ButtonStyle.primary, 0x5865F2  # Blue
             case "Not Owner" | "Forbidden" | "Not Found" | "HTTP Exception" | "Max Concurrency Reached" | "Unexpected Error":
                 return discord.ButtonStyle.danger, 0xED4245  # Red
@@ -142,73 +249,25 @@ class Errors(commands.Cog):
     @commands.Cog.listener()
     async def on_command_error(self, ctx: commands.Context,
                                error: commands.CommandError) -> None:
-        # List of error types that should not be logged
-        non_logging_errors = (commands.MissingRequiredArgument,
-                              commands.CommandNotFound,
-                              commands.UserInputError, commands.CheckFailure)
-
-        if not isinstance(error, non_logging_errors):
-            logger.error(f"Error occurred in command {ctx.command}: {error}")
-
-        # Rest of the error handling logic...
         if hasattr(ctx.command, 'on_error'):
             return  # Don't interfere with custom error handlers
 
         if isinstance(error, commands.CommandInvokeError):
             error = error.original  # Get the original error
 
-        if isinstance(error, discord.HTTPException) and error.status == 429:
-            await self.handle_rate_limit(ctx, error)
-            return
-
-        # Fallback for other errors
-        command_name: str = ctx.command.qualified_name if ctx.command else "Unknown Command"
-        command_signature: str = getattr(ctx.command, 'signature',
-                                         '') if ctx.command else ""
-
-        title, description = self.get_error_title_and_description(
-            ctx, error, command_name, command_signature)
-        await self.handle_error(ctx, error, description, title)
-
-        if DEBUG_MODE:
-            logger.debug(f"Debug information for error in {ctx.command}:")
-            logger.debug(f"Error type: {type(error)}")
-            logger.debug(f"Error message: {str(error)}")
-            logger.debug(f"Command: {ctx.command}")
-            logger.debug(f"Arguments: {ctx.args}")
-            logger.debug(f"Keyword arguments: {ctx.kwargs}")
+        # Classification, tracebacks and logging happen in the worker
+        self.queue_report(ctx, error)
 
-    async def handle_rate_limit(self, ctx: commands.Context,
-                                error: discord.HTTPException) -> None:
+    def get_rate_limit_title_and_description(
+            self, error: discord.HTTPException) -> Tuple[str, str]:
+        # Retrying here would only add to the traffic that caused the 429
         retry_after: float = float(error.response.headers.get(
             "Retry-After", 5))
-        base_retry_time: float = retry_after
-        for attempt in range(MAX_RETRIES):
-            await ctx.send(
-                f"Rate limit hit! Retrying after {format_cooldown(retry_after)}... (Attempt {attempt + 1}/{MAX_RETRIES})",
-                delete_after=DELETE_AFTER)
-            await asyncio.sleep(retry_after)
-
-            try:
-                await ctx.reinvoke()
-                return
-            except discord.HTTPException as e:
-                if e.status == 429:
-                    retry_after = min(base_retry_time * (2**attempt),
-                                      600)  # Cap at 10 minutes
-                    logger.warning(
-                        f"Rate limit hit again. Retrying in {format_cooldown(retry_after)}."
-                    )
-                else:
-                    await self.handle_error(ctx, e, str(e), "HTTP Exception")
-                    return
-
-        logger.error(
-            f"Command failed after {MAX_RETRIES} attempts due to rate limiting."
+        logger.warning(
+            f"Rate limited while running a command; retry after {format_cooldown(retry_after)}."
         )
-        await ctx.send(
-            f"Command failed after {MAX_RETRIES} attempts due to rate limiting. Please try again later.",
-            delete_after=DELETE_AFTER)
+        return ("Rate Limited",
+                f"Discord is rate limiting this command. Please try again in {format_cooldown(retry_after)}.")
 
     def get_error_title_and_description(
             self, ctx: commands.Context, error: commands.CommandError,
@@ -328,14 +387,18 @@ class Errors(commands.Cog):
                 return "Unexpected Error", f"An unexpected error occurred: {simplified_tb}"
 
     def get_command_not_found_description(self, ctx: commands.Context) -> str:
-        attempted_command = ctx.message.content.split()[0][len(ctx.prefix):]
-        similar_commands: List[str] = get_close_matches(
-            attempted_command, [cmd.name for cmd in self.bot.commands],
-            n=1,
-            cutoff=0.6)
-        if similar_commands:
-            suggestion: str = similar_commands[0]
-            return f"Command not found. Did you mean `{ctx.prefix}{suggestion}`?"
+        words = ctx.message.content[len(ctx.prefix):].split()
+        # A mistyped group name is matched together with its subcommand
+        attempts = [' '.join(words[:2])] if len(words) > 1 else []
+        attempts += words[:1]
+        matches = [
+            match for match in map(self.closest_command, attempts) if match
+        ]
+        if matches:
+            _, term = min(matches, key=lambda match: match[0])
+            is_slash, name = self.suggestion_targets[term]
+            suggestion = f"/{name}" if is_slash else f"{ctx.prefix}{name}"
+            return f"Command not found. Did you mean `{suggestion}`?"
         else:
             return "Command not found. Please check your command and try again."
 
@@ -10,6 +10,7 @@ from modules.collatz import is_collatz_conjecture
 import aiofiles
 from typing import Optional, List, Dict, Tuple, Any, Union
 from modules.mememod import MemeView, MemeModule
+from utils.metrics import http_session
 
 # Global variables for reuse
 DEFAULT_EMBED_COLOR: int = 0x2f3136
@@ -28,7 +29,7 @@ class Fun(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.session = aiohttp.ClientSession()
+        self.session = http_session()
         self.meme_module = MemeModule()
 
     async def cog_unload(self) -> None:
@@ -376,7 +377,7 @@ class Fun(commands.Cog):
         else:
             url = f"https://v2.jokeapi.dev/joke/{category}"
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(url, params=params) as response:
                 if response.status == 200:
                     return await response.json()
@@ -453,7 +454,7 @@ class Fun(commands.Cog):
         """Send a neko image or gif based on the user's choice."""
         url = "https://nekos.life/api/v2/img/neko" if choice == "image" else "https://nekos.life/api/v2/img/ngif"
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(url) as r:
                 if r.status == 200:
                     js = await r.json()
@@ -5,33 +5,91 @@ from discord.interactions import Interaction
 from discord.embeds import Embed
 from discord.message import Message
 from discord.ext.commands import Context
-from discord.reaction import Reaction
 from discord.member import Member
-from discord.abc import Messageable
 import aiohttp
-import asyncio
 import time
 
-from typing import Optional, Dict
+from typing import Awaitable, Callable, Literal, Optional, Dict
 
 # Importing modules used in the games
-from modules.tetrismod import TetrisGame
+from modules.tetrismod import TetrisGame, TetrisScheduler
 from modules.tttmod import TicTacToeGame, AcceptDeclineButtons
-from modules.triviamod import TriviaView
-from modules.memorymod import MemoryGameView
+from modules.tttengine import DEFAULT_DIFFICULTY, perfect_play
+from modules.triviamod import NoQuestionsAvailable, TriviaView, question_pool
+from modules.memorymod import MemoryGameView, guild_emojis
+from modules.gamestats import RANKED_BY, game_stats
+from utils.live import LiveMessage
+from utils.members import resolve_members
+from utils.metrics import http_session
+
+ReactionHandler = Callable[[discord.RawReactionActionEvent], Awaitable[None]]
+
+TETRIS_CONTROLS = ("▶️", "⬅️", "➡️", "🔽", "⏬", "🔄", "⏸️", "🛑", "❓")
+
+
+class TetrisButton(discord.ui.Button):
+
+    def __init__(self, control: str, row: int) -> None:
+        super().__init__(style=discord.ButtonStyle.secondary,
+                         emoji=control,
+                         row=row)
+        self.control = control
+
+    async def callback(self, interaction: Interaction) -> None:
+        await self.view.cog.tetris_input(interaction, self.control)
+
+
+class TetrisControls(discord.ui.View):
+    """Buttons for a Tetris game; only its player can press them."""
+
+    def __init__(self, cog: 'Games', user_id: int) -> None:
+        super().__init__(timeout=None)
+        self.cog = cog
+        self.user_id = user_id
+        for index, control in enumerate(TETRIS_CONTROLS):
+            self.add_item(TetrisButton(control, row=index // 5))
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message(
+                "This Tetris game is not for you. Start your own with the tetris command.",
+                ephemeral=True)
+            return False
+        return True
 
 
 class Games(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot: commands.Bot = bot
+        # Running games own live views and tasks, so they stay in-process: a
+        # guild's channels always belong to the worker running its shard
         self.tetris_games: Dict[int, TetrisGame] = {}
+        self.tetris_messages: Dict[int, LiveMessage] = {}
+        self.tetris_controls: Dict[int, TetrisControls] = {}
+        # Gravity and message edits for every started Tetris game
+        self.tetris_scheduler = TetrisScheduler(self.update_game,
+                                                self.tetris_game_over)
         self.ttt_games: Dict[frozenset[int], TicTacToeGame] = {}
         self.memory_games: Dict[int, MemoryGameView] = {}
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        # Game message id -> handler for reactions added to it
+        self.reaction_routes: Dict[int, ReactionHandler] = {}
+        self.session: aiohttp.ClientSession = http_session()
+
+    async def cog_load(self) -> None:
+        # Solve tic-tac-toe now rather than on the first bot move
+        perfect_play.ensure_built()
+        # Have questions buffered before the first round is asked for
+        question_pool.refill((None, None))
+        game_stats.start()
 
     async def cog_unload(self) -> None:
         """Clean up resources when the cog is unloaded."""
+        self.tetris_scheduler.stop()
+        for controls in self.tetris_controls.values():
+            controls.stop()
+        await question_pool.close()
+        await game_stats.stop()
         await self.session.close()
 
     # Tetris Game Command and Methods
@@ -39,7 +97,7 @@ class Games(commands.Cog):
     async def tetris(self, ctx: commands.Context) -> None:
         if ctx.author.id in self.tetris_games:
             await ctx.send(
-                "You're already in a game! Use the 🛑 reaction to end it.")
+                "You're already in a game! Use the 🛑 button to end it.")
             return
 
         game: TetrisGame = TetrisGame()
@@ -58,40 +116,18 @@ class Games(commands.Cog):
             "▶️: Start | ⬅️: Left | ➡️: Right | 🔽: Soft Drop | ⏬: Hard Drop\n🔄: Rotate | ⏸️: Pause | 🛑: End | ❓: Help"
         )
 
-        message: Message = await ctx.send(embed=embed)
-        # Add reactions for controls
-        reactions = ["▶️", "⬅️", "➡️", "🔽", "⏬", "🔄", "⏸️", "🛑", "❓"]
-        for reaction in reactions:
-            await message.add_reaction(reaction)
+        controls = self.tetris_controls[ctx.author.id] = TetrisControls(
+            self, ctx.author.id)
+        await ctx.send(embed=embed, view=controls)
 
-    async def game_loop(self, user_id: int, message: Message) -> None:
-        game: TetrisGame = self.tetris_games[user_id]
-        game.new_piece()
-        await self.update_game(user_id, message)
-        while not game.game_over and user_id in self.tetris_games:
-            if not game.paused:
-                await asyncio.sleep(game.get_fall_speed())
-                if not game.move(0, 1):
-                    game.merge_piece()
-                    lines_cleared: int = game.clear_lines()
-                    if lines_cleared > 0:
-                        game.score += lines_cleared * 100
-                        game.level_up(lines_cleared)
-                        await self.update_game(user_id, message)
-                    if game.game_over:
-                        await self.end_tetris_game(user_id, message,
-                                                   "Game Over!")
-                        return
-                    game.new_piece()
-                await self.update_game(user_id, message)
-            else:
-                await asyncio.sleep(0.1)
+    async def tetris_game_over(self, user_id: int, live: LiveMessage) -> None:
+        await self.end_tetris_game(user_id, live.message, "Game Over!")
 
-    async def update_game(self, user_id: int, message: Message) -> None:
+    async def update_game(self, user_id: int, live: LiveMessage) -> None:
         if user_id not in self.tetris_games:
             return
         game: TetrisGame = self.tetris_games[user_id]
-        embed: Embed = message.embeds[0]
+        embed: Embed = live.message.embeds[0]
         embed.color = 0x0000ff if game.paused else 0x00ff00  # Blue when paused, green otherwise
         embed.set_field_at(0, name="\u200b", value=game.render(), inline=False)
         embed.set_field_at(1, name="Score", value=str(game.score), inline=True)
@@ -107,13 +143,23 @@ class Games(commands.Cog):
                            name="Next Piece",
                            value=next_piece_preview,
                            inline=True)
-        await message.edit(embed=embed)
+        live.update(embed=embed)
+        await live.settle()
 
     async def end_tetris_game(self, user_id: int, message: Message,
                               end_message: str) -> None:
         if user_id not in self.tetris_games:
             return
+        self.tetris_scheduler.remove(user_id)
+        live: Optional[LiveMessage] = self.tetris_messages.pop(user_id, None)
+        if live is not None:
+            # Drop queued frames so none lands after the final board
+            await live.close()
+            message = live.message
         game: TetrisGame = self.tetris_games[user_id]
+        if game.started:
+            guild_id = message.guild.id if message.guild else None
+            game_stats.record('tetris', guild_id, user_id, game.score)
         embed: Embed = message.embeds[0]
         embed.title = end_message
         embed.color = 0xff0000
@@ -130,9 +176,68 @@ class Games(commands.Cog):
                            name="Lines Cleared",
                            value=str(game.lines_cleared),
                            inline=True)
-        await message.edit(embed=embed)
+        controls = self.tetris_controls.pop(user_id, None)
+        if controls is not None:
+            # Without a timeout the view store would keep it forever
+            controls.stop()
+        await message.edit(embed=embed, view=None)
         del self.tetris_games[user_id]
 
+    async def tetris_input(self, interaction: Interaction,
+                           control: str) -> None:
+        user_id: int = interaction.user.id
+        game: Optional[TetrisGame] = self.tetris_games.get(user_id)
+        if game is None:
+            await interaction.response.send_message(
+                "This game has already ended.", ephemeral=True)
+            return
+        if control == "❓":
+            await interaction.response.send_message(embed=self.help_embed(),
+                                                    ephemeral=True)
+            return
+        # Frames are edited in by the scheduler; just acknowledge the press
+        await interaction.response.defer()
+        moved: bool = False
+
+        if control == "▶️":
+            if not game.started:
+                game.started = True
+                live = self.tetris_messages[user_id] = LiveMessage(
+                    interaction.message)
+                self.tetris_scheduler.add(user_id, game, live)
+            return
+        elif not game.started:
+            return
+        elif control == "⬅️":
+            moved = game.move(-1, 0)
+        elif control == "➡️":
+            moved = game.move(1, 0)
+        elif control == "🔽":
+            moved = game.move(0, 1)
+        elif control == "⏬":
+            drop_distance: int = game.hard_drop()
+            game.score += drop_distance * 2
+            game.merge_piece()
+            game.clear_lines()
+            game.new_piece()
+            if game.game_over:
+                await self.end_tetris_game(user_id, interaction.message,
+                                           "Game Over!")
+                return
+            moved = True
+        elif control == "🔄":
+            moved = game.rotate()
+        elif control == "⏸️":
+            # Redraws itself to change color
+            self.tetris_scheduler.set_paused(user_id, not game.paused)
+        elif control == "🛑":
+            await self.end_tetris_game(user_id, interaction.message,
+                                       "Game Ended")
+            return
+
+        if moved:
+            self.tetris_scheduler.request_frame(user_id)
+
     # TicTacToe Game Command and Methods
     @app_commands.command(name="ttt",
                           description="Start a new Tic Tac Toe game")
@@ -140,15 +245,30 @@ class Games(commands.Cog):
         opponent=
         "The user you want to play against (leave empty to play against the bot)",
         player_x="Custom emoji for player X (optional)",
-        player_o="Custom emoji for player O (optional)")
-    async def tic_tac_toe(self,
-                          interaction: Interaction,
-                          opponent: Optional[Member] = None,
-                          player_x: Optional[str] = None,
-                          player_o: Optional[str] = None) -> None:
+        player_o="Custom emoji for player O (optional)",
+        difficulty="How well the bot plays (default: hard)",
+        size="Board size (default: 3x3)",
+        win_length="Marks in a row needed to win (default: 3 on 3x3, 4 otherwise)")
+    async def tic_tac_toe(
+            self,
+            interaction: Interaction,
+            opponent: Optional[Member] = None,
+            player_x: Optional[str] = None,
+            player_o: Optional[str] = None,
+            difficulty: Literal['easy', 'medium',
+                                'hard'] = DEFAULT_DIFFICULTY,
+            size: Literal[3, 4, 5] = 3,
+            win_length: Optional[app_commands.Range[int, 3, 5]] = None
+    ) -> None:
         if opponent is None:
             opponent = interaction.guild.me if interaction.guild else None
 
+        if win_length is not None and win_length > size:
+            await interaction.response.send_message(
+                f"The win length can be at most {size} on a {size}x{size} board.",
+                ephemeral=True)
+            return
+
         if player_x and not self.is_valid_emoji(player_x):
             await interaction.response.send_message(
                 "Invalid emoji for player X. Please use a valid emoji.",
@@ -171,7 +291,8 @@ class Games(commands.Cog):
             await old_game.message.edit(view=old_game.board_view)
 
         game: TicTacToeGame = TicTacToeGame(interaction.user, opponent,
-                                            interaction, player_x, player_o)
+                                            interaction, player_x, player_o,
+                                            difficulty, size, win_length)
         self.ttt_games[player_key] = game
 
         if opponent == interaction.guild.me:
@@ -200,23 +321,36 @@ class Games(commands.Cog):
 
     # Trivia Game Command and Methods
     @commands.command(name="trivia")
-    async def trivia(self, ctx: commands.Context) -> None:
-        await self._send_trivia(ctx, ctx.author.id, 0)
-
-    async def _send_trivia(self, ctx: Context, user_id: int,
-                           score: int) -> None:
-        question_data: Dict[str,
-                            str] = await TriviaView.fetch_trivia_question()
+    async def trivia(
+            self,
+            ctx: commands.Context,
+            difficulty: Optional[Literal['easy', 'medium', 'hard']] = None
+    ) -> None:
+        await self._send_trivia(ctx, ctx.author.id, 0, difficulty)
+
+    async def _send_trivia(self,
+                           ctx: Context,
+                           user_id: int,
+                           score: int,
+                           difficulty: Optional[str] = None) -> None:
+        try:
+            question_data: Dict[str, str] = await question_pool.next_question(
+                user_id,
+                difficulty=difficulty,
+                guild_id=ctx.guild.id if ctx.guild else None)
+        except NoQuestionsAvailable:
+            await self._send_no_questions(ctx, user_id, score)
+            return
 
         category: str = question_data['category']
-        difficulty: str = question_data['difficulty']
+        question_difficulty: str = question_data['difficulty']
         question: str = question_data['question']
         correct_answer: str = question_data['correct_answer']
         all_answers: list[str] = question_data['all_answers']
 
         embed: Embed = discord.Embed(
             title=
-            f"**Category:** {category} | **Difficulty:** {difficulty.capitalize()}",
+            f"**Category:** {category} | **Difficulty:** {question_difficulty.capitalize()}",
             description=f"**Question:**\n*{question}*\n\n" + "\n".join([
                 f"**{chr(65+i)}:** {answer}"
                 for i, answer in enumerate(all_answers)
@@ -225,7 +359,8 @@ class Games(commands.Cog):
         embed.set_footer(
             text=f"You have 30 seconds to answer! | Current score: {score}")
 
-        view: TriviaView = TriviaView(correct_answer, self, user_id, score)
+        view: TriviaView = TriviaView(correct_answer, self, user_id, score,
+                                      difficulty)
 
         if isinstance(ctx, Interaction):
             if ctx.response.is_done():
@@ -242,6 +377,26 @@ class Games(commands.Cog):
         await view.start_timer(
             ctx.channel if isinstance(ctx, Context) else ctx.channel)
 
+    async def _send_no_questions(self, ctx: Context, user_id: int,
+                                 score: int) -> None:
+        """End the round when no question could be found for it."""
+        content = ("No trivia questions are available for this category and "
+                   "difficulty right now. Please try again later.")
+        if score:
+            # Mid-game, after a correct answer: the run ends here
+            game_stats.record('trivia', ctx.guild.id if ctx.guild else None,
+                              user_id, score)
+            content += f"\nYour final score: {score}"
+        if isinstance(ctx, Interaction):
+            if ctx.response.is_done():
+                await ctx.edit_original_response(content=content,
+                                                  embed=None,
+                                                  view=None)
+            else:
+                await ctx.response.send_message(content, ephemeral=True)
+        else:
+            await ctx.send(content)
+
     # Memory Game Command and Methods
     @commands.hybrid_command(name="memory")
     @app_commands.describe(time_limit="Time limit for the game (1-6 minutes)")
@@ -264,6 +419,29 @@ class Games(commands.Cog):
         except ValueError as e:
             await ctx.send(str(e))
 
+    def start_game(self, user_id: int, guild_id: int,
+                   game: MemoryGameView) -> None:
+        """Track a memory game started outside the command, e.g. a rematch."""
+        self.memory_games[user_id] = game
+
+    def end_game(self, user_id: int, guild_id: int) -> None:
+        game: Optional[MemoryGameView] = self.memory_games.pop(user_id, None)
+        if game is not None and game.message is not None:
+            self.unroute_reactions(game.message.id)
+
+    def route_reactions(self, message_id: int,
+                        handler: ReactionHandler) -> None:
+        """Send reactions added to `message_id` to `handler`."""
+        self.reaction_routes[message_id] = handler
+
+    def unroute_reactions(self, message_id: int) -> None:
+        self.reaction_routes.pop(message_id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_emojis_update(self, guild: discord.Guild, before,
+                                     after) -> None:
+        guild_emojis.invalidate(guild.id)
+
     @memory.error
     async def memory_error(self, ctx: commands.Context,
                            error: Exception) -> None:
@@ -271,78 +449,47 @@ class Games(commands.Cog):
             await ctx.send(
                 "Invalid time limit. Please provide a number between 1 and 6.")
 
-    # Shared event listener for reactions (handling Tetris and Memory game)
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction: Reaction, user: Member) -> None:
-        if user.bot:
+    @commands.hybrid_command(name="gameleaderboard", aliases=["gamelb"])
+    @app_commands.describe(game="The game to rank players at")
+    async def game_leaderboard(
+            self, ctx: commands.Context,
+            game: Literal['trivia', 'tetris', 'memory', 'ttt']) -> None:
+        """Show the server's best players at a game."""
+        if ctx.guild is None:
+            await ctx.send("Leaderboards are only kept for servers.")
             return
+        board = await game_stats.leaderboard(game, ctx.guild.id)
+        if not board:
+            await ctx.send(f"Nobody has finished a {game} game here yet.")
+            return
+        ranked_by_wins = RANKED_BY[game] == 'wins'
+        embed: Embed = discord.Embed(title=f"🏆 {game.capitalize()} Leaderboard",
+                                     color=discord.Color.gold())
+        members = await resolve_members(ctx.guild,
+                                        [stats.user_id for stats in board])
+        for rank, stats in enumerate(board, start=1):
+            member = members.get(stats.user_id)
+            name = member.display_name if member else f"<@{stats.user_id}>"
+            if ranked_by_wins:
+                value = f"Wins: {stats.wins} ({stats.games_played} played)"
+            else:
+                value = f"Best: {stats.best_score} ({stats.games_played} played)"
+            embed.add_field(name=f"{rank}. {name}", value=value, inline=False)
+        await ctx.send(embed=embed)
 
-        # Handling Tetris reactions
-        if user.id in self.tetris_games:
-            game: TetrisGame = self.tetris_games[user.id]
-            moved: bool = False
-
-            if reaction.emoji == "▶️" and not game.started:
-                game.started = True
-                await self.game_loop(user.id, reaction.message)
-                return
-            elif not game.started:
-                await reaction.remove(user)
-                return
-            elif reaction.emoji == "⬅️":
-                moved = game.move(-1, 0)
-            elif reaction.emoji == "➡️":
-                moved = game.move(1, 0)
-            elif reaction.emoji == "🔽":
-                moved = game.move(0, 1)
-            elif reaction.emoji == "⏬":
-                drop_distance: int = game.hard_drop()
-                game.score += drop_distance * 2
-                game.merge_piece()
-                lines_cleared: int = game.clear_lines()
-                if lines_cleared > 0:
-                    game.score += lines_cleared * 100
-                    game.level_up(lines_cleared)
-                    await self.update_game(user.id, reaction.message)
-                if game.game_over:
-                    await self.end_tetris_game(user.id, reaction.message,
-                                               "Game Over!")
-                    return
-                game.new_piece()
-                moved = True
-            elif reaction.emoji == "🔄":
-                moved = game.rotate()
-            elif reaction.emoji == "⏸️":
-                game.paused = not game.paused
-                moved = True  # Force update to change color
-            elif reaction.emoji == "🛑":
-                await self.end_tetris_game(user.id, reaction.message,
-                                           "Game Ended")
-                return
-            elif reaction.emoji == "❓":
-                await self.show_help(reaction.message.channel)
-                return
+    # Raw events do not depend on the message cache, and almost every
+    # reaction is on a message that is not a game: one lookup drops those
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(
+            self, payload: discord.RawReactionActionEvent) -> None:
+        handler: Optional[ReactionHandler] = self.reaction_routes.get(
+            payload.message_id)
+        if handler is None or payload.user_id == self.bot.user.id:
+            return
+        await handler(payload)
 
-            if moved:
-                await self.update_game(user.id, reaction.message)
-
-            await reaction.remove(user)
-
-        # Handling Memory Game reactions
-        elif reaction.emoji == "💡":
-            game: Optional[MemoryGameView] = self.memory_games.get(user.id)
-            if game:
-                if user.id != game.ctx.author.id:
-                    await reaction.message.channel.send(
-                        f"{user.mention}, only the player who started the game can use hints.",
-                        delete_after=5)
-                else:
-                    # Check if the reaction is from the bot running the game
-                    if reaction.me and reaction.count == 2:
-                        await reaction.remove(user)
-                        await game.show_hint()
-
-    async def show_help(self, channel: Messageable) -> None:
+    @staticmethod
+    def help_embed() -> Embed:
         help_embed: Embed = discord.Embed(title="Tetris Help", color=0x0000ff)
         help_embed.add_field(
             name="How to Play",
@@ -358,7 +505,7 @@ class Games(commands.Cog):
                    "• Game speeds up as you level up.\n"
                    "• Game ends if pieces stack up to the top."),
             inline=False)
-        await channel.send(embed=help_embed)
+        return help_embed
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -3,8 +3,10 @@ from discord.ext import commands
 from discord import app_commands
 from typing import List, Optional, Union, Any, Dict, TypeVar
 import inspect
-import math
-import asyncio
+
+from modules.helpmod import (CommandCatalog, CommandType, is_jishaku_command,
+                             is_owner_only)
+from utils.timers import timers
 
 # Global variables for easy modification
 DEFAULT_EMBED_COLOR = discord.Color.brand_red()
@@ -30,7 +32,6 @@ CATEGORY_EMOJIS = {
     "No Category": "<a:question_mark:1289230595729129513>"
 }
 
-CommandType = Union[commands.Command[Any, Any, Any], app_commands.Command]
 ContextType = Union[commands.Context[Any], discord.Interaction]
 BotT = TypeVar('BotT', bound=commands.Bot)
 
@@ -38,14 +39,14 @@ BotT = TypeVar('BotT', bound=commands.Bot)
 class HelpView(discord.ui.View):
 
     def __init__(self, cog: 'HelpCog', ctx: ContextType,
-                 categories: Dict[str, List[CommandType]]):
-        super().__init__(timeout=VIEW_TIMEOUT)
+                 include_hidden: bool):
+        # Expiry is driven by the shared timer service, see send_interactive_help
+        super().__init__(timeout=None)
         self.cog: HelpCog = cog
         self.ctx: ContextType = ctx
-        self.categories: Dict[str, List[CommandType]] = categories
+        self.include_hidden: bool = include_hidden
         self.current_category: Optional[str] = None
         self.current_page: int = 0
-        self.last_interaction_time: float = asyncio.get_event_loop().time()
         self.message: Optional[discord.Message] = None
 
     async def on_timeout(self) -> None:
@@ -59,6 +60,7 @@ class HelpView(discord.ui.View):
                 pass
             except discord.HTTPException:
                 pass
+        self.stop()
 
     async def interaction_check(self,
                                 interaction: discord.Interaction) -> bool:
@@ -66,7 +68,7 @@ class HelpView(discord.ui.View):
             await interaction.response.send_message(
                 "This menu is not for you.", ephemeral=True)
             return False
-        self.last_interaction_time = asyncio.get_event_loop().time()
+        timers.touch(self)
         return True
 
     @discord.ui.select(placeholder="Select a category",
@@ -92,9 +94,8 @@ class HelpView(discord.ui.View):
     async def next_button(self, interaction: discord.Interaction,
                           button: discord.ui.Button) -> None:
         if self.current_category:
-            max_pages = math.ceil(
-                len(self.categories[self.current_category]) /
-                COMMANDS_PER_PAGE)
+            max_pages = self.cog.catalog.page_count(self.current_category,
+                                                    self.include_hidden)
             self.current_page = min(max_pages - 1, self.current_page + 1)
         await self.update_message(interaction)
 
@@ -112,9 +113,8 @@ class HelpView(discord.ui.View):
 
     def update_button_states(self) -> None:
         if self.current_category and self.current_category != "Home":
-            max_pages = math.ceil(
-                len(self.categories[self.current_category]) /
-                COMMANDS_PER_PAGE)
+            max_pages = self.cog.catalog.page_count(self.current_category,
+                                                    self.include_hidden)
             self.previous_button.disabled = self.current_page == 0
             self.next_button.disabled = self.current_page >= max_pages - 1
         else:
@@ -122,60 +122,19 @@ class HelpView(discord.ui.View):
             self.next_button.disabled = True
 
     def create_home_embed(self) -> discord.Embed:
-        embed = discord.Embed(
-            title=f"**{self.cog.embed_title}**",
-            description=
-            "Welcome to the help menu! Select a category from the dropdown to view commands.",
-            color=self.cog.embed_color)
-        for category, commands_list in self.categories.items():
-            if category not in ["Home", "HelpCog"]:
-                emoji = CATEGORY_EMOJIS.get(category, "❓")
-                embed.add_field(name=f"**{emoji} {category}**",
-                                value=f"`{len(commands_list)}` commands",
-                                inline=True)
-        embed.set_footer(text=self.cog.embed_footer.format(
-            prefix=self.get_prefix()))
-        return embed
+        return self.cog.catalog.home_embed(self.get_prefix(),
+                                           self.include_hidden)
 
     def create_category_embed(self, category: str) -> discord.Embed:
-        commands = self.categories[category]
-        start_idx = self.current_page * COMMANDS_PER_PAGE
-        end_idx = start_idx + COMMANDS_PER_PAGE
-        page_commands = commands[start_idx:end_idx]
-
-        emoji = CATEGORY_EMOJIS.get(category, "❓")
-        embed = discord.Embed(title=f"**{emoji} {category} Commands**",
-                              color=self.cog.embed_color)
-
-        for command in page_commands:
-            cmd_name = self.get_command_name(command)
-            embed.add_field(
-                name=f"<a:arrow:1289063843129065532> {cmd_name}",
-                value=
-                f"-# ╰> {command.description or 'No description available.'}",
-                inline=False)
-
-        total_pages = math.ceil(len(commands) / COMMANDS_PER_PAGE)
-        embed.set_footer(
-            text=
-            f"Page {self.current_page + 1}/{total_pages} • {self.cog.embed_footer.format(prefix=self.get_prefix())}"
-        )
-        return embed
+        return self.cog.catalog.page_embed(category, self.current_page,
+                                           self.get_prefix(),
+                                           self.include_hidden)
 
     def get_prefix(self) -> str:
         if isinstance(self.ctx, commands.Context):
             return self.ctx.prefix or '.'
         return '.'
 
-    def get_command_name(self, command: CommandType) -> str:
-        if isinstance(command, app_commands.Command) or (isinstance(
-                command, commands.Command) and command.parent is None):
-            if isinstance(command, app_commands.Command):
-                return f"/{command.name}"
-            else:
-                return f"{self.get_prefix()}{command.name}"
-        return f"{self.get_prefix()}{command.name}"
-
     def get_user(self) -> Union[discord.User, discord.Member]:
         return self.ctx.author if isinstance(
             self.ctx, commands.Context) else self.ctx.user
@@ -196,9 +155,22 @@ class HelpCog(commands.Cog):
         self.owner_only_message: str = DEFAULT_OWNER_ONLY_MESSAGE
         self.no_category_name: str = DEFAULT_NO_CATEGORY_NAME
 
+        # Rebuilt lazily after cogs are added or removed, see on_commands_changed
+        self.catalog: CommandCatalog = CommandCatalog(
+            bot, self.embed_color, self.embed_title, self.embed_footer,
+            CATEGORY_EMOJIS, COMMANDS_PER_PAGE)
+
     async def cog_unload(self) -> None:
         self.bot.help_command = self._original_help_command
 
+    @commands.Cog.listener()
+    async def on_commands_changed(self) -> None:
+        self.catalog.invalidate()
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        self.catalog.ensure_built()
+
     @staticmethod
     def generate_usage(command: CommandType,
                        flag_converter: Optional[type[
@@ -248,20 +220,10 @@ class HelpCog(commands.Cog):
         return usage
 
     def is_owner_only(self, command: CommandType) -> bool:
-        if isinstance(command.checks, list):
-            return any(
-                check.__qualname__.startswith('is_owner')
-                for check in command.checks)
-        return bool(command.checks)
+        return is_owner_only(command)
 
     def is_jishaku_command(self, command: CommandType) -> bool:
-        if isinstance(command, commands.Command):
-            return command.cog and command.cog.qualified_name.lower(
-            ) == "jishaku"
-        elif isinstance(command, app_commands.Command):
-            return command.module is not None and "jishaku" in command.module.lower(
-            )
-        return False
+        return is_jishaku_command(command)
 
     async def is_owner(self, user: Union[discord.User,
                                          discord.Member]) -> bool:
@@ -284,35 +246,11 @@ class HelpCog(commands.Cog):
     async def command_autocomplete(
             self, interaction: discord.Interaction,
             current: str) -> List[app_commands.Choice[str]]:
-        choices: List[app_commands.Choice[str]] = []
         is_owner = await self.is_owner(interaction.user)
-        seen_commands = set()
-
-        for cmd in self.bot.walk_commands():
-            if isinstance(cmd, (commands.Command, app_commands.Command)) and \
-               current.lower() in cmd.qualified_name.lower() and \
-               (not self.is_owner_only(cmd) or is_owner) and \
-               (not self.is_jishaku_command(cmd) or is_owner) and \
-               cmd.cog and cmd.cog.qualified_name != "HelpCog":
-                if cmd.qualified_name not in seen_commands:
-                    choices.append(
-                        app_commands.Choice(name=f"/{cmd.qualified_name}",
-                                            value=cmd.qualified_name))
-                    seen_commands.add(cmd.qualified_name)
-
-        for cmd in self.bot.tree.walk_commands():
-            if isinstance(cmd, (commands.Command, app_commands.Command)) and \
-               current.lower() in cmd.qualified_name.lower() and \
-               (not self.is_owner_only(cmd) or is_owner) and \
-               (not self.is_jishaku_command(cmd) or is_owner) and \
-               cmd.binding and cmd.binding.__class__.__name__ != "HelpCog":
-                if cmd.qualified_name not in seen_commands:
-                    choices.append(
-                        app_commands.Choice(name=f"/{cmd.qualified_name}",
-                                            value=cmd.qualified_name))
-                    seen_commands.add(cmd.qualified_name)
-
-        return sorted(choices, key=lambda c: c.name)[:25]
+        return [
+            app_commands.Choice(name=f"/{entry.name}", value=entry.name)
+            for entry in self.catalog.search(current, include_hidden=is_owner)
+        ]
 
     async def send_command_help(self, ctx: ContextType, command_name: str,
                                 prefix: str) -> None:
@@ -353,43 +291,8 @@ class HelpCog(commands.Cog):
                                     prefix: str) -> None:
         is_owner = await self.is_owner(
             ctx.author if isinstance(ctx, commands.Context) else ctx.user)
-        cog_commands: Dict[str, List[CommandType]] = {"Home": []}
-        seen_commands = set()
-
-        for command in sorted(self.bot.tree.walk_commands(),
-                              key=lambda c: c.name):
-            if isinstance(command, app_commands.Command) and \
-               (not self.is_owner_only(command) or is_owner) and \
-               (not self.is_jishaku_command(command) or is_owner) and \
-               command.binding and command.binding.__class__.__name__ != "HelpCog":
-                cog_name = command.binding.__class__.__name__ if command.binding else self.no_category_name
-                if cog_name not in cog_commands:
-                    cog_commands[cog_name] = []
-                cog_commands[cog_name].append(command)
-                seen_commands.add(command.qualified_name)
-
-        for command in sorted(self.bot.commands, key=lambda c: c.name):
-            if command.qualified_name not in seen_commands and \
-               (not self.is_owner_only(command) or is_owner) and \
-               (not self.is_jishaku_command(command) or is_owner) and \
-               command.cog and command.cog.qualified_name != "HelpCog":
-                cog_name = command.cog.qualified_name if command.cog else self.no_category_name
-                if cog_name not in cog_commands:
-                    cog_commands[cog_name] = []
-                cog_commands[cog_name].append(command)
-
-        view = HelpView(self, ctx, cog_commands)
-        view.category_select.options = [
-            discord.SelectOption(label="Home",
-                                 description="Return to the main help menu",
-                                 emoji=CATEGORY_EMOJIS["Home"])
-        ] + [
-            discord.SelectOption(label=category,
-                                 description=f"{len(commands)} commands",
-                                 emoji=CATEGORY_EMOJIS.get(category, "❓"))
-            for category, commands in cog_commands.items()
-            if category != "Home"
-        ]
+        view = HelpView(self, ctx, include_hidden=is_owner)
+        view.category_select.options = self.catalog.select_options(is_owner)
 
         initial_embed = view.create_home_embed()
 
@@ -401,25 +304,7 @@ class HelpCog(commands.Cog):
 
         view.message = message
 
-        # Start a background task to check for timeout
-        self.bot.loop.create_task(self.check_view_timeout(view))
-
-    async def check_view_timeout(self, view: HelpView) -> None:
-        while not view.is_finished():
-            await asyncio.sleep(1)
-            if asyncio.get_event_loop().time(
-            ) - view.last_interaction_time > VIEW_TIMEOUT:
-                for item in view.children:
-                    if isinstance(item,
-                                  (discord.ui.Button, discord.ui.Select)):
-                        item.disabled = True
-                if view.message:
-                    try:
-                        await view.message.edit(view=view)
-                    except discord.errors.NotFound:
-                        pass
-                view.stop()
-                break
+        timers.schedule(view, VIEW_TIMEOUT, view.on_timeout)
 
     async def send_owner_only_message(self, ctx: ContextType) -> None:
         embed = discord.Embed(title=self.embed_title,
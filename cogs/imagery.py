@@ -3,18 +3,23 @@ from discord.ext import commands
 from discord import app_commands
 import aiohttp
 import os
-import asyncio
 from io import BytesIO
 from PIL import Image
 from discord.app_commands import Choice
 from typing import Optional, List, Dict
-from collections import defaultdict
-import time
-import requests
 from modules.asciify import asciify
 from typing import Union
 from modules.emojify import emojify_image
 from discord import Member
+from utils.timers import timers
+from utils.lazy import lazy_import
+from utils.metrics import http_session
+from utils.state import state
+
+requests = lazy_import('requests')  # Only used by the emojify command
+
+COMMAND_COOLDOWN = 5  # Seconds between image commands per user and guild
+PLANT_VIEW_TIMEOUT = 60  # Seconds of inactivity before plant results close
 
 
 # OCR Service for text recognition
@@ -37,7 +42,7 @@ class OCRService:
         data.add_field('isTable', 'false')
         data.add_field('OCREngine', '2')
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.post(self.url, data=data,
                                     ssl=False) as response:
                 return await response.json()
@@ -160,9 +165,15 @@ class Paginator(BasePaginator):
 class PlantView(BasePaginator):
 
     def __init__(self, pages: List[discord.Embed]):
-        super().__init__(timeout=60)
+        # Expiry is driven by the shared timer service, see identify_plant
+        super().__init__(timeout=None)
         self.pages = pages
 
+    async def interaction_check(self,
+                                interaction: discord.Interaction) -> bool:
+        timers.touch(self)
+        return True
+
     @discord.ui.button(label="Previous", style=discord.ButtonStyle.blurple)
     async def previous_button(self, button: discord.ui.Button,
                               interaction: discord.Interaction):
@@ -194,20 +205,15 @@ class Imagery(commands.Cog):
         self.ocr_service = OCRService(os.environ["ITT_KEY"])
         self.api_key = os.environ["PLANTNET_API_KEY"]
         self.api_url = "https://my-api.plantnet.org/v2/identify/all"
-        self.cooldowns = defaultdict(lambda: 0)
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = http_session()
 
     async def cog_unload(self):
         await self.session.close()
 
     async def cooldown_check(self, interaction: discord.Interaction) -> bool:
-        current_time = time.time()
-        if current_time - self.cooldowns[(interaction.guild_id,
-                                          interaction.user.id)] < 5:
-            return False
-        self.cooldowns[(interaction.guild_id,
-                        interaction.user.id)] = current_time
-        return True
+        return await state.set_if_absent(
+            f"imagery_cooldown:{interaction.guild_id}:{interaction.user.id}",
+            1, COMMAND_COOLDOWN)
 
     @app_commands.command(
         name="identify",
@@ -299,20 +305,13 @@ class Imagery(commands.Cog):
                 message = await interaction.followup.send(embed=pages[0],
                                                           view=view)
                 view.message = message
-                self.bot.loop.create_task(self.check_view_timeout(view))
+                timers.schedule(view, PLANT_VIEW_TIMEOUT, view.on_timeout)
             else:
                 await interaction.followup.send(
                     "Sorry, I couldn't identify the plant in the image.")
         except Exception as e:
             await interaction.followup.send(f"An error occurred: {str(e)}")
 
-    async def check_view_timeout(self, view: PlantView):
-        while not view.is_finished():
-            if asyncio.get_event_loop().time() - view.last_interaction > 60:
-                await view.on_timeout()
-                break
-            await asyncio.sleep(1)
-
     async def get_image_data(self, attachment: Optional[discord.Attachment],
                              url: Optional[str]) -> bytes:
         if attachment:
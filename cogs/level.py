@@ -5,11 +5,16 @@ import random
 from PIL import Image, ImageDraw, ImageFont, ImageEnhance
 import io
 from database import db
-import time
 from typing import Optional, Dict, Union
 import os
 import base64
 from modules.levelmod import *
+from utils.members import resolve_members
+from utils.outbox import outbox
+from utils.state import invalidation, state
+
+# Invalidation namespace for guild_leveling_settings and level_role_rewards
+SETTINGS_NAMESPACE = "leveling"
 
 
 class Leveling(commands.Cog):
@@ -19,7 +24,6 @@ class Leveling(commands.Cog):
         self.leveling_settings: Dict[int,
                                      Dict[str,
                                           int | bool | Optional[int]]] = {}
-        self.cooldowns: Dict[int, Dict[int, float]] = {}
         self.default_level_up_message: str = "Congratulations {user_mention}! You've reached level {new_level}! {role_rewards}"
         self.role_rewards: Dict[int, Dict[int, int]] = {}
 
@@ -29,9 +33,34 @@ class Leveling(commands.Cog):
         await self.load_settings()
         await self.load_role_rewards()
         self.db = db
+        invalidation.subscribe(SETTINGS_NAMESPACE, self.reload_settings)
 
     async def cog_unload(self):
-        await self.db.close()
+        invalidation.unsubscribe(SETTINGS_NAMESPACE, self.reload_settings)
+
+    async def reload_settings(self, guild_id: Optional[str]) -> None:
+        """Refresh cached settings and role rewards changed by another worker."""
+        if guild_id is None:
+            self.leveling_settings.clear()
+            self.role_rewards.clear()
+            await self.load_settings()
+            await self.load_role_rewards()
+            return
+        guild_id = int(guild_id)
+        settings = await db.fetch(
+            "SELECT * FROM guild_leveling_settings WHERE guild_id = $1;",
+            guild_id)
+        rewards = await db.fetch(
+            "SELECT * FROM level_role_rewards WHERE guild_id = $1;", guild_id)
+        if settings:
+            self.leveling_settings[guild_id] = self.settings_from_row(
+                settings[0])
+        else:
+            self.leveling_settings.pop(guild_id, None)
+        self.role_rewards[guild_id] = {
+            row['level']: row['role_id']
+            for row in rewards
+        }
 
     async def is_premium(self, user_id: int) -> bool:
         query = "SELECT is_premium FROM users WHERE user_id = $1;"
@@ -75,20 +104,21 @@ class Leveling(commands.Cog):
             new_level=new_level,
             role_rewards=role_rewards_text)
 
-        file = discord.File(rank_card, filename="rank_card.png")
+        # Unique names so merged announcements keep every card
+        file = discord.File(rank_card, filename=f"rank_card_{user_id}.png")
 
         if guild_settings['announcement_channel']:
             channel = self.bot.get_channel(
                 guild_settings['announcement_channel'])
             if channel:
-                await channel.send(content=level_up_message, file=file)
+                await outbox.send(channel, level_up_message, file=file)
         else:
             # Send in the original channel if no announcement channel is set
             if isinstance(context, discord.Interaction):
                 await context.followup.send(content=level_up_message,
                                             file=file)
             else:
-                await context.channel.send(content=level_up_message, file=file)
+                await outbox.send(context.channel, level_up_message, file=file)
 
     async def create_tables(self):
         queries = [
@@ -174,24 +204,23 @@ class Leveling(commands.Cog):
             query = "SELECT * FROM guild_leveling_settings;"
             results = await db.fetch(query)
             for row in results:
-                self.leveling_settings[row['guild_id']] = {
-                    'enabled':
-                    row['enabled'],
-                    'xp_min':
-                    row['xp_min'],
-                    'xp_max':
-                    row['xp_max'],
-                    'xp_cooldown':
-                    row['xp_cooldown'],
-                    'announcement_channel':
-                    row.get('announcement_channel'),
-                    'level_up_message':
-                    row.get('level_up_message')
-                    or self.default_level_up_message
-                }
+                self.leveling_settings[row['guild_id']] = self.settings_from_row(
+                    row)
         except Exception as e:
             print(f"Error loading settings: {e}")
 
+    def settings_from_row(
+            self, row) -> Dict[str, int | bool | Optional[int]]:
+        return {
+            'enabled': row['enabled'],
+            'xp_min': row['xp_min'],
+            'xp_max': row['xp_max'],
+            'xp_cooldown': row['xp_cooldown'],
+            'announcement_channel': row.get('announcement_channel'),
+            'level_up_message': row.get('level_up_message')
+            or self.default_level_up_message
+        }
+
     async def load_role_rewards(self):
         try:
             query = "SELECT * FROM level_role_rewards;"
@@ -216,17 +245,16 @@ class Leveling(commands.Cog):
         user_id = message.author.id
         guild_id = message.guild.id
 
-        current_time = time.time()
-        if guild_id not in self.cooldowns:
-            self.cooldowns[guild_id] = {}
-        last_message_time = self.cooldowns[guild_id].get(user_id, 0)
-        if current_time - last_message_time < guild_settings['xp_cooldown']:
+        # Claiming the cooldown first keeps concurrent messages (or workers)
+        # from awarding XP twice
+        cooldown = guild_settings['xp_cooldown']
+        if cooldown > 0 and not await state.set_if_absent(
+                f"xp_cooldown:{guild_id}:{user_id}", 1, cooldown):
             return
 
         xp_gained = random.randint(guild_settings['xp_min'],
                                    guild_settings['xp_max'])
         leveled_up, new_level = await self.add_xp(user_id, guild_id, xp_gained)
-        self.cooldowns[guild_id][user_id] = current_time
 
         if leveled_up:
             awarded_roles = await self.check_and_award_role(
@@ -575,6 +603,7 @@ class Leveling(commands.Cog):
             await db.execute(query, interaction.guild_id, view.is_enabled,
                              view.xp_min, view.xp_max, view.xp_cooldown,
                              view.announcement_channel, view.level_up_message)
+            await invalidation.publish(SETTINGS_NAMESPACE, interaction.guild_id)
 
             confirmation_embed = self.create_setup_embed(new_settings,
                                                          view.role_rewards,
@@ -636,8 +665,10 @@ class Leveling(commands.Cog):
 
             embed = discord.Embed(title="🏆 XP Leaderboard",
                                   color=discord.Color.gold())
+            members = await resolve_members(
+                interaction.guild, [row['user_id'] for row in results])
             for row in results:
-                user = interaction.guild.get_member(row['user_id'])
+                user = members.get(row['user_id'])
                 if user:
                     embed.add_field(
                         name=f"{row['rank']}. {user.display_name}",
@@ -758,6 +789,7 @@ class Leveling(commands.Cog):
             if interaction.guild_id not in self.role_rewards:
                 self.role_rewards[interaction.guild_id] = {}
             self.role_rewards[interaction.guild_id][level] = role.id
+            await invalidation.publish(SETTINGS_NAMESPACE, interaction.guild_id)
 
             await interaction.followup.send(
                 f"Successfully set `@{role.name}` as the reward for reaching level {level}."
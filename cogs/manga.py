@@ -1,8 +1,8 @@
 import discord
 from discord.ext import commands
 from discord.ui import Button, View, Select, Modal, TextInput
-import aiohttp
 import re
+from utils.metrics import http_session
 
 
 class MangaReaderCog(commands.Cog):
@@ -32,7 +32,7 @@ class MangaReaderCog(commands.Cog):
             await self.search_manga(ctx, query, specified_volume)
 
     async def search_manga(self, ctx, manga_name, specified_volume):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get('https://api.mangadex.org/manga',
                                    params={
                                        'title': manga_name,
@@ -92,7 +92,7 @@ class MangaReaderCog(commands.Cog):
                        ephemeral=True)
 
     async def display_manga(self, ctx, manga_id, specified_volume=None):
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                     f'https://api.mangadex.org/manga/{manga_id}') as response:
                 if response.status != 200:
@@ -195,7 +195,7 @@ class MangaReaderCog(commands.Cog):
                 ephemeral=True)
             return False
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(
                     f'https://api.mangadex.org/at-home/server/{chapter_id}'
             ) as pages_response:
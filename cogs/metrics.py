@@ -0,0 +1,90 @@
+from typing import List, Tuple
+import discord
+from discord.ext import commands
+from utils.metrics import (COMMAND_LATENCY, DB_QUERY_LATENCY,
+                           HTTP_REQUEST_LATENCY, LISTENER_LATENCY, LOOP_LAG,
+                           RENDER_IN_FLIGHT, RENDER_QUEUE_DEPTH,
+                           SHARD_EVENTS, SHARD_GUILDS, SHARD_LATENCY,
+                           Histogram, loop_monitor)
+
+TOP_ENTRIES = 5  # Rows shown per section of the summary
+
+
+class Metrics(commands.Cog):
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+
+    @staticmethod
+    def format_ms(seconds: float) -> str:
+        return f"{seconds * 1000:.1f}ms"
+
+    def format_histogram(self, histogram: Histogram,
+                         sort_by_total: bool = False) -> str:
+        rows: List[Tuple[float, str]] = []
+        for labels, child in histogram.children():
+            if not child.count:
+                continue
+            name = " / ".join(label for label in labels if label) or "all"
+            key = child.sum if sort_by_total else child.quantile(0.95)
+            rows.append(
+                (key, f"`{name}` n={child.count} "
+                 f"p50={self.format_ms(child.quantile(0.5))} "
+                 f"p95={self.format_ms(child.quantile(0.95))} "
+                 f"total={child.sum:.1f}s"))
+        if not rows:
+            return "No samples yet."
+        rows.sort(key=lambda row: row[0], reverse=True)
+        return "\n".join(row for _, row in rows[:TOP_ENTRIES])[:1024]
+
+    def format_shards(self) -> str:
+        collect = getattr(self.bot, 'collect_shard_metrics', None)
+        if collect is not None:
+            collect()
+        rows = [
+            f"`{labels[0]}` {self.format_ms(SHARD_LATENCY.labels(*labels).value)}"
+            f" guilds={int(child.value)}"
+            f" events={int(SHARD_EVENTS.labels(*labels).value)}"
+            for labels, child in sorted(SHARD_GUILDS.children(),
+                                        key=lambda item: int(item[0][0]))
+        ]
+        return "\n".join(rows)[:1024] or "No shards connected."
+
+    @commands.command(name="metrics")
+    @commands.is_owner()
+    async def metrics(self, ctx: commands.Context) -> None:
+        """Show a summary of latency metrics collected since startup."""
+        lag = LOOP_LAG.labels()
+        embed = discord.Embed(title="Runtime metrics",
+                              color=discord.Color.blurple())
+        embed.add_field(
+            name="Event loop lag",
+            value=f"last={self.format_ms(loop_monitor.last_lag)} "
+            f"p50={self.format_ms(lag.quantile(0.5))} "
+            f"p99={self.format_ms(lag.quantile(0.99))} "
+            f"max={self.format_ms(lag.max)}",
+            inline=False)
+        embed.add_field(name="Slowest commands (p95)",
+                        value=self.format_histogram(COMMAND_LATENCY),
+                        inline=False)
+        embed.add_field(name="Busiest listeners (total time)",
+                        value=self.format_histogram(LISTENER_LATENCY,
+                                                    sort_by_total=True),
+                        inline=False)
+        embed.add_field(name="Database",
+                        value=self.format_histogram(DB_QUERY_LATENCY),
+                        inline=False)
+        embed.add_field(name="Outbound HTTP (p95)",
+                        value=self.format_histogram(HTTP_REQUEST_LATENCY),
+                        inline=False)
+        embed.add_field(
+            name="Render pool",
+            value=f"in flight={int(RENDER_IN_FLIGHT.labels().value)} "
+            f"queued={int(RENDER_QUEUE_DEPTH.labels().value)}",
+            inline=False)
+        embed.add_field(name="Shards", value=self.format_shards(), inline=False)
+        await ctx.send(embed=embed)
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Metrics(bot))
@@ -9,6 +9,12 @@ from discord import app_commands
 from discord.ext.commands import Context
 import platform
 from datetime import datetime, timedelta
+from utils.scheduler import scheduler
+from utils.metrics import http_session
+from utils.members import ensure_chunked
+from utils.outbox import outbox
+
+TEMP_ROLE_JOB = "role.remove"
 
 
 # Utility Functions
@@ -103,14 +109,13 @@ async def _recreate_channel_data(
                             f"Error reading attachment: {attachment.filename}")
 
                 if content or embeds or files:
-                    new_message = await new_channel.send(content=content
-                                                         or None,
-                                                         embeds=embeds,
-                                                         files=files)
+                    # Each message is pinned, so they are paced, not merged
+                    new_message = await outbox.send(new_channel,
+                                                    content or None,
+                                                    embeds=embeds,
+                                                    files=files,
+                                                    mergeable=False)
                     await new_message.pin()
-                    await asyncio.sleep(0.5)
-                    if files:
-                        await asyncio.sleep(1)
                 else:
                     print("Skipping empty message")
 
@@ -140,10 +145,13 @@ class RoleInfoView(discord.ui.View):
     @discord.ui.button(label="Show Members", style=discord.ButtonStyle.primary)
     async def show_members(self, interaction: discord.Interaction,
                            button: discord.ui.Button):
+        # Fetching the member list can outlast the interaction deadline
+        await interaction.response.defer(ephemeral=True)
+        await ensure_chunked(self.role.guild)
         members = self.role.members
         if not members:
-            await interaction.response.send_message(
-                "No members have this role.", ephemeral=True)
+            await interaction.followup.send("No members have this role.",
+                                            ephemeral=True)
             return
 
         embed = discord.Embed(title=f"Members with {self.role.name} role",
@@ -156,7 +164,7 @@ class RoleInfoView(discord.ui.View):
             embed.add_field(name=f"Members {i}",
                             value="\n".join(chunk),
                             inline=False)
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
     @discord.ui.button(label="Show Permissions",
                        style=discord.ButtonStyle.primary)
@@ -343,14 +351,40 @@ class Moderation(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = http_session()
         self.nuke_cooldowns = commands.CooldownMapping.from_cooldown(
             1, 300, commands.BucketType.member)
 
+    async def cog_load(self):
+        """Register the job handler for temporary roles."""
+        scheduler.register(TEMP_ROLE_JOB, self.remove_temporary_role)
+
     async def cog_unload(self):
         """Cleanup resources when the cog is unloaded."""
+        scheduler.unregister(TEMP_ROLE_JOB)
         await self.session.close()
 
+    async def remove_temporary_role(self, payload: dict) -> None:
+        """Job handler that takes back a role granted by `role-add`."""
+        guild = self.bot.get_guild(payload['guild_id'])
+        if guild is None:
+            return  # The bot left the guild; nothing to undo
+        role = guild.get_role(payload['role_id'])
+        try:
+            member = guild.get_member(
+                payload['member_id']) or await guild.fetch_member(
+                    payload['member_id'])
+        except discord.NotFound:
+            return  # The member left the guild
+        if role is None or role not in member.roles:
+            return
+        await member.remove_roles(role, reason="Temporary role expired")
+        channel = guild.get_channel(payload['channel_id'])
+        if channel:
+            await channel.send(
+                f"Removed role {role.mention} from {member.mention} after {payload['duration']} seconds."
+            )
+
     @commands.hybrid_command()
     async def avatar(self,
                      ctx: commands.Context,
@@ -711,11 +745,15 @@ class Moderation(commands.Cog):
         await ctx.send(f"Added role {role.mention} to {member.mention}.",
                        ephemeral=True)
         if time:
-            await asyncio.sleep(time)
-            await member.remove_roles(role)
-            await ctx.send(
-                f"Removed role {role.mention} from {member.mention} after {time} seconds.",
-                ephemeral=True)
+            await scheduler.schedule(
+                TEMP_ROLE_JOB,
+                discord.utils.utcnow() + timedelta(seconds=time), {
+                    'guild_id': ctx.guild.id,
+                    'member_id': member.id,
+                    'role_id': role.id,
+                    'channel_id': ctx.channel.id,
+                    'duration': time
+                })
 
     @commands.hybrid_command(name="role-remove")
     @commands.has_permissions(manage_roles=True)
@@ -753,6 +791,9 @@ class Moderation(commands.Cog):
         embed.add_field(name="Position", value=role.position)
         embed.add_field(name="Created At",
                         value=role.created_at.strftime("%Y-%m-%d %H:%M:%S"))
+        if not role.guild.chunked:
+            await ctx.defer()
+            await ensure_chunked(role.guild)
         embed.add_field(name="Member Count", value=len(role.members))
         view = RoleInfoView(role)
         await ctx.send(embed=embed, view=view)
@@ -6,12 +6,21 @@ import random
 from typing import List, Optional, TypeVar, Union
 from hentai import Hentai, Format, Utils
 import DiscordUtils
-from rule34 import Rule34
 import asyncio
 from discord.errors import NotFound, HTTPException
-import aiohttp
+from utils.metrics import http_session
+from utils.lazy import lazy_import
 
-rule34 = Rule34()
+rule34_api = lazy_import('rule34')
+_rule34_client = None
+
+
+def get_rule34_client():
+    """Create the Rule34 client on first use instead of at import."""
+    global _rule34_client
+    if _rule34_client is None:
+        _rule34_client = rule34_api.Rule34()
+    return _rule34_client
 
 T = TypeVar('T')
 
@@ -44,7 +53,7 @@ class NSFW(commands.Cog):
                 file_type = random.choice(['gif', 'jpg', 'png', 'jpeg'])
                 tags += f" {file_type}"
 
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.get(
                         f'https://realbooru.com/index.php?page=dapi&s=post&q=index&json=1&limit=100&tags={tags}'
                 ) as resp:
@@ -139,11 +148,11 @@ Artist: {artist} | Upload date: {doujin.upload_date} | Page {num} of {len(doujin
 
         async def fetch_rule34():
             try:
-                images: Union[List[Rule34.Image],
-                              None] = await rule34.getImages(
+                images: Union[List[rule34_api.Rule34.Image],
+                              None] = await get_rule34_client().getImages(
                                   tags=query if query else "")
                 if images:
-                    finalimg: Rule34.Image = random.choice(images)
+                    finalimg: rule34_api.Rule34.Image = random.choice(images)
                     image_info = f"""```python
 Rule34 image (ID: {finalimg.id}, Score: {finalimg.score})
 ```"""
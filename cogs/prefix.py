@@ -48,9 +48,6 @@ class PrefixCog(commands.Cog):
     async def cog_load(self):
         await self.db_manager.initialize()
 
-    async def cog_unload(self):
-        await db.close()
-
     @staticmethod
     def is_valid_prefix(prefix: str) -> bool:
         return len(prefix) <= 10 and not any(char.isspace() for char in prefix)
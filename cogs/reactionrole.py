@@ -4,14 +4,19 @@ from discord import app_commands
 import random
 import string
 import asyncio
-from typing import Dict, Any, Set, List, Optional, Tuple
+from typing import Any, Set, List, Optional, Tuple, Union
 from abc import ABC, abstractmethod
 import aiohttp
 from database import db
+from modules.reactionrolemod import ReactionRoleEntry, ReactionRoleIndex
+from utils.metrics import http_session
+from utils.state import invalidation, state
 
 # Rate limits
 RATE_LIMIT_INTERVAL = 2
-RATE_LIMIT_CLEANUP_INTERVAL = 60
+
+# Invalidation namespace for the reaction_roles table
+REACTION_ROLES_NAMESPACE = "reaction_roles"
 
 
 class RolesyncCooldown:
@@ -19,19 +24,15 @@ class RolesyncCooldown:
     def __init__(self, rate: int, per: int) -> None:
         self.rate = rate
         self.per = per
-        self.last_used: Dict[int, float] = {}
 
-    def __call__(self, ctx: commands.Context) -> bool:
-        now = ctx.message.created_at.timestamp()
+    async def __call__(self, ctx: commands.Context) -> bool:
         bucket = ctx.guild.id if ctx.guild else ctx.author.id
-        if bucket in self.last_used:
-            last = self.last_used[bucket]
-            if now - last < self.per:
-                raise commands.CommandOnCooldown(
-                    cooldown=commands.Cooldown(self.rate, self.per),
-                    retry_after=self.per - (now - last),
-                    type=commands.BucketType.guild)
-        self.last_used[bucket] = now
+        key = f"rolesync_cooldown:{bucket}"
+        if not await state.set_if_absent(key, 1, self.per):
+            raise commands.CommandOnCooldown(
+                cooldown=commands.Cooldown(self.rate, self.per),
+                retry_after=await state.remaining(key),
+                type=commands.BucketType.guild)
         return True
 
 
@@ -46,12 +47,9 @@ class NavigationView(discord.ui.View):
         self.current_page = 0
         self.message_ids = self.get_message_ids()
 
-    def get_message_ids(self) -> List[str]:
-        return ['overview'] + [
-            message_id for message_id, roles_data in self.cog.reaction_roles[
-                str(self.guild.id)].items()
-            if roles_data[0]['channel_id'] == str(self.channel.id)
-        ]
+    def get_message_ids(self) -> List[Union[str, int]]:
+        return ['overview'] + self.cog.reaction_roles.messages_in_channel(
+            self.channel.id)
 
     def update_button_state(self) -> None:
         self.prev_button.disabled = self.current_page == 0
@@ -183,32 +181,38 @@ class ReactionRoleManager:
     def __init__(self, cog: commands.Cog) -> None:
         self.cog = cog
 
-    async def add_buttons_to_message(self, message: discord.Message,
-                                     roles_data: List[Dict[str, Any]]) -> None:
+    async def add_buttons_to_message(
+            self, message: discord.Message,
+            roles_data: List[ReactionRoleEntry]) -> None:
         """Add reaction role buttons to a message."""
-        guild = message.guild
         view = discord.ui.View(timeout=None)
         for role_data in roles_data:
-            role = guild.get_role(int(role_data['role_id']))
-            emoji = role_data['emoji']
-            color = discord.ButtonStyle(int(role_data['color']))
-            custom_id = role_data['custom_id']
-            link = role_data.get('link')
+            link = role_data.link
             if link and link.lower().startswith(
                 ('http://', 'https://', 'discord:')):
-                button = discord.ui.Button(url=link, emoji=emoji)
+                button = discord.ui.Button(url=link, emoji=role_data.emoji)
             else:
-                button = discord.ui.Button(style=color,
-                                           emoji=emoji,
-                                           custom_id=custom_id)
-                button.callback = self.create_button_callback(role)
+                button = discord.ui.Button(style=discord.ButtonStyle(
+                    role_data.color),
+                                           emoji=role_data.emoji,
+                                           custom_id=role_data.custom_id)
+                button.callback = self.create_button_callback(
+                    role_data.custom_id)
             view.add_item(button)
         await message.edit(view=view)
 
-    def create_button_callback(self, role: discord.Role) -> discord.ui.Button:
+    def create_button_callback(self, custom_id: str) -> discord.ui.Button:
 
         async def button_callback(interaction: discord.Interaction) -> None:
-            if not self.cog.check_rate_limit(interaction.user.id):
+            entry = self.cog.reaction_roles.by_custom_id(custom_id)
+            role = interaction.guild.get_role(
+                entry.role_id) if entry and interaction.guild else None
+            if role is None:
+                await interaction.response.send_message(
+                    "This reaction role is no longer available.",
+                    ephemeral=True)
+                return
+            if not await self.cog.check_rate_limit(interaction.user.id):
                 await interaction.response.send_message(
                     "You're doing that too fast. Please wait a moment.",
                     ephemeral=True)
@@ -227,11 +231,8 @@ class ReactionRoleManager:
     async def handle_message_deletion(self, message: discord.Message) -> None:
         """Handle message deletion events."""
         if message.guild:
-            guild_id = str(message.guild.id)
-            message_id = str(message.id)
-            if guild_id in self.cog.reaction_roles and message_id in self.cog.reaction_roles[
-                    guild_id]:
-                self.cog.delete_reaction_role(guild_id, message_id)
+            if message.id in self.cog.reaction_roles:
+                self.cog.delete_reaction_role(message.id)
         else:
             # Handle DM message deletion if necessary
             pass
@@ -242,40 +243,38 @@ class ReactionRole(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self.role_manager = ReactionRoleManager(self)
-        self.reaction_roles: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
-        self.tracked_messages: Set[str] = set()
+        self.reaction_roles: ReactionRoleIndex = ReactionRoleIndex()
+        self.tracked_messages: Set[int] = set()
         self.bot.loop.create_task(self.setup_reaction_roles())
-        self.rate_limit_dict: Dict[int, float] = {}
-        self.bot.loop.create_task(self.cleanup_rate_limit_dict())
         self.bot.loop.create_task(
             db.initialize())  # Initialize the database pool
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = http_session()
+        invalidation.subscribe(REACTION_ROLES_NAMESPACE,
+                               self.reload_reaction_roles)
 
     async def cog_unload(self) -> None:
         """Cleanup resources when the cog is unloaded."""
+        invalidation.unsubscribe(REACTION_ROLES_NAMESPACE,
+                                 self.reload_reaction_roles)
         await self.session.close()
-        await db.close()
 
-    def check_rate_limit(self, user_id: int) -> bool:
+    async def check_rate_limit(self, user_id: int) -> bool:
         """Check if a user has exceeded the rate limit for button clicks."""
-        current_time = asyncio.get_event_loop().time()
-        if user_id in self.rate_limit_dict:
-            last_time = self.rate_limit_dict[user_id]
-            if current_time - last_time < RATE_LIMIT_INTERVAL:
-                return False
-        self.rate_limit_dict[user_id] = current_time
-        return True
-
-    async def cleanup_rate_limit_dict(self) -> None:
-        """Periodically clean up the rate limit dictionary to prevent memory leaks."""
-        while not self.bot.is_closed():
-            current_time = asyncio.get_event_loop().time()
-            self.rate_limit_dict = {
-                user_id: last_time
-                for user_id, last_time in self.rate_limit_dict.items()
-                if current_time - last_time < RATE_LIMIT_INTERVAL
-            }
-            await asyncio.sleep(RATE_LIMIT_CLEANUP_INTERVAL)
+        return await state.set_if_absent(f"reaction_role_rate:{user_id}", 1,
+                                         RATE_LIMIT_INTERVAL)
+
+    async def reload_reaction_roles(self, guild_id: Optional[str]) -> None:
+        """Refresh reaction roles another worker added for a guild."""
+        if guild_id is None:
+            records = await db.fetch("SELECT * FROM reaction_roles")
+            self.reaction_roles.clear()
+        else:
+            records = await db.fetch(
+                "SELECT * FROM reaction_roles WHERE guild_id = $1",
+                int(guild_id))
+            self.reaction_roles.remove_guild(int(guild_id))
+        for record in records:
+            self.reaction_roles.add(ReactionRoleEntry.from_record(record))
 
     async def save_reaction_roles(self) -> None:
         """Save the current reaction roles data to the database."""
@@ -284,33 +283,29 @@ class ReactionRole(commands.Cog):
             await db.execute("BEGIN")
 
             # Iterate through the saved reaction roles in memory
-            for guild_id, messages in self.reaction_roles.items():
-                for message_id, roles_data in messages.items():
-                    for role_data in roles_data:
-                        # Insert the reaction role data into the database
-                        # If a conflict occurs on the (guild_id, message_id, role_id) combination,
-                        # update the existing record with the new data
-                        await db.execute(
-                            """INSERT INTO reaction_roles(guild_id, message_id, role_id, channel_id, emoji, color, custom_id, link)
-                               VALUES($1, $2, $3, $4, $5, $6, $7, $8)
-                               ON CONFLICT (guild_id, message_id, role_id)
-                               DO UPDATE SET channel_id = EXCLUDED.channel_id,
-                                             emoji = EXCLUDED.emoji,
-                                             color = EXCLUDED.color,
-                                             custom_id = EXCLUDED.custom_id,
-                                             link = EXCLUDED.link""",
-                            # Bind the values for the SQL query
-                            str(guild_id),  # Guild ID
-                            str(message_id),  # Message ID
-                            str(role_data['role_id']),  # Role ID
-                            str(role_data['channel_id']),  # Channel ID
-                            str(role_data['emoji']),  # Emoji
-                            str(role_data['color']),  # Color
-                            str(role_data['custom_id']
-                                ),  # Custom ID for the button
-                            str(role_data.get(
-                                'link', ''))  # Optional link for the button
-                        )
+            for role_data in self.reaction_roles:
+                # Insert the reaction role data into the database
+                # If a conflict occurs on the (guild_id, message_id, role_id) combination,
+                # update the existing record with the new data
+                await db.execute(
+                    """INSERT INTO reaction_roles(guild_id, message_id, role_id, channel_id, emoji, color, custom_id, link)
+                       VALUES($1, $2, $3, $4, $5, $6, $7, $8)
+                       ON CONFLICT (guild_id, message_id, role_id)
+                       DO UPDATE SET channel_id = EXCLUDED.channel_id,
+                                     emoji = EXCLUDED.emoji,
+                                     color = EXCLUDED.color,
+                                     custom_id = EXCLUDED.custom_id,
+                                     link = EXCLUDED.link""",
+                    # Bind the values for the SQL query
+                    role_data.guild_id,  # Guild ID
+                    role_data.message_id,  # Message ID
+                    role_data.role_id,  # Role ID
+                    role_data.channel_id,  # Channel ID
+                    role_data.emoji,  # Emoji
+                    str(role_data.color),  # Color
+                    role_data.custom_id,  # Custom ID for the button
+                    role_data.link or ''  # Optional link for the button
+                )
 
             # Commit the transaction to save all changes to the database
             await db.execute("COMMIT")
@@ -328,7 +323,7 @@ class ReactionRole(commands.Cog):
             for message_id in self.tracked_messages:
                 await db.execute(
                     "INSERT INTO tracked_messages(message_id) VALUES($1) ON CONFLICT (message_id) DO NOTHING",
-                    str(message_id))
+                    message_id)
             await db.execute("COMMIT")
         except Exception as e:
             await db.execute("ROLLBACK")
@@ -337,7 +332,7 @@ class ReactionRole(commands.Cog):
     async def setup_reaction_roles(self) -> None:
         """Setup reaction roles when the bot starts."""
         await self.bot.wait_until_ready()
-        to_delete: List[Tuple[str, Optional[str]]] = []
+        to_delete: List[Tuple[int, Optional[int]]] = []
 
         try:
             reaction_roles_data = await db.fetch("SELECT * FROM reaction_roles"
@@ -348,45 +343,26 @@ class ReactionRole(commands.Cog):
             print(f"Error fetching data: {e}")
             return
 
-        self.reaction_roles = {}
+        self.reaction_roles.clear()
         for record in reaction_roles_data:
-            guild_id = str(record['guild_id'])
-            message_id = str(record['message_id'])
-            if guild_id not in self.reaction_roles:
-                self.reaction_roles[guild_id] = {}
-            if message_id not in self.reaction_roles[guild_id]:
-                self.reaction_roles[guild_id][message_id] = []
-            self.reaction_roles[guild_id][message_id].append({
-                'role_id':
-                str(record['role_id']),
-                'channel_id':
-                str(record['channel_id']),
-                'emoji':
-                str(record['emoji']),
-                'color':
-                str(record['color']),
-                'custom_id':
-                str(record['custom_id']),
-                'link':
-                str(record['link']) if record['link'] else None
-            })
+            self.reaction_roles.add(ReactionRoleEntry.from_record(record))
 
         self.tracked_messages = set(
-            str(record['message_id']) for record in tracked_messages_data)
-        for guild_id, messages in self.reaction_roles.items():
-            guild = self.bot.get_guild(int(guild_id))
+            int(record['message_id']) for record in tracked_messages_data)
+        for guild_id in self.reaction_roles.guild_ids():
+            guild = self.bot.get_guild(guild_id)
             if guild is None:
                 to_delete.append((guild_id, None))
                 continue
-            for message_id, roles_data in messages.items():
-                channel = self.bot.get_channel(int(
-                    roles_data[0]['channel_id']))
+            for message_id in self.reaction_roles.messages_in_guild(guild_id):
+                roles_data = self.reaction_roles.get_message(message_id)
+                channel = self.bot.get_channel(roles_data[0].channel_id)
                 if channel:
                     try:
-                        message = await channel.fetch_message(int(message_id))
+                        message = await channel.fetch_message(message_id)
                         await self.role_manager.add_buttons_to_message(
                             message, roles_data)
-                        self.tracked_messages.add(str(message_id))
+                        self.tracked_messages.add(message_id)
                     except discord.NotFound:
                         to_delete.append((guild_id, message_id))
                 await asyncio.sleep(0.1)
@@ -394,37 +370,56 @@ class ReactionRole(commands.Cog):
         for entry in to_delete:
             guild_id, message_id = entry
             if message_id:
-                self.delete_reaction_role(guild_id, message_id)
+                self.delete_reaction_role(message_id)
             else:
-                del self.reaction_roles[guild_id]
+                self.reaction_roles.remove_guild(guild_id)
 
         await self.save_reaction_roles()
         await self.save_tracked_messages()
 
-    def delete_reaction_role(self, guild_id: str, message_id: str) -> None:
+    def delete_reaction_role(self, message_id: int) -> None:
         """Delete a reaction role from the saved data."""
-        if guild_id in self.reaction_roles and message_id in self.reaction_roles[
-                guild_id]:
-            del self.reaction_roles[guild_id][message_id]
-            if not self.reaction_roles[guild_id]:
-                del self.reaction_roles[guild_id]
+        self.reaction_roles.remove_message(message_id)
         asyncio.create_task(self.save_reaction_roles())
-        self.tracked_messages.discard(str(message_id))
+        self.tracked_messages.discard(message_id)
         asyncio.create_task(self.save_tracked_messages())
 
     @commands.Cog.listener()
     async def on_guild_channel_delete(
             self, channel: discord.abc.GuildChannel) -> None:
         """Event listener for channel deletions."""
-        guild_id = str(channel.guild.id)
-        if guild_id in self.reaction_roles:
-            messages_to_delete = [
-                message_id for message_id, roles_data in
-                self.reaction_roles[guild_id].items()
-                if roles_data[0]['channel_id'] == str(channel.id)
-            ]
-            for message_id in messages_to_delete:
-                self.delete_reaction_role(guild_id, message_id)
+        for message_id in self.reaction_roles.messages_in_channel(channel.id):
+            self.delete_reaction_role(message_id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        """Event listener for role deletions."""
+        removed = self.reaction_roles.remove_role(role.id)
+        if not removed:
+            return
+        await db.execute("DELETE FROM reaction_roles WHERE role_id = $1",
+                         role.id)
+        await invalidation.publish(REACTION_ROLES_NAMESPACE, role.guild.id)
+
+        # Re-render the messages so their button for the role goes away
+        channels = {entry.message_id: entry.channel_id for entry in removed}
+        for message_id, channel_id in channels.items():
+            channel = role.guild.get_channel(channel_id)
+            if channel is None:
+                continue
+            message = channel.get_partial_message(message_id)
+            roles_data = self.reaction_roles.get_message(message_id)
+            try:
+                if roles_data:
+                    await self.role_manager.add_buttons_to_message(
+                        message, roles_data)
+                else:
+                    await message.edit(view=None)
+            except discord.HTTPException as e:
+                print(f"Error updating reaction role message {message_id}: {e}")
+            if not roles_data:
+                self.tracked_messages.discard(message_id)
+        await self.save_tracked_messages()
 
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message) -> None:
@@ -476,27 +471,23 @@ class ReactionRole(commands.Cog):
                 if not emoji_obj:
                     raise ValueError("Invalid custom emoji ID.")
                 emoji = str(emoji_obj)
-            guild_id = str(interaction.guild.id)
-            message_id = str(message.id)
-            if guild_id not in self.reaction_roles:
-                self.reaction_roles[guild_id] = {}
-            if message_id not in self.reaction_roles[guild_id]:
-                self.reaction_roles[guild_id][message_id] = []
             custom_id = ''.join(
                 random.choices(string.ascii_letters + string.digits, k=20))
-            new_role_data = {
-                "role_id": str(role.id),
-                "channel_id": str(channel.id),
-                "emoji": emoji,
-                "color": color.value,
-                "custom_id": custom_id,
-                "link": link
-            }
-            self.reaction_roles[guild_id][message_id].append(new_role_data)
+            self.reaction_roles.add(
+                ReactionRoleEntry(guild_id=interaction.guild.id,
+                                  message_id=message.id,
+                                  channel_id=channel.id,
+                                  role_id=role.id,
+                                  emoji=emoji,
+                                  color=color.value,
+                                  custom_id=custom_id,
+                                  link=link))
             await self.save_reaction_roles()
+            await invalidation.publish(REACTION_ROLES_NAMESPACE,
+                                       interaction.guild.id)
             await self.role_manager.add_buttons_to_message(
-                message, self.reaction_roles[guild_id][message_id])
-            self.tracked_messages.add(str(message_id))
+                message, self.reaction_roles.get_message(message.id))
+            self.tracked_messages.add(message.id)
             await self.save_tracked_messages()
             await interaction.followup.send(
                 "Reaction role added successfully!", ephemeral=True)
@@ -527,16 +518,12 @@ class ReactionRole(commands.Cog):
                                     interaction: discord.Interaction) -> None:
         await interaction.response.defer(ephemeral=True, thinking=True)
         invalid_entries = await self.sync_reaction_roles()
-        guild_id = str(interaction.guild.id)
-        if guild_id not in self.reaction_roles or not self.reaction_roles[
-                guild_id]:
+        channel_ids = self.reaction_roles.channels_in_guild(
+            interaction.guild.id)
+        if not channel_ids:
             await interaction.followup.send(
                 "No reaction roles configured in this server.", ephemeral=True)
             return
-        channel_ids = {
-            int(roles_data[0]['channel_id'])
-            for roles_data in self.reaction_roles[guild_id].values()
-        }
         options = [
             discord.SelectOption(
                 label=interaction.guild.get_channel(channel_id).name,
@@ -598,31 +585,31 @@ class ReactionRole(commands.Cog):
 
     async def sync_reaction_roles(self) -> int:
         """Sync reaction roles data with current server state."""
-        to_delete: List[Tuple[str, Optional[str]]] = []
-        for guild_id, messages in self.reaction_roles.items():
-            guild = self.bot.get_guild(int(guild_id))
+        to_delete: List[Tuple[int, Optional[int]]] = []
+        for guild_id in self.reaction_roles.guild_ids():
+            guild = self.bot.get_guild(guild_id)
             if guild is None:
                 to_delete.append((guild_id, None))
                 continue
-            for message_id, roles_data in messages.items():
-                channel = self.bot.get_channel(int(
-                    roles_data[0]['channel_id']))
+            for message_id in self.reaction_roles.messages_in_guild(guild_id):
+                roles_data = self.reaction_roles.get_message(message_id)
+                channel = self.bot.get_channel(roles_data[0].channel_id)
                 if channel:
                     try:
-                        await channel.fetch_message(int(message_id))
+                        await channel.fetch_message(message_id)
                     except discord.NotFound:
                         to_delete.append((guild_id, message_id))
-                        self.tracked_messages.discard(str(message_id))
+                        self.tracked_messages.discard(message_id)
                 else:
                     to_delete.append((guild_id, message_id))
-                    self.tracked_messages.discard(str(message_id))
+                    self.tracked_messages.discard(message_id)
 
         for entry in to_delete:
             guild_id, message_id = entry
             if message_id:
-                self.delete_reaction_role(guild_id, message_id)
+                self.delete_reaction_role(message_id)
             else:
-                del self.reaction_roles[guild_id]
+                self.reaction_roles.remove_guild(guild_id)
 
         await self.save_reaction_roles()
         await self.save_tracked_messages()
@@ -630,25 +617,23 @@ class ReactionRole(commands.Cog):
 
     async def create_message_reaction_roles_embed(
             self, guild: discord.Guild, channel: discord.TextChannel,
-            message_id: str) -> discord.Embed:
+            message_id: int) -> discord.Embed:
         embed = discord.Embed(
             title=f"🎭 __Reaction Roles in #{channel.name}__",
             description="```yaml\nConfigured reaction roles for message:```",
             color=discord.Color.blurple())
         embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
-        guild_id = str(guild.id)
-        if guild_id not in self.reaction_roles or message_id not in self.reaction_roles[
-                guild_id]:
+        roles_data = self.reaction_roles.get_message(message_id)
+        if not roles_data:
             embed.add_field(name="Error",
                             value="No reaction roles found for this message.",
                             inline=False)
             return embed
-        roles_data = self.reaction_roles[guild_id][message_id]
-        message_link = f"https://discord.com/channels/{guild_id}/{channel.id}/{message_id}"
+        message_link = f"https://discord.com/channels/{guild.id}/{channel.id}/{message_id}"
         field_value = f"[🔗 Jump to Message]({message_link})\n\n"
         for role_data in roles_data:
-            role = guild.get_role(int(role_data['role_id']))
-            emoji = role_data['emoji']
+            role = guild.get_role(role_data.role_id)
+            emoji = role_data.emoji
             field_value += f"{emoji} {role.mention if role else 'Unknown Role'}\n"
         embed.add_field(name=f"📝 __Message ID: {message_id}__",
                         value=field_value,
@@ -668,15 +653,11 @@ class ReactionRole(commands.Cog):
             "```yaml\nOverview of reaction roles in this channel:```",
             color=discord.Color.blurple())
         embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
-        guild_id = str(guild.id)
-        channel_id = str(channel.id)
-        message_count = sum(
-            1 for roles_data in self.reaction_roles.get(guild_id, {}).values()
-            if roles_data[0]['channel_id'] == channel_id)
+        message_ids = self.reaction_roles.messages_in_channel(channel.id)
+        message_count = len(message_ids)
         role_count = sum(
-            len(roles_data)
-            for roles_data in self.reaction_roles.get(guild_id, {}).values()
-            if roles_data[0]['channel_id'] == channel_id)
+            len(self.reaction_roles.get_message(message_id))
+            for message_id in message_ids)
         embed.add_field(
             name="📊 __Summary__",
             value=
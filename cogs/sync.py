@@ -2,13 +2,15 @@ from typing import Literal, Optional
 import discord
 from discord.ext import commands
 import aiohttp
+from utils.metrics import http_session
+from utils.outbox import outbox
 
 
 class Sync(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = http_session()
 
     async def cog_unload(self):
         """Clean up resources when the cog is unloaded."""
@@ -34,7 +36,8 @@ class Sync(commands.Cog):
             else:
                 synced = await self.bot.tree.sync()
 
-            await ctx.send(
+            await outbox.send(
+                ctx.channel,
                 f"Synced {len(synced)} commands {'globally' if spec is None else 'to the current guild.'}"
             )
             return
@@ -48,7 +51,8 @@ class Sync(commands.Cog):
             else:
                 ret += 1
 
-        await ctx.send(f"Synced the tree to {ret}/{len(guilds)}.")
+        await outbox.send(ctx.channel,
+                          f"Synced the tree to {ret}/{len(guilds)}.")
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -10,11 +10,10 @@ from modules.wikimod import WikipediaSearcher, WikiEmbedCreator, WikiView
 from modules.weathermod import create_weather_embed
 from modules.urbanmod import UrbanDictionaryView, create_definition_embed, create_urban_dropdown, search_urban_dictionary
 from modules.shortnermod import URLShortenerCore
+from utils.metrics import http_session
 
 # Retrieve the Bitly API token from environment variables
 BITLY_TOKEN = os.getenv("BITLY_API")
-# In-memory storage for user rate limits (user_id -> (last_reset_time, count))
-user_rate_limits = {}
 RATE_LIMIT = 5  # Max number of URL shortenings per user within the reset interval
 RESET_INTERVAL = 60 * 60  # Reset interval in seconds (e.g., 1 hour)
 
@@ -23,7 +22,7 @@ class Utilities(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = http_session()
         self.searcher = WikipediaSearcher()
         self.embed_creator = WikiEmbedCreator()
         self.url_shortener_core = URLShortenerCore(BITLY_TOKEN or "",
@@ -142,8 +141,7 @@ class Utilities(commands.Cog):
         """Handles the /shorten command to shorten a given URL."""
         await ctx.defer()
         user_id = ctx.author.id
-        if not self.url_shortener_core.is_within_rate_limit(
-                user_id, user_rate_limits):
+        if not await self.url_shortener_core.is_within_rate_limit(user_id):
             await ctx.send(
                 "You have reached the rate limit. Please try again later.")
             return
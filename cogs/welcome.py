@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from utils.wel import get_welcome_card
+from utils.outbox import outbox
 from database import Database
 import datetime
 
@@ -398,8 +399,10 @@ class WelcomeCmds(commands.Cog):
 
         if welcome_card:
             welcome_card.seek(0)
-            file = discord.File(welcome_card, filename="welcome.png")
-            embed.set_image(url="attachment://welcome.png")
+            # Unique names so merged welcomes keep every card
+            filename = f"welcome_{member.id}.png"
+            file = discord.File(welcome_card, filename=filename)
+            embed.set_image(url=f"attachment://{filename}")
         else:
             file = None
             embed.set_thumbnail(url=member.display_avatar.url)
@@ -407,9 +410,10 @@ class WelcomeCmds(commands.Cog):
         sent = False
         try:
             if channel_enabled and channel:
-                await channel.send(content=member.mention,
-                                   embed=embed,
-                                   file=file)
+                await outbox.send(channel,
+                                  member.mention,
+                                  embed=embed,
+                                  file=file)
                 sent = True
             if dm_enabled:
                 await member.send(embed=embed)
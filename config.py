@@ -0,0 +1,122 @@
+import os
+import socket
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+# Gateway intents every deployment needs: guild structure and prefix commands
+BASE_INTENTS: Tuple[str, ...] = ('guilds', 'guild_messages', 'dm_messages',
+                                 'message_content')
+
+# Intents each extension needs on top of BASE_INTENTS. Extensions that are not
+# listed only use interactions and the guild cache.
+EXTENSION_INTENTS: Dict[str, Tuple[str, ...]] = {
+    "cogs.games": ('guild_reactions', 'emojis_and_stickers'),
+    "cogs.level": ('members', ),  # Leaderboard resolves members on demand
+    "cogs.mod": ('members', 'moderation'),
+    "cogs.reactionrole": ('members', ),
+    "cogs.welcome": ('members', ),
+}
+
+# "auto" derives intents from the extensions being loaded, "all" restores the
+# old behaviour, "default" uses discord.Intents.default()
+INTENTS_PROFILE = os.getenv('NIRA_INTENTS', 'auto')
+# Comma-separated intents to add to any profile, e.g. "presences"
+EXTRA_INTENTS = os.getenv('NIRA_EXTRA_INTENTS', '')
+# "auto" (from intents), "joined" or "none"
+MEMBER_CACHE = os.getenv('NIRA_MEMBER_CACHE', 'auto')
+# Size of the message cache; "none" disables it. Games listen to raw
+# reaction events, so nothing depends on a message still being cached.
+MAX_MESSAGES = os.getenv('NIRA_MAX_MESSAGES', '1000')
+# Request every guild's member list on connect instead of on demand
+CHUNK_AT_STARTUP = os.getenv('NIRA_CHUNK_AT_STARTUP', '0') == '1'
+
+# Total shards across the cluster; unset lets Discord recommend a count
+SHARD_COUNT = os.getenv('NIRA_SHARD_COUNT')
+# Shards this process runs, e.g. "0-3" or "4,5,6,7"; unset runs all of them
+SHARD_IDS = os.getenv('NIRA_SHARD_IDS')
+# Run as an AutoShardedBot; implied by setting a shard count or shard ids
+SHARDED = (os.getenv('NIRA_SHARDED', '0') == '1' or SHARD_COUNT is not None
+           or SHARD_IDS is not None)
+
+# Name of this process in a cluster; set by launcher.py for its workers
+WORKER_ID = os.getenv('NIRA_WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}"
+# Where cooldowns and rate limits live: "memory" (one process) or "redis"
+STATE_BACKEND = os.getenv('NIRA_STATE_BACKEND', 'memory')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+# Most keys the in-memory backend holds before evicting those expiring soonest
+STATE_MAX_KEYS = int(os.getenv('NIRA_STATE_MAX_KEYS', '100000'))
+
+# SQLite trivia corpus built with ``python -m modules.triviacorpus``
+TRIVIA_CORPUS = os.getenv('NIRA_TRIVIA_CORPUS', 'data/trivia.sqlite3')
+# Where trivia questions come from: "auto" (the API, falling back to the
+# corpus while the API is slow or failing), "api" or "corpus" (offline)
+TRIVIA_SOURCE = os.getenv('NIRA_TRIVIA_SOURCE', 'auto')
+
+
+def build_intents(extensions: Iterable[str],
+                  profile: str = INTENTS_PROFILE,
+                  extra: str = EXTRA_INTENTS) -> discord.Intents:
+    """Intents for the given profile; "auto" unions the extensions' needs."""
+    if profile == 'all':
+        intents = discord.Intents.all()
+    elif profile == 'default':
+        intents = discord.Intents.default()
+    elif profile == 'auto':
+        names = set(BASE_INTENTS)
+        for extension in extensions:
+            names.update(EXTENSION_INTENTS.get(extension, ()))
+        intents = discord.Intents(**dict.fromkeys(names, True))
+    else:
+        raise ValueError(f"Unknown NIRA_INTENTS profile: {profile!r}")
+    for name in filter(None, (part.strip() for part in extra.split(','))):
+        setattr(intents, name, True)
+    return intents
+
+
+def build_member_cache_flags(
+        intents: discord.Intents,
+        policy: str = MEMBER_CACHE) -> discord.MemberCacheFlags:
+    if policy == 'auto':
+        return discord.MemberCacheFlags.from_intents(intents)
+    if policy == 'joined':
+        return discord.MemberCacheFlags(voice=False, joined=True)
+    if policy == 'none':
+        return discord.MemberCacheFlags.none()
+    raise ValueError(f"Unknown NIRA_MEMBER_CACHE policy: {policy!r}")
+
+
+def parse_max_messages(value: str = MAX_MESSAGES) -> Optional[int]:
+    return None if value.lower() == 'none' else int(value)
+
+
+def parse_shard_ids(value: Optional[str] = SHARD_IDS) -> Optional[List[int]]:
+    """Parse "0-3,6" style shard id lists."""
+    if not value:
+        return None
+    shard_ids: List[int] = []
+    for part in value.split(','):
+        part = part.strip()
+        if '-' in part:
+            first, last = part.split('-', 1)
+            shard_ids.extend(range(int(first), int(last) + 1))
+        elif part:
+            shard_ids.append(int(part))
+    return sorted(set(shard_ids))
+
+
+def shard_options(count: Optional[str] = SHARD_COUNT,
+                  ids: Optional[str] = SHARD_IDS) -> Dict[str, object]:
+    """Keyword arguments for AutoShardedBot from the shard settings."""
+    shard_ids = parse_shard_ids(ids)
+    if shard_ids is not None and count is None:
+        raise ValueError("NIRA_SHARD_IDS requires NIRA_SHARD_COUNT")
+    options: Dict[str, object] = {}
+    if count is not None:
+        options['shard_count'] = int(count)
+    if shard_ids is not None:
+        if shard_ids[-1] >= int(count):
+            raise ValueError(
+                f"Shard id {shard_ids[-1]} is outside NIRA_SHARD_COUNT={count}")
+        options['shard_ids'] = shard_ids
+    return options
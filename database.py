@@ -1,6 +1,8 @@
+import asyncio
 import asyncpg
 import os
 from typing import Optional, List, Any
+from utils.metrics import DB_QUERY_LATENCY
 
 DATABASE_URL: Optional[str] = os.getenv('DATABASE_URL')
 if not DATABASE_URL:
@@ -9,17 +11,25 @@ if not DATABASE_URL:
 class Database:
     def __init__(self) -> None:
         self.pool: Optional[asyncpg.Pool] = None
+        self._init_lock = asyncio.Lock()
 
     async def initialize(self) -> None:
-        try:
-            # Initialize the connection pool
-            self.pool = await asyncpg.create_pool(dsn=DATABASE_URL,
-                                                  min_size=1,
-                                                  max_size=10)
-            await self.create_tables()
-        except Exception as e:
-            print(f"Error initializing database pool: {e}")
-            raise
+        # Safe to call from every cog: the pool is created once and shared
+        async with self._init_lock:
+            if self.pool is not None:
+                return
+            try:
+                # Initialize the connection pool
+                self.pool = await asyncpg.create_pool(dsn=DATABASE_URL,
+                                                      min_size=1,
+                                                      max_size=10)
+                await self.create_tables()
+            except Exception as e:
+                print(f"Error initializing database pool: {e}")
+                if self.pool is not None:
+                    await self.pool.close()
+                    self.pool = None
+                raise
 
     async def create_tables(self) -> None:
         create_guild_prefixes_table: str = """
@@ -75,9 +85,10 @@ class Database:
         if self.pool is None:
             raise ValueError("Database pool is not initialized")
         try:
-            async with self.pool.acquire() as conn:
-                async with conn.transaction():
-                    await conn.execute(query, *params)
+            with DB_QUERY_LATENCY.labels('execute').time():
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute(query, *params)
         except asyncpg.UniqueViolationError as e:
             print(f"Unique violation error while executing query: {e}")
             raise
@@ -89,15 +100,28 @@ class Database:
         if self.pool is None:
             raise ValueError("Database pool is not initialized")
         try:
-            async with self.pool.acquire() as conn:
-                return await conn.fetch(query, *params)
+            with DB_QUERY_LATENCY.labels('fetch').time():
+                async with self.pool.acquire() as conn:
+                    return await conn.fetch(query, *params)
         except Exception as e:
             print(f"Error fetching data: {e}")
             raise
 
+    async def is_healthy(self, timeout: float = 2.0) -> bool:
+        """Return True if the pool is open and answers a trivial query."""
+        if self.pool is None or self.pool.is_closing():
+            return False
+        try:
+            async with self.pool.acquire(timeout=timeout) as conn:
+                await conn.fetchval("SELECT 1", timeout=timeout)
+        except Exception:
+            return False
+        return True
+
     async def close(self) -> None:
         if self.pool:
-            await self.pool.close()
+            pool, self.pool = self.pool, None
+            await pool.close()
 
 # Instantiate a global database object
 db: Database = Database()
\ No newline at end of file
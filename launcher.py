@@ -0,0 +1,171 @@
+"""Run the bot as a cluster of worker processes, each owning a shard range.
+
+    python launcher.py --workers 4 [--shards 16]
+
+Without --shards the recommended shard count is fetched from Discord. Every
+worker is a normal `main.py` process started with NIRA_SHARD_COUNT,
+NIRA_SHARD_IDS and NIRA_WORKER_ID set, and its web server on WEB_PORT plus the
+worker index (admin endpoints on that port plus WEB_ADMIN_PORT_OFFSET, on
+loopback). Cooldowns are shared through NIRA_STATE_BACKEND=redis, which is
+the default here, and cached settings are invalidated over Postgres NOTIFY.
+Workers that exit are restarted with a backoff.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+from typing import Dict, List, Optional
+
+import aiohttp
+from loguru import logger
+
+GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+RESTART_BASE_SECONDS = 5  # Backoff before restarting a worker that exited
+RESTART_MAX_SECONDS = 300
+STABLE_SECONDS = 600  # A worker up this long has its backoff reset
+SHUTDOWN_TIMEOUT = 30  # Seconds to wait for workers after SIGTERM
+
+
+def split_shards(shard_count: int, workers: int) -> List[List[int]]:
+    """Contiguous shard ranges, as even as possible, one per worker."""
+    size, extra = divmod(shard_count, workers)
+    ranges: List[List[int]] = []
+    start = 0
+    for index in range(workers):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+async def recommended_shards(token: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+                GATEWAY_BOT_URL,
+                headers={'Authorization': f'Bot {token}'}) as response:
+            response.raise_for_status()
+            return (await response.json())['shards']
+
+
+class Worker:
+
+    def __init__(self, index: int, shard_ids: List[int], shard_count: int,
+                 web_port: int) -> None:
+        self.index = index
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.web_port = web_port
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.failures = 0
+
+    @property
+    def name(self) -> str:
+        return f"worker-{self.index}"
+
+    def environment(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        env.update({
+            'NIRA_WORKER_ID': self.name,
+            'NIRA_SHARD_COUNT': str(self.shard_count),
+            'NIRA_SHARD_IDS': ','.join(map(str, self.shard_ids)),
+            'WEB_PORT': str(self.web_port),
+        })
+        env.setdefault('NIRA_STATE_BACKEND', 'redis')
+        return env
+
+    async def run(self, stopping: asyncio.Event) -> None:
+        """Runs the worker process, restarting it until `stopping` is set."""
+        main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'main.py')
+        loop = asyncio.get_running_loop()
+        while not stopping.is_set():
+            logger.info(f"Starting {self.name} with shards "
+                        f"{self.shard_ids[0]}-{self.shard_ids[-1]} "
+                        f"of {self.shard_count} (web port {self.web_port})")
+            started = loop.time()
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, main_py, env=self.environment())
+            code = await self.process.wait()
+            self.process = None
+            if stopping.is_set():
+                break
+            if loop.time() - started >= STABLE_SECONDS:
+                self.failures = 0
+            delay = min(RESTART_BASE_SECONDS * 2**self.failures,
+                        RESTART_MAX_SECONDS)
+            self.failures += 1
+            logger.warning(f"{self.name} exited with code {code}, "
+                           f"restarting in {delay}s")
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def terminate(self) -> None:
+        if self.process is not None and self.process.returncode is None:
+            self.process.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+
+
+async def run_cluster(workers: int, shard_count: Optional[int],
+                      base_port: int) -> None:
+    if shard_count is None:
+        token = os.getenv('DISCORD_BOT_TOKEN')
+        if not token:
+            logger.error("DISCORD_BOT_TOKEN environment variable not set.")
+            return
+        shard_count = await recommended_shards(token)
+        logger.info(f"Discord recommends {shard_count} shards")
+    if shard_count < workers:
+        logger.warning(f"Only {shard_count} shards for {workers} workers; "
+                       f"running {shard_count} workers")
+        workers = shard_count
+
+    cluster = [
+        Worker(index, shard_ids, shard_count, base_port + index)
+        for index, shard_ids in enumerate(split_shards(shard_count, workers))
+    ]
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    tasks = [asyncio.create_task(worker.run(stopping)) for worker in cluster]
+    await stopping.wait()
+    logger.info("Stopping cluster...")
+    for worker in cluster:
+        worker.terminate()
+    done, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_TIMEOUT)
+    if pending:
+        logger.warning(f"{len(pending)} workers did not stop in time, killing")
+        for worker in cluster:
+            worker.kill()
+        await asyncio.wait(pending)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers',
+                        type=int,
+                        default=int(os.getenv('NIRA_CLUSTER_WORKERS', '2')),
+                        help="number of worker processes")
+    parser.add_argument('--shards',
+                        type=int,
+                        default=None,
+                        help="total shard count (default: Discord's)")
+    parser.add_argument('--base-port',
+                        type=int,
+                        default=int(os.getenv('WEB_PORT', '8080')),
+                        help="web server port of worker 0")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    asyncio.run(run_cluster(args.workers, args.shards, args.base_port))
+
+
+if __name__ == '__main__':
+    main()
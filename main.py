@@ -1,14 +1,111 @@
 import os
-from typing import List, Union, Any, Callable, Protocol, runtime_checkable
+from typing import (List, Union, Any, Callable, Dict, Optional, Protocol, Set,
+                    Tuple, runtime_checkable)
 import asyncio
+import signal
+import time
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 from aiohttp import ClientSession
-from webserver import keep_alive
+from webserver import WebServer
 from abc import ABC, abstractmethod
 from glob import glob
 from loguru import logger
 import itertools
+import config
+from database import DATABASE_URL, db
+from utils.scheduler import scheduler
+from utils.metrics import (COMMAND_LATENCY, LISTENER_LATENCY, SHARD_EVENTS,
+                           SHARD_GUILDS, SHARD_LATENCY, http_session,
+                           loop_monitor, registry)
+from utils.render import render_pool
+from utils.lazy import import_profiler, peak_rss_mb
+from utils.state import invalidation, state
+
+PROCESS_STARTED = time.perf_counter()
+# Seconds from process start to ready before startup is reported as over budget
+STARTUP_BUDGET = float(os.getenv('NIRA_STARTUP_BUDGET', '20'))
+# Set to 1 to log the heaviest modules each extension imports (-X importtime style)
+PROFILE_IMPORTS = os.getenv('NIRA_PROFILE_IMPORTS') == '1'
+
+
+class TimedExtensionLoader:
+    """Wraps an extension's loader to time executing its module.
+
+    The module runs exactly once, inside load_extension; the time it takes
+    (its own imports included) is recorded as the extension's import time.
+    """
+
+    def __init__(self, loader: Any, extension: str,
+                 timings: Dict[str, Tuple[float, float]]) -> None:
+        self._loader = loader
+        self._extension = extension
+        self._timings = timings
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Any:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: Any) -> None:
+        # Later reloads should see the real loader
+        module.__loader__ = module.__spec__.loader = self._loader
+        started = time.perf_counter()
+        try:
+            if PROFILE_IMPORTS:
+                with import_profiler.profile(self._extension):
+                    self._loader.exec_module(module)
+            else:
+                self._loader.exec_module(module)
+        finally:
+            self._timings[self._extension] = (time.perf_counter() - started,
+                                              0.0)
+
+
+# Extensions that must finish loading before the named extension starts.
+# Everything else loads concurrently once the database is up.
+EXTENSION_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "cogs.level": ("cogs.premium", ),  # Reads the premium users table
+}
+
+
+def discover_extensions() -> List[str]:
+    """Extension names for every module in the cogs directory and its subdirectories."""
+    cog_path = os.path.join(os.path.dirname(__file__), 'cogs')
+    cog_files = glob(os.path.join(cog_path, '**', '[!_]*.py'), recursive=True)
+    return [
+        os.path.splitext(os.path.relpath(
+            file, os.path.dirname(__file__)))[0].replace(os.path.sep, '.')
+        for file in cog_files
+    ]
+
+
+def plan_extension_waves(extensions: List[str]) -> List[List[str]]:
+    """Groups extensions into waves; each wave depends only on earlier ones."""
+    remaining: Dict[str, Set[str]] = {
+        extension: {
+            dependency
+            for dependency in EXTENSION_DEPENDENCIES.get(extension, ())
+            if dependency in extensions
+        }
+        for extension in extensions
+    }
+    waves: List[List[str]] = []
+    while remaining:
+        wave = sorted(extension for extension, dependencies in remaining.items()
+                      if not dependencies)
+        if not wave:
+            logger.error("Extension dependency cycle between: "
+                         f"{', '.join(sorted(remaining))}")
+            wave = sorted(remaining)
+        waves.append(wave)
+        for extension in wave:
+            del remaining[extension]
+        for dependencies in remaining.values():
+            dependencies.difference_update(wave)
+    return waves
 
 
 @runtime_checkable
@@ -41,7 +138,26 @@ class BotBase(ABC):
         pass
 
 
-class Bot(commands.Bot, BotBase):
+class InstrumentedTree(app_commands.CommandTree):
+    """Command tree that records how long each application command takes."""
+
+    async def _call(self, interaction: discord.Interaction) -> None:
+        start = time.perf_counter()
+        try:
+            await super()._call(interaction)
+        finally:
+            command = interaction.command
+            name = command.qualified_name if command else 'unknown'
+            COMMAND_LATENCY.labels(name, 'app').observe(time.perf_counter() -
+                                                        start)
+
+
+# AutoShardedBot runs several gateway connections in one process; the shard
+# range is chosen with NIRA_SHARD_COUNT / NIRA_SHARD_IDS (see config.py)
+ClientBase = commands.AutoShardedBot if config.SHARDED else commands.Bot
+
+
+class Bot(ClientBase, BotBase):
 
     def __init__(self, command_prefix: Callable, intents: discord.Intents,
                  **kwargs: Any) -> None:
@@ -49,6 +165,14 @@ class Bot(commands.Bot, BotBase):
                          intents=intents,
                          **kwargs)
         self.session: ClientSession = None
+        self.web: WebServer = WebServer(self)
+        self.cogs_loaded: bool = False
+        self.failed_extensions: List[str] = []
+        # extension -> (import seconds, load seconds)
+        self.extension_timings: Dict[str, Tuple[float, float]] = {}
+        self.ready_after: Optional[float] = None
+        # shard id -> last gateway sequence number seen by the metrics collector
+        self.shard_sequences: Dict[int, int] = {}
         self.default_prefix = command_prefix if isinstance(
             command_prefix, str) else "."
         self.status_list = itertools.cycle([
@@ -67,45 +191,181 @@ class Bot(commands.Bot, BotBase):
 
     async def setup_hook(self) -> None:
         """Sets up necessary extensions and cogs."""
-        self.session = ClientSession()
+        self.session = http_session()
+        loop_monitor.start()
+        registry.register_collector(self.collect_shard_metrics)
+        await self.web.start()
         await self.load_extension("jishaku")
         await self.load_all_cogs()
+        try:
+            await invalidation.start(DATABASE_URL)
+        except Exception as e:
+            logger.error(f"Cache invalidation listener unavailable: {e}")
+        shard_ids = getattr(self, 'shard_ids', None)
+        if self.shard_count is not None and shard_ids is not None:
+            scheduler.set_shards(self.shard_count, shard_ids)
+        await scheduler.start()
         self.change_status.start()
 
     async def load_all_cogs(self) -> None:
-        """Loads all cogs from the cogs directory and its subdirectories."""
-        cog_path = os.path.join(os.path.dirname(__file__), 'cogs')
-        cog_files = glob(os.path.join(cog_path, '**', '[!_]*.py'),
-                         recursive=True)
-        extensions = [
-            os.path.splitext(os.path.relpath(
-                file, os.path.dirname(__file__)))[0].replace(os.path.sep, '.')
-            for file in cog_files
+        """Loads all cogs from the cogs directory, independent ones concurrently."""
+        extensions = discover_extensions()
+
+        # The database is a shared service; bring it up before any cog needs it
+        started = time.perf_counter()
+        try:
+            await db.initialize()
+        except Exception as e:
+            logger.error(f"Database unavailable during startup: {e}")
+        db_time = time.perf_counter() - started
+
+        for wave in plan_extension_waves(extensions):
+            wave = [
+                extension for extension in wave
+                if self.dependencies_loaded(extension)
+            ]
+            # Executing a module holds the GIL, so imports run one by one as
+            # each load starts; the awaited part of each load (cog_load, DB
+            # and HTTP calls) runs concurrently
+            await asyncio.gather(*(self.load_timed_extension(extension)
+                                   for extension in wave))
+
+        self.cogs_loaded = True
+        self.log_startup_report(extensions, db_time,
+                                time.perf_counter() - started)
+
+    def dependencies_loaded(self, extension: str) -> bool:
+        missing = [
+            dependency
+            for dependency in EXTENSION_DEPENDENCIES.get(extension, ())
+            if dependency not in self.extensions
         ]
+        if missing:
+            logger.error(f"Skipping extension {extension}: "
+                         f"dependencies not loaded: {', '.join(missing)}")
+            self.failed_extensions.append(extension)
+            return False
+        return True
 
-        loaded_count = 0
-        failed_count = 0
+    async def _load_from_module_spec(self, spec: Any, key: str) -> None:
+        # discord.py executes the extension module in here; time that step
+        # rather than importing the module a second time to measure it
+        spec.loader = TimedExtensionLoader(spec.loader, key,
+                                           self.extension_timings)
+        await super()._load_from_module_spec(spec, key)
 
-        for extension in extensions:
-            try:
-                await self.load_extension(extension)
-                logger.success(f"Successfully loaded extension: {extension}")
-                loaded_count += 1
-            except Exception as e:
-                logger.error(f"Failed to load extension {extension}: {e}")
-                failed_count += 1
+    async def load_timed_extension(self, extension: str) -> None:
+        started = time.perf_counter()
+        try:
+            await self.load_extension(extension)
+            logger.success(f"Successfully loaded extension: {extension}")
+        except Exception as e:
+            logger.error(f"Failed to load extension {extension}: {e}")
+            self.failed_extensions.append(extension)
+        import_time = self.extension_timings.get(extension, (0.0, 0.0))[0]
+        self.extension_timings[extension] = (
+            import_time, time.perf_counter() - started - import_time)
 
+    def log_startup_report(self, extensions: List[str], db_time: float,
+                           total_time: float) -> None:
+        rows = sorted(self.extension_timings.items(),
+                      key=lambda item: sum(item[1]),
+                      reverse=True)
+        lines: List[str] = []
+        for extension, (import_time, load_time) in rows:
+            lines.append(
+                f"  {extension:<24} import {import_time * 1000:8.1f}ms"
+                f"  load {load_time * 1000:8.1f}ms" +
+                ("  FAILED" if extension in self.failed_extensions else ""))
+            for module, self_time, cumulative in import_profiler.heaviest(
+                    extension):
+                lines.append(f"      {cumulative * 1000:8.1f}ms cumulative"
+                             f" {self_time * 1000:8.1f}ms self  {module}")
+        report = "\n".join(lines)
+        loaded_count = len(extensions) - len(self.failed_extensions)
         logger.info(
-            f"Cog loading completed: {loaded_count} loaded, {failed_count} failed."
-        )
+            f"Cog loading completed: {loaded_count} loaded, "
+            f"{len(self.failed_extensions)} failed in {total_time:.2f}s "
+            f"(database {db_time:.2f}s).\n{report}")
+
+    async def add_cog(self, cog: commands.Cog, **kwargs: Any) -> None:
+        await super().add_cog(cog, **kwargs)
+        # Lets caches of the command list (help catalog, suggestions) rebuild
+        self.dispatch('commands_changed')
+
+    async def remove_cog(self, name: str,
+                         **kwargs: Any) -> Optional[commands.Cog]:
+        cog = await super().remove_cog(name, **kwargs)
+        self.dispatch('commands_changed')
+        return cog
+
+    async def invoke(self, ctx: commands.Context) -> None:
+        """Invokes a prefix command, recording how long it took."""
+        if ctx.command is None:
+            await super().invoke(ctx)
+            return
+        with COMMAND_LATENCY.labels(ctx.command.qualified_name,
+                                    'prefix').time():
+            await super().invoke(ctx)
+
+    async def _run_event(self, coro: Callable[..., Any], event_name: str,
+                         *args: Any, **kwargs: Any) -> None:
+        # Every listener, including cog listeners, is dispatched through here
+        with LISTENER_LATENCY.labels(event_name,
+                                     coro.__qualname__).time():
+            await super()._run_event(coro, event_name, *args, **kwargs)
 
     async def on_ready(self) -> None:
         """Triggered when the bot is ready."""
         if self.user:
             logger.info(f'Bot is ready as {self.user} (ID: {self.user.id}).')
+            self.log_startup_budget()
         else:
             logger.error("Bot user is not set. This should not happen.")
 
+    def log_startup_budget(self) -> None:
+        """Logs time to ready and peak memory against STARTUP_BUDGET."""
+        if self.ready_after is not None:
+            return  # on_ready fires again after reconnects
+        self.ready_after = time.perf_counter() - PROCESS_STARTED
+        rss = peak_rss_mb()
+        memory = f", peak RSS {rss:.0f} MiB" if rss is not None else ""
+        message = (f"Ready {self.ready_after:.2f}s after start "
+                   f"(budget {STARTUP_BUDGET:.0f}s){memory}.")
+        if self.ready_after > STARTUP_BUDGET:
+            logger.warning(message + " Startup is over budget.")
+        else:
+            logger.info(message)
+
+    async def on_shard_ready(self, shard_id: int) -> None:
+        logger.info(f"Shard {shard_id} is ready.")
+
+    def shard_connections(self) -> List[Tuple[int, Any]]:
+        """(shard id, gateway websocket) for every shard this process runs."""
+        if isinstance(self, commands.AutoShardedBot):
+            return [(shard_id, info._parent.ws)
+                    for shard_id, info in self.shards.items()]
+        return [(self.shard_id or 0, self.ws)]
+
+    def collect_shard_metrics(self) -> None:
+        """Refreshes per-shard latency, guild count and gateway event count."""
+        guilds: Dict[int, int] = {}
+        for guild in self.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+        for shard_id, ws in self.shard_connections():
+            label = str(shard_id)
+            SHARD_GUILDS.labels(label).set(guilds.get(shard_id, 0))
+            if ws is None:
+                continue
+            SHARD_LATENCY.labels(label).set(ws.latency)
+            # The sequence number counts dispatches and restarts at zero for a
+            # new session, so only the growth since the last scrape is added
+            sequence = ws.sequence or 0
+            previous = self.shard_sequences.get(shard_id, 0)
+            SHARD_EVENTS.labels(label).inc(
+                sequence - previous if sequence >= previous else sequence)
+            self.shard_sequences[shard_id] = sequence
+
     async def on_error(self, event_method: str, *args: Any,
                        **kwargs: Any) -> None:
         """Handles errors raised in event methods."""
@@ -114,7 +374,16 @@ class Bot(commands.Bot, BotBase):
     @tasks.loop(seconds=30)
     async def change_status(self):
         """Change the bot's status every 30 seconds."""
-        await self.change_presence(activity=next(self.status_list))
+        activity = next(self.status_list)
+        if not isinstance(self, commands.AutoShardedBot):
+            await self.change_presence(activity=activity)
+            return
+        # Update each shard on its own so a reconnecting or rate limited shard
+        # does not hold up (or fail) the rest
+        for shard_id, shard in self.shards.items():
+            if shard.is_closed() or shard.is_ws_ratelimited():
+                continue
+            await self.change_presence(activity=activity, shard_id=shard_id)
 
     @change_status.before_loop
     async def before_change_status(self):
@@ -124,9 +393,16 @@ class Bot(commands.Bot, BotBase):
     async def close(self) -> None:
         """Close the bot and its aiohttp client session."""
         logger.info("Closing bot and cleaning up resources...")
+        await scheduler.stop()
+        await invalidation.stop()
+        await self.web.stop()
+        loop_monitor.stop()
+        render_pool.shutdown()
         if self.session:
             await self.session.close()
         await super().close()
+        await state.close()
+        await db.close()
 
 
 async def get_prefix(bot: Bot,
@@ -142,16 +418,38 @@ async def get_prefix(bot: Bot,
 
 async def main() -> None:
     """Main entry point for starting the bot."""
-    intents = discord.Intents.all()
+    intents = config.build_intents(discover_extensions())
+    logger.info("Gateway intents: " +
+                ", ".join(name for name, enabled in intents if enabled))
     token = os.getenv('DISCORD_BOT_TOKEN')
     if not token:
         logger.error("DISCORD_BOT_TOKEN environment variable not set.")
         return
 
+    sharding: Dict[str, Any] = {}
+    if config.SHARDED:
+        try:
+            sharding = config.shard_options()
+        except ValueError as e:
+            logger.error(f"Invalid shard configuration: {e}")
+            return
+        logger.info("Sharding: " + (
+            f"shards {sharding.get('shard_ids', 'all')} of "
+            f"{sharding['shard_count']}" if 'shard_count' in sharding else
+            "recommended shard count"))
+
     bot = Bot(command_prefix=get_prefix,
               case_insensitive=True,
-              intents=intents)
+              intents=intents,
+              member_cache_flags=config.build_member_cache_flags(intents),
+              max_messages=config.parse_max_messages(),
+              chunk_guilds_at_startup=config.CHUNK_AT_STARTUP,
+              tree_cls=InstrumentedTree,
+              **sharding)
 
+    # The cluster launcher stops workers with SIGTERM
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, lambda: asyncio.create_task(bot.close()))
     try:
         await bot.start(token)
     except discord.LoginFailure:
@@ -163,7 +461,6 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    keep_alive()  # Start the webserver for keeping the bot alive
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
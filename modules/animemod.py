@@ -3,13 +3,12 @@ import re
 from typing import Optional, Dict, Any, List, Union
 import discord
 from discord.ext import commands
-from aiohttp import ClientSession
-import matplotlib.pyplot as plt
 import io
 from datetime import datetime
 import logging
 
 from database import db
+from utils.metrics import http_session
 
 LOGOUT_BUTTON_TIMEOUT = 30
 ITEMS_PER_PAGE = 6
@@ -57,7 +56,7 @@ class AniListModule:
             'code': auth_code
         }
 
-        async with ClientSession() as session:
+        async with http_session() as session:
             async with session.post(self.anilist_token_url,
                                     data=data) as response:
                 if response.status == 200:
@@ -116,7 +115,7 @@ class AniListModule:
             'Accept': 'application/json',
         }
 
-        async with ClientSession() as session:
+        async with http_session() as session:
             async with session.post(self.anilist_api_url,
                                     json={'query': user_query},
                                     headers=headers) as response:
@@ -168,7 +167,7 @@ class AniListModule:
 
         variables = {"userId": user_id, "page": 1, "perPage": 50}
 
-        async with ClientSession() as session:
+        async with http_session() as session:
             async with session.post(self.anilist_api_url,
                                     json={
                                         'query': query,
@@ -290,7 +289,7 @@ class AniListModule:
 
         variables = {"username": username}
 
-        async with ClientSession() as session:
+        async with http_session() as session:
             async with session.post(self.anilist_api_url,
                                     json={
                                         'query': query,
@@ -349,7 +348,7 @@ class AniListModule:
             'Accept': 'application/json',
         }
 
-        async with ClientSession() as session:
+        async with http_session() as session:
             async with session.post(self.anilist_api_url,
                                     json={'query': user_query},
                                     headers=headers) as response:
@@ -439,7 +438,7 @@ class AniListModule:
             'Accept': 'application/json',
         }
 
-        async with ClientSession() as session:
+        async with http_session() as session:
             async with session.post(self.anilist_api_url,
                                     json={'query': query},
                                     headers=headers) as response:
@@ -648,6 +647,9 @@ class AniListModule:
 
     async def create_comparison_graph(self, stats1: Dict[str, Any],
                                       stats2: Dict[str, Any]) -> discord.File:
+        # Only this graph needs matplotlib, which is slow to import
+        import matplotlib.pyplot as plt
+
         anime_stats1 = stats1['statistics']['anime']
         anime_stats2 = stats2['statistics']['anime']
         manga_stats1 = stats1['statistics']['manga']
@@ -3,11 +3,11 @@ from discord import Member, File
 from typing import Union
 from PIL import Image
 from io import BytesIO
-import aiohttp
 import re
+from utils.metrics import http_session
 
 async def fetch_image(url: str) -> bytes:
-    async with aiohttp.ClientSession() as session:
+    async with http_session() as session:
         async with session.get(url) as response:
             if response.status != 200:
                 raise Exception(f"Failed to fetch image: {response.status}")
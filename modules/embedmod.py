@@ -3,13 +3,15 @@ from discord.ext import commands
 from discord.ui import View, Select, Modal, TextInput
 from discord import ButtonStyle, Interaction
 from utils.helpembed import get_help_embed
-import asyncio
+from utils.scheduler import scheduler
 import re
 from discord.utils import format_dt
-from datetime import timedelta
+from datetime import datetime, timedelta
 from math import ceil
 from typing import Optional
 
+SCHEDULED_EMBED_JOB = "embed.send"
+
 
 class BaseView(discord.ui.View):
 
@@ -506,14 +508,34 @@ class ScheduleModal(Modal):
                               channel: discord.TextChannel,
                               interaction: discord.Interaction) -> None:
         scheduled_time = discord.utils.utcnow() + delay
-        await asyncio.sleep(delay.total_seconds())
-        sent_message = await channel.send(embed=self.embed)
-        message_link = f"https://discord.com/channels/{interaction.guild.id}/{channel.id}/{sent_message.id}"
-        user = interaction.user
-        scheduled_time_str = format_dt(scheduled_time, style='R')
+        await scheduler.schedule(
+            SCHEDULED_EMBED_JOB, scheduled_time, {
+                'channel_id': channel.id,
+                'guild_id': interaction.guild.id,
+                'user_id': interaction.user.id,
+                'scheduled_at': scheduled_time.isoformat(),
+                'embed': self.embed.to_dict()
+            })
+
+
+async def send_scheduled_embed(bot: commands.Bot, payload: dict) -> None:
+    """Job handler that sends an embed queued by `ScheduleModal`."""
+    channel = bot.get_channel(
+        payload['channel_id']) or await bot.fetch_channel(
+            payload['channel_id'])
+    sent_message = await channel.send(
+        embed=discord.Embed.from_dict(payload['embed']))
+    message_link = f"https://discord.com/channels/{payload['guild_id']}/{channel.id}/{sent_message.id}"
+    scheduled_time_str = format_dt(
+        datetime.fromisoformat(payload['scheduled_at']), style='R')
+    try:
+        user = bot.get_user(payload['user_id']) or await bot.fetch_user(
+            payload['user_id'])
         await user.send(
             f"Your scheduled embed has been sent {scheduled_time_str}! {message_link}"
         )
+    except discord.HTTPException:
+        pass  # The embed is out; a closed DM shouldn't make the job retry
 
 
 class PlusButton(BaseButton):
@@ -0,0 +1,261 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from database import db, Database
+from utils.expiring import ExpiringMap
+from utils.metrics import (GAME_RESULTS_BUFFERED, GAME_RESULTS_DROPPED,
+                           registry)
+
+FLUSH_INTERVAL = 10.0  # Seconds between writes of buffered results
+FLUSH_SIZE = 200  # Buffered results that trigger a write straight away
+MAX_BUFFERED = 10_000  # Results kept while the database is unreachable
+ERROR_SLEEP_SECONDS = 5  # Pause after a failed write
+LEADERBOARD_SIZE = 10
+LEADERBOARD_TTL = 300  # Seconds a cached leaderboard is trusted; other
+# workers' results only show up once it is reloaded
+MAX_LEADERBOARDS = 5_000  # Cached (game, guild) leaderboards
+
+# Game -> the summary column its leaderboard ranks by
+RANKED_BY: Dict[str, str] = {
+    'trivia': 'best_score',  # Longest streak
+    'tetris': 'best_score',
+    'memory': 'wins',  # Boards cleared in time
+    'ttt': 'wins',
+}
+
+CREATE_TABLES = """
+CREATE TABLE IF NOT EXISTS game_results (
+    id BIGSERIAL PRIMARY KEY,
+    game TEXT NOT NULL,
+    guild_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    score INT NOT NULL,
+    won BOOLEAN NOT NULL,
+    played_at TIMESTAMPTZ NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_stats (
+    game TEXT,
+    guild_id BIGINT,
+    user_id BIGINT,
+    games_played INT NOT NULL,
+    wins INT NOT NULL,
+    best_score INT NOT NULL,
+    total_score BIGINT NOT NULL,
+    PRIMARY KEY (game, guild_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS game_stats_by_wins
+    ON game_stats (game, guild_id, wins DESC);
+CREATE INDEX IF NOT EXISTS game_stats_by_best_score
+    ON game_stats (game, guild_id, best_score DESC);
+"""
+
+# Logs a batch and folds it into the per-player summary in one statement,
+# returning the summary rows it changed
+WRITE_BATCH = """
+WITH results AS (
+    SELECT * FROM unnest($1::text[], $2::bigint[], $3::bigint[], $4::int[],
+                         $5::boolean[], $6::timestamptz[])
+        AS r(game, guild_id, user_id, score, won, played_at)
+), logged AS (
+    INSERT INTO game_results (game, guild_id, user_id, score, won, played_at)
+    SELECT * FROM results
+)
+INSERT INTO game_stats AS s (game, guild_id, user_id, games_played, wins,
+                             best_score, total_score)
+SELECT game, guild_id, user_id, COUNT(*), COUNT(*) FILTER (WHERE won),
+       MAX(score), SUM(score)
+FROM results
+GROUP BY game, guild_id, user_id
+ON CONFLICT (game, guild_id, user_id) DO UPDATE SET
+    games_played = s.games_played + EXCLUDED.games_played,
+    wins = s.wins + EXCLUDED.wins,
+    best_score = GREATEST(s.best_score, EXCLUDED.best_score),
+    total_score = s.total_score + EXCLUDED.total_score
+RETURNING game, guild_id, user_id, games_played, wins, best_score,
+          total_score;
+"""
+
+
+class GameResult:
+    __slots__ = ('game', 'guild_id', 'user_id', 'score', 'won', 'played_at')
+
+    def __init__(self, game: str, guild_id: int, user_id: int, score: int,
+                 won: bool) -> None:
+        self.game = game
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.score = score
+        self.won = won
+        self.played_at = datetime.now(timezone.utc)
+
+
+class PlayerStats:
+    __slots__ = ('user_id', 'games_played', 'wins', 'best_score',
+                 'total_score')
+
+    def __init__(self, user_id: int, games_played: int, wins: int,
+                 best_score: int, total_score: int) -> None:
+        self.user_id = user_id
+        self.games_played = games_played
+        self.wins = wins
+        self.best_score = best_score
+        self.total_score = total_score
+
+
+class GameStats:
+    """Finished games, written to Postgres in batches, and their leaderboards.
+
+    `record` only appends to a buffer, so ending a game never waits on the
+    database. A background task writes the buffer every FLUSH_INTERVAL (or
+    once FLUSH_SIZE results are waiting) as one statement that logs the raw
+    results and updates the `game_stats` summary. Leaderboards are read from
+    that summary and cached; every write patches the cached ones with the
+    summary rows it returned. Players rank by the game's column, ties broken
+    by user id, and that column never goes down, so a player can only move
+    up the ranking by appearing in a write: the patched list stays exact.
+    """
+
+    def __init__(self, database: Database = db) -> None:
+        self.db = database
+        self.buffer: List[GameResult] = []
+        # (game, guild) -> top players, best first
+        self.leaderboards = ExpiringMap(MAX_LEADERBOARDS)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._tables_ready = False
+        registry.register_collector(self.collect_metrics)
+
+    def collect_metrics(self) -> None:
+        GAME_RESULTS_BUFFERED.labels().set(len(self.buffer))
+
+    def record(self,
+               game: str,
+               guild_id: Optional[int],
+               user_id: int,
+               score: int = 0,
+               won: bool = False) -> None:
+        """Queue a finished game; results outside a guild are not kept."""
+        if guild_id is None:
+            return
+        self.buffer.append(GameResult(game, guild_id, user_id, score, won))
+        if len(self.buffer) > MAX_BUFFERED:
+            del self.buffer[0]
+            GAME_RESULTS_DROPPED.labels().inc()
+        if len(self.buffer) >= FLUSH_SIZE:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer and make a last attempt to save the buffer."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(
+                f"Lost {len(self.buffer)} game results on shutdown: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(),
+                                       timeout=FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to write game results")
+                await asyncio.sleep(ERROR_SLEEP_SECONDS)
+
+    async def _ensure_tables(self) -> None:
+        if self._tables_ready:
+            return
+        if self.db.pool is None:
+            await self.db.initialize()
+        await self.db.execute(CREATE_TABLES)
+        self._tables_ready = True
+
+    async def flush(self) -> None:
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        try:
+            await self._ensure_tables()
+            rows = await self.db.fetch(
+                WRITE_BATCH, [r.game for r in batch],
+                [r.guild_id for r in batch], [r.user_id for r in batch],
+                [r.score for r in batch], [r.won for r in batch],
+                [r.played_at for r in batch])
+        except BaseException:
+            # Put the batch back in front of anything recorded meanwhile
+            self.buffer[:0] = batch
+            overflow = len(self.buffer) - MAX_BUFFERED
+            if overflow > 0:
+                del self.buffer[:overflow]
+                GAME_RESULTS_DROPPED.labels().inc(overflow)
+            raise
+        for row in rows:
+            self._patch_leaderboard(row['game'], row['guild_id'],
+                                    PlayerStats(row['user_id'],
+                                                row['games_played'],
+                                                row['wins'], row['best_score'],
+                                                row['total_score']))
+
+    def _patch_leaderboard(self, game: str, guild_id: int,
+                           stats: PlayerStats) -> None:
+        key = (game, guild_id)
+        board: Optional[List[PlayerStats]] = self.leaderboards.get(key)
+        if board is None:
+            return  # Not cached; loaded from the summary when asked for
+        board = [entry for entry in board if entry.user_id != stats.user_id]
+        board.append(stats)
+        board.sort(key=self._rank_key(game))
+        self.leaderboards.set(key, board[:LEADERBOARD_SIZE],
+                              self.leaderboards.remaining(key))
+
+    @staticmethod
+    def _rank_key(game: str):
+        column = RANKED_BY[game]
+        return lambda stats: (-getattr(stats, column), stats.user_id)
+
+    async def leaderboard(self, game: str, guild_id: int) -> List[PlayerStats]:
+        """The guild's top players at `game`, best first."""
+        key: Tuple[str, int] = (game, guild_id)
+        board: Optional[List[PlayerStats]] = self.leaderboards.get(key)
+        if board is not None:
+            return board
+        await self._ensure_tables()
+        rows = await self.db.fetch(
+            f"""
+            SELECT user_id, games_played, wins, best_score, total_score
+            FROM game_stats
+            WHERE game = $1 AND guild_id = $2
+            ORDER BY {RANKED_BY[game]} DESC, user_id
+            LIMIT $3;
+            """, game, guild_id, LEADERBOARD_SIZE)
+        board = [
+            PlayerStats(row['user_id'], row['games_played'], row['wins'],
+                        row['best_score'], row['total_score']) for row in rows
+        ]
+        self.leaderboards.set(key, board, LEADERBOARD_TTL)
+        return board
+
+
+# Instantiate a global game stats recorder
+game_stats: GameStats = GameStats()
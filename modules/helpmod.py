@@ -0,0 +1,284 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+CommandType = Union[commands.Command[Any, Any, Any], app_commands.Command]
+
+MAX_GRAM = 3  # Longest n-gram indexed; longer queries intersect trigrams
+EMBED_CACHE_SIZE = 256  # Embeds kept for other prefixes than the default
+HOME_CATEGORY = "Home"
+HELP_COG = "HelpCog"
+
+
+def is_owner_only(command: CommandType) -> bool:
+    if isinstance(command.checks, list):
+        return any(
+            check.__qualname__.startswith('is_owner')
+            for check in command.checks)
+    return bool(command.checks)
+
+
+def is_jishaku_command(command: CommandType) -> bool:
+    if isinstance(command, commands.Command):
+        return bool(command.cog
+                    and command.cog.qualified_name.lower() == "jishaku")
+    elif isinstance(command, app_commands.Command):
+        return command.module is not None and "jishaku" in command.module.lower(
+        )
+    return False
+
+
+class CatalogEntry:
+    __slots__ = ('name', 'is_app', 'description', 'category', 'hidden')
+
+    def __init__(self, command: CommandType, category: str) -> None:
+        self.name: str = command.qualified_name
+        self.is_app: bool = isinstance(command, app_commands.Command)
+        self.description: str = command.description or 'No description available.'
+        self.category: str = category
+        # Owner-only and jishaku commands are only listed for the owner
+        self.hidden: bool = is_owner_only(command) or is_jishaku_command(
+            command)
+
+    def display_name(self, prefix: str) -> str:
+        return f"/{self.name}" if self.is_app else f"{prefix}{self.name}"
+
+
+class NgramIndex:
+    """Substring search over a fixed list of names.
+
+    Every 1..MAX_GRAM character substring of every name maps to the ids of
+    the names containing it, so queries up to MAX_GRAM characters are a
+    single dict lookup and longer ones intersect the postings of their
+    trigrams before a final substring check.
+    """
+
+    def __init__(self, names: List[str]) -> None:
+        self.names = [name.lower() for name in names]
+        self.postings: Dict[str, Set[int]] = {}
+        for index, name in enumerate(self.names):
+            for size in range(1, MAX_GRAM + 1):
+                for start in range(len(name) - size + 1):
+                    self.postings.setdefault(name[start:start + size],
+                                             set()).add(index)
+
+    def search(self, query: str) -> Set[int]:
+        query = query.lower()
+        if not query:
+            return set(range(len(self.names)))
+        if len(query) <= MAX_GRAM:
+            return self.postings.get(query, set())
+        grams = sorted(
+            (self.postings.get(query[start:start + MAX_GRAM], set())
+             for start in range(len(query) - MAX_GRAM + 1)),
+            key=len)
+        candidates = set(grams[0]).intersection(*grams[1:])
+        return {index for index in candidates if query in self.names[index]}
+
+
+class CommandCatalog:
+    """Help data built once from the bot's commands instead of per request.
+
+    Holds the categorised command lists, the select menu options and an
+    n-gram index for autocomplete. Embeds are rendered on first use for each
+    prefix and visibility and then reused. The default prefix is rendered up
+    front and kept; other prefixes share a cache of EMBED_CACHE_SIZE embeds
+    that drops the least recently used first. `invalidate` marks everything stale when cogs are added or
+    removed and the next lookup rebuilds it.
+    """
+
+    def __init__(self,
+                 bot: commands.Bot,
+                 embed_color: discord.Color,
+                 embed_title: str,
+                 embed_footer: str,
+                 category_emojis: Dict[str, str],
+                 per_page: int,
+                 default_prefix: str = '.') -> None:
+        self.bot = bot
+        self.embed_color = embed_color
+        self.embed_title = embed_title
+        self.embed_footer = embed_footer
+        self.category_emojis = category_emojis
+        self.per_page = per_page
+        self.default_prefix = default_prefix
+        self.stale = True
+        # include hidden -> category -> entries, sorted by name
+        self.categories: Dict[bool, Dict[str, List[CatalogEntry]]] = {}
+        # Autocomplete entries sorted by name, and their index
+        self.lookup: List[CatalogEntry] = []
+        self.index = NgramIndex([])
+        self._options: Dict[bool, List[discord.SelectOption]] = {}
+        # Embeds for the default prefix, kept until the next rebuild
+        self._default_embeds: Dict[Tuple[Any, ...], discord.Embed] = {}
+        # Embeds for other prefixes, least recently used first
+        self._embeds: Dict[Tuple[Any, ...], discord.Embed] = {}
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+    def ensure_built(self) -> None:
+        if self.stale:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        public: Dict[str, List[CatalogEntry]] = {}
+        everything: Dict[str, List[CatalogEntry]] = {}
+        seen: Set[str] = set()
+
+        for command in sorted(self.bot.tree.walk_commands(),
+                              key=lambda c: c.name):
+            if isinstance(command, app_commands.Command) and \
+               command.binding and command.binding.__class__.__name__ != HELP_COG:
+                self._file(
+                    CatalogEntry(command, command.binding.__class__.__name__),
+                    public, everything)
+                seen.add(command.qualified_name)
+
+        for command in sorted(self.bot.commands, key=lambda c: c.name):
+            if command.qualified_name not in seen and \
+               command.cog and command.cog.qualified_name != HELP_COG:
+                self._file(CatalogEntry(command, command.cog.qualified_name),
+                           public, everything)
+
+        self.categories = {False: public, True: everything}
+        self.lookup = sorted(self._lookup_entries(), key=lambda e: e.name)
+        self.index = NgramIndex([entry.name for entry in self.lookup])
+        self._default_embeds.clear()
+        self._embeds.clear()
+        self._options.clear()
+        self.stale = False
+        for include_hidden in (False, True):
+            self._options[include_hidden] = self._build_options(include_hidden)
+            self.home_embed(self.default_prefix, include_hidden)
+            for category in self.categories[include_hidden]:
+                self.page_embed(category, 0, self.default_prefix,
+                                include_hidden)
+
+    @staticmethod
+    def _file(entry: CatalogEntry, public: Dict[str, List[CatalogEntry]],
+              everything: Dict[str, List[CatalogEntry]]) -> None:
+        everything.setdefault(entry.category, []).append(entry)
+        if not entry.hidden:
+            public.setdefault(entry.category, []).append(entry)
+
+    def _lookup_entries(self) -> Iterable[CatalogEntry]:
+        """Prefix commands (with subcommands) and app commands, once each."""
+        seen: Set[str] = set()
+        for command in self.bot.walk_commands():
+            if command.cog and command.cog.qualified_name != HELP_COG and \
+               command.qualified_name not in seen:
+                seen.add(command.qualified_name)
+                yield CatalogEntry(command, command.cog.qualified_name)
+        for command in self.bot.tree.walk_commands():
+            if isinstance(command, app_commands.Command) and \
+               command.binding and command.binding.__class__.__name__ != HELP_COG and \
+               command.qualified_name not in seen:
+                seen.add(command.qualified_name)
+                yield CatalogEntry(command, command.binding.__class__.__name__)
+
+    def search(self,
+               query: str,
+               include_hidden: bool,
+               limit: int = 25) -> List[CatalogEntry]:
+        """Commands whose name contains `query`, prefix matches first."""
+        self.ensure_built()
+        query = query.lower()
+        matches = [
+            self.lookup[index] for index in sorted(self.index.search(query))
+            if include_hidden or not self.lookup[index].hidden
+        ]
+        matches.sort(key=lambda entry: not entry.name.startswith(query))
+        return matches[:limit]
+
+    def category_names(self, include_hidden: bool) -> List[str]:
+        self.ensure_built()
+        return list(self.categories[include_hidden])
+
+    def page_count(self, category: str, include_hidden: bool) -> int:
+        self.ensure_built()
+        entries = self.categories[include_hidden].get(category, [])
+        return max(1, math.ceil(len(entries) / self.per_page))
+
+    def select_options(self,
+                       include_hidden: bool) -> List[discord.SelectOption]:
+        self.ensure_built()
+        return list(self._options[include_hidden])
+
+    def _build_options(self,
+                       include_hidden: bool) -> List[discord.SelectOption]:
+        return [
+            discord.SelectOption(label=HOME_CATEGORY,
+                                 description="Return to the main help menu",
+                                 emoji=self.category_emojis[HOME_CATEGORY])
+        ] + [
+            discord.SelectOption(label=category,
+                                 description=f"{len(entries)} commands",
+                                 emoji=self.category_emojis.get(category, "❓"))
+            for category, entries in self.categories[include_hidden].items()
+        ]
+
+    def _cached(self, key: Tuple[Any, ...],
+                prefix: str) -> Optional[discord.Embed]:
+        if prefix == self.default_prefix:
+            return self._default_embeds.get(key)
+        embed = self._embeds.pop(key, None)
+        if embed is not None:
+            self._embeds[key] = embed  # Now the most recently used
+        return embed
+
+    def _store(self, key: Tuple[Any, ...], prefix: str,
+               embed: discord.Embed) -> None:
+        if prefix == self.default_prefix:
+            self._default_embeds[key] = embed
+            return
+        if len(self._embeds) >= EMBED_CACHE_SIZE:
+            del self._embeds[next(iter(self._embeds))]
+        self._embeds[key] = embed
+
+    def home_embed(self, prefix: str, include_hidden: bool) -> discord.Embed:
+        self.ensure_built()
+        key = (HOME_CATEGORY, prefix, include_hidden)
+        embed = self._cached(key, prefix)
+        if embed is None:
+            embed = discord.Embed(
+                title=f"**{self.embed_title}**",
+                description=
+                "Welcome to the help menu! Select a category from the dropdown to view commands.",
+                color=self.embed_color)
+            for category, entries in self.categories[include_hidden].items():
+                emoji = self.category_emojis.get(category, "❓")
+                embed.add_field(name=f"**{emoji} {category}**",
+                                value=f"`{len(entries)}` commands",
+                                inline=True)
+            embed.set_footer(text=self.embed_footer.format(prefix=prefix))
+            self._store(key, prefix, embed)
+        return embed
+
+    def page_embed(self, category: str, page: int, prefix: str,
+                   include_hidden: bool) -> discord.Embed:
+        self.ensure_built()
+        key = (category, page, prefix, include_hidden)
+        embed = self._cached(key, prefix)
+        if embed is None:
+            entries = self.categories[include_hidden].get(category, [])
+            start = page * self.per_page
+            emoji = self.category_emojis.get(category, "❓")
+            embed = discord.Embed(title=f"**{emoji} {category} Commands**",
+                                  color=self.embed_color)
+            for entry in entries[start:start + self.per_page]:
+                embed.add_field(
+                    name=
+                    f"<a:arrow:1289063843129065532> {entry.display_name(prefix)}",
+                    value=f"-# ╰> {entry.description}",
+                    inline=False)
+            total_pages = self.page_count(category, include_hidden)
+            embed.set_footer(
+                text=
+                f"Page {page + 1}/{total_pages} • {self.embed_footer.format(prefix=prefix)}"
+            )
+            self._store(key, prefix, embed)
+        return embed
@@ -4,6 +4,7 @@ from typing import Dict, List, Optional
 import random
 import aiohttp
 import asyncio
+from utils.metrics import http_session
 
 
 class MemeModule:
@@ -33,7 +34,7 @@ class MemeModule:
                 "DeepFriedMemes", "bonehurtingjuice", "comedyheaven"
             ]
         }
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = http_session()
         self.last_request_time: float = 0
         self.request_cooldown: int = 1
 
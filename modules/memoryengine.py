@@ -0,0 +1,120 @@
+import random
+from typing import List, Optional, Sequence, Tuple
+
+SIZE = 5
+BLOCKED_CELL = 12  # The locked centre of the 5x5 grid
+PAIRS = (SIZE * SIZE - 1) // 2
+HIDDEN_FACE = "❓"
+BLOCKED_FACE = "🔒"
+
+# Cell styles; the view maps them to button styles
+HIDDEN, SELECTED, MATCHED, MISMATCHED, HINTED, BLOCKED = range(6)
+
+# What a cell shows: (face, style, disabled)
+CellLook = Tuple[str, int, bool]
+
+# Outcomes of flipping a cell
+IGNORED, FIRST, MATCH, MISMATCH = range(4)
+
+
+class MemoryBoard:
+    """The pairs game as plain data, without any Discord objects.
+
+    Each cell holds the index of its symbol, or -1 for the blocked centre.
+    Which cells are matched, mismatched or hinted are bitmasks, so the whole
+    state is a few ints plus the symbol layout, and `look` derives what any
+    cell should show from them.
+    """
+
+    def __init__(self,
+                 symbols: Sequence[str],
+                 rng: random.Random = random) -> None:
+        if len(symbols) < PAIRS:
+            raise ValueError(f"Need {PAIRS} symbols, got {len(symbols)}")
+        self.symbols = list(symbols[:PAIRS])
+        layout = list(range(PAIRS)) * 2
+        rng.shuffle(layout)
+        layout.insert(BLOCKED_CELL, -1)
+        self.cells: List[int] = layout
+        self.matched = 0
+        self.mismatched = 0
+        self.hinted = 0
+        self.selected: List[int] = []
+        self.peeking = False  # Every face shown, before the game starts
+        self.locked = True  # Flips are ignored
+        self.moves = 0
+        self.pairs_found = 0
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def face(self, cell: int) -> str:
+        return self.symbols[self.cells[cell]]
+
+    def is_complete(self) -> bool:
+        return self.pairs_found == PAIRS
+
+    def flip(self, cell: int) -> int:
+        """Turn `cell` face up; what that did is one of the outcome codes."""
+        bit = 1 << cell
+        if self.locked or self.cells[cell] < 0 or \
+           self.matched & bit or cell in self.selected:
+            return IGNORED
+        self.hinted &= ~bit
+        self.selected.append(cell)
+        self.moves += 1
+        if len(self.selected) == 1:
+            return FIRST
+        first, second = self.selected
+        self.locked = True
+        if self.cells[first] == self.cells[second]:
+            self.matched |= 1 << first | 1 << second
+            self.pairs_found += 1
+            self.selected.clear()
+            self.locked = self.is_complete()
+            return MATCH
+        self.mismatched = 1 << first | 1 << second
+        return MISMATCH
+
+    def hide_mismatch(self) -> None:
+        """Turn a mismatched pair back over and allow flipping again."""
+        self.mismatched = 0
+        self.selected.clear()
+        self.locked = False
+
+    def hint_cell(self, rng: random.Random = random) -> Optional[int]:
+        """Show a random face-down cell; None if there is none."""
+        hidden = [
+            cell for cell in range(len(self.cells))
+            if self.cells[cell] >= 0 and not self.matched >> cell & 1
+            and cell not in self.selected
+        ]
+        if not hidden:
+            return None
+        cell = rng.choice(hidden)
+        self.hinted |= 1 << cell
+        return cell
+
+    def clear_hint(self, cell: int) -> None:
+        self.hinted &= ~(1 << cell)
+
+    def look(self, cell: int) -> CellLook:
+        if self.cells[cell] < 0:
+            return BLOCKED_FACE, BLOCKED, True
+        bit = 1 << cell
+        if self.matched & bit:
+            return self.face(cell), MATCHED, True
+        if self.mismatched & bit:
+            return self.face(cell), MISMATCHED, True
+        if cell in self.selected:
+            return self.face(cell), SELECTED, True
+        if self.hinted & bit:
+            return self.face(cell), HINTED, False
+        if self.peeking:
+            return self.face(cell), HIDDEN, True
+        # Face-down cells stay enabled while a mismatch is showing, so only
+        # the pair itself changes; flips are ignored until it is hidden
+        return HIDDEN_FACE, HIDDEN, False
+
+    def looks(self) -> List[CellLook]:
+        return [self.look(cell) for cell in range(len(self.cells))]
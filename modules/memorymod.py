@@ -3,17 +3,86 @@ from discord import ui
 import random
 from datetime import timedelta, datetime
 import asyncio
+from typing import Dict, List, Optional, Tuple
 from discord.ext import commands
+from modules.gamestats import game_stats
+from modules.memoryengine import (BLOCKED, BLOCKED_CELL, BLOCKED_FACE,
+                                  HIDDEN, HIDDEN_FACE, HINTED, IGNORED,
+                                  MATCHED, MISMATCH, MISMATCHED, PAIRS,
+                                  SELECTED, SIZE, CellLook, MemoryBoard)
+from utils.live import LiveMessage
+from utils.timers import timers
+
+INACTIVITY_TIMEOUT = 20  # Seconds without a move before the game ends
+HINT_COOLDOWN = 10  # Seconds between hints
+
+BUTTON_STYLES = {
+    HIDDEN: discord.ButtonStyle.secondary,
+    SELECTED: discord.ButtonStyle.success,
+    MATCHED: discord.ButtonStyle.success,
+    MISMATCHED: discord.ButtonStyle.danger,
+    HINTED: discord.ButtonStyle.primary,
+    BLOCKED: discord.ButtonStyle.secondary,
+}
+
+
+class GuildEmojiCache:
+    """Each guild's usable custom emojis, listed once until they change.
+
+    The Games cog invalidates a guild on `on_guild_emojis_update`.
+    """
+
+    def __init__(self) -> None:
+        self.guilds: Dict[int, Tuple[str, ...]] = {}
+
+    def get(self, guild: discord.Guild) -> Tuple[str, ...]:
+        emojis = self.guilds.get(guild.id)
+        if emojis is None:
+            emojis = self.guilds[guild.id] = tuple(
+                str(emoji) for emoji in guild.emojis if emoji.available)
+        return emojis
+
+    def invalidate(self, guild_id: int) -> None:
+        self.guilds.pop(guild_id, None)
+
+
+# Instantiate a global emoji cache
+guild_emojis: GuildEmojiCache = GuildEmojiCache()
+
+
+class BoardRenderer:
+    """Applies a board's looks to its buttons, touching only changed cells.
+
+    `render` returns whether any button changed, so callers can skip the
+    message edit entirely when nothing visible did.
+    """
+
+    def __init__(self, buttons: List[discord.ui.Button]) -> None:
+        self.buttons = buttons
+        self.shown: List[Optional[CellLook]] = [None] * len(buttons)
+
+    def render(self, board: MemoryBoard) -> bool:
+        changed = False
+        for cell, look in enumerate(board.looks()):
+            if look == self.shown[cell]:
+                continue
+            face, style, disabled = look
+            button = self.buttons[cell]
+            button.emoji = face
+            button.style = BUTTON_STYLES[style]
+            button.disabled = disabled
+            self.shown[cell] = look
+            changed = True
+        return changed
 
 
 class MemoryGameButton(discord.ui.Button):
 
-    def __init__(self, x: int, y: int, emoji: str):
-        super().__init__(style=discord.ButtonStyle.secondary, emoji="❓", row=y)
-        self.x = x
-        self.y = y
-        self.hidden_emoji = emoji
-        self.revealed = False
+    def __init__(self, cell: int):
+        super().__init__(style=discord.ButtonStyle.secondary,
+                         emoji=HIDDEN_FACE,
+                         row=cell // SIZE)
+        self.cell = cell
 
     async def callback(self, interaction: discord.Interaction):
         if interaction.user.id != self.view.ctx.author.id:
@@ -29,50 +98,48 @@ class MemoryGameView(discord.ui.View):
         super().__init__(timeout=None)
         self.ctx = ctx
         self.cog = cog
-        self.board = []
-        self.selected_buttons = []
-        self.moves = 0
-        self.pairs_found = 0
         self.start_time = None
         self.message = None
+        self.live: Optional[LiveMessage] = None  # Budgeted edits of message
         self.setup_board()
-        self.last_interaction_time = None
-        self.inactivity_task = None
         self.time_limit = time_limit * 60  # Convert minutes to seconds
-        self.timer_task = None
+        self.ends_at: Optional[datetime] = None
         self.game_started = False
         self.hints_remaining = 2
         self.hints_used = 0
-        self.hint_cooldown = 0
+        self.hint_ready_at: Optional[datetime] = None
         self.bot_id = ctx.bot.user.id  # Store the bot's ID
 
     def setup_board(self):
-        guild_emojis = self.ctx.guild.emojis
-        pairs_needed = 12
-        if len(guild_emojis) < pairs_needed:
+        emojis = guild_emojis.get(self.ctx.guild)
+        if len(emojis) < PAIRS:
             raise ValueError(
-                f"Not enough custom emojis in the server! You need at least {pairs_needed}."
+                f"Not enough custom emojis in the server! You need at least {PAIRS}."
             )
 
-        emojis = random.sample(guild_emojis, pairs_needed) * 2
-        random.shuffle(emojis)
-
-        for y in range(5):
-            for x in range(5):
-                if x == 2 and y == 2:
-                    self.add_item(
-                        ui.Button(style=discord.ButtonStyle.secondary,
-                                  emoji="🔒",
-                                  disabled=True,
-                                  row=y))
-                else:
-                    button = MemoryGameButton(x, y, emojis.pop())
-                    self.add_item(button)
-                    self.board.append(button)
+        self.board = MemoryBoard(random.sample(emojis, PAIRS))
+        buttons = []
+        for cell in range(len(self.board)):
+            if cell == BLOCKED_CELL:
+                button = ui.Button(style=discord.ButtonStyle.secondary,
+                                   emoji=BLOCKED_FACE,
+                                   disabled=True,
+                                   row=cell // SIZE)
+            else:
+                button = MemoryGameButton(cell)
+            self.add_item(button)
+            buttons.append(button)
+        self.renderer = BoardRenderer(buttons)
+
+    def refresh(self, **fields) -> None:
+        """Queue an edit if any button or one of `fields` changed."""
+        if self.renderer.render(self.board) or fields:
+            self.live.update(view=self, **fields)
 
     async def start_game(self, existing_message=None):
-        for child in self.children:
-            child.disabled = True
+        # The first message already shows every face, for 7 seconds
+        self.board.peeking = True
+        self.renderer.render(self.board)
 
         initial_content = f"Memory Game: Match the pairs! Time limit: {self.time_limit // 60} minutes\nHints remaining: {self.hints_remaining}\n(Showing the emojis for 7 seconds...)"
         if existing_message:
@@ -82,48 +149,65 @@ class MemoryGameView(discord.ui.View):
                                     embed=None)
         else:
             self.message = await self.ctx.send(initial_content, view=self)
+        self.live = LiveMessage(self.message)
 
-        await self.reveal_all_emojis()
         await discord.utils.sleep_until(discord.utils.utcnow() +
                                         timedelta(seconds=7))
-        await self.hide_all_emojis()
 
         self.start_time = datetime.now()
-        self.last_interaction_time = self.start_time
+        self.ends_at = discord.utils.utcnow() + timedelta(
+            seconds=self.time_limit)
         self.game_started = True
 
-        for child in self.children:
-            if isinstance(child, MemoryGameButton):
-                child.disabled = False
-        await self.message.edit(content=self.get_game_status(), view=self)
+        self.board.peeking = False
+        self.board.locked = False
+        self.refresh(content=self.get_game_status())
 
-        self.inactivity_task = asyncio.create_task(self.check_inactivity())
-        self.timer_task = asyncio.create_task(self.update_timer())
+        # The countdown is rendered by Discord as a relative timestamp, so
+        # nothing needs to wake up until one of these deadlines is reached
+        timers.schedule((self, 'inactivity'), INACTIVITY_TIMEOUT,
+                        self.end_game_inactivity)
+        timers.schedule((self, 'limit'), self.time_limit,
+                        self.end_game_timeout)
 
         await self.message.add_reaction("💡")  # Add hint emoji
+        self.cog.route_reactions(self.message.id, self.on_reaction)
+
+    async def on_reaction(self, payload: discord.RawReactionActionEvent):
+        if str(payload.emoji) != "💡" or not self.game_started or \
+           (payload.member is not None and payload.member.bot):
+            return
+        if payload.user_id != self.ctx.author.id:
+            await self.message.channel.send(
+                f"<@{payload.user_id}>, only the player who started the game can use hints.",
+                delete_after=5)
+            return
+        try:
+            await self.message.remove_reaction("💡",
+                                               discord.Object(payload.user_id))
+        except discord.errors.HTTPException:
+            pass
+        await self.show_hint()
 
     def get_game_status(self):
         if not self.game_started:
             return f"Memory Game (5x5): Match the pairs!\nTime limit: {self.time_limit // 60} minutes\nHints remaining: {self.hints_remaining}"
 
-        remaining_time = self.time_limit - (datetime.now() -
-                                            self.start_time).total_seconds()
-        minutes, seconds = divmod(int(remaining_time), 60)
-        hint_status = f"Hint cooldown: {self.hint_cooldown}s" if self.hint_cooldown > 0 else f"Hints remaining: {self.hints_remaining}"
-        return f"Memory Game (5x5): Match the pairs!\nTime remaining: {minutes:02d}:{seconds:02d}\n{hint_status}"
+        time_status = discord.utils.format_dt(self.ends_at, 'R')
+        hint_status = f"Next hint {discord.utils.format_dt(self.hint_ready_at, 'R')}" if self.hint_cooldown > 0 else f"Hints remaining: {self.hints_remaining}"
+        return f"Memory Game (5x5): Match the pairs!\nTime runs out {time_status}\n{hint_status}"
 
-    async def reveal_all_emojis(self):
-        for button in self.board:
-            button.emoji = button.hidden_emoji
-            button.style = discord.ButtonStyle.secondary
-        await self.message.edit(view=self)
+    @property
+    def hint_cooldown(self) -> int:
+        """Seconds left before another hint can be used."""
+        if self.hint_ready_at is None:
+            return 0
+        remaining = (self.hint_ready_at - discord.utils.utcnow()).total_seconds()
+        return max(0, int(remaining + 0.999))
 
-    async def hide_all_emojis(self):
-        for button in self.board:
-            button.emoji = "❓"
-            button.style = discord.ButtonStyle.secondary
-            button.revealed = False
-        await self.message.edit(view=self)
+    def cancel_timers(self):
+        timers.cancel((self, 'inactivity'))
+        timers.cancel((self, 'limit'))
 
     async def process_button(self, button: MemoryGameButton,
                              interaction: discord.Interaction):
@@ -131,101 +215,50 @@ class MemoryGameView(discord.ui.View):
             await interaction.response.send_message(
                 "This game is not for you.", ephemeral=True)
             return
-        self.last_interaction_time = datetime.now()
-        if not button.revealed:
-            button.revealed = True
-            button.style = discord.ButtonStyle.success
-            button.emoji = button.hidden_emoji
-            self.selected_buttons.append(button)
-            self.moves += 1
-
-            if len(self.selected_buttons) == 2:
-                for child in self.children:
-                    if isinstance(child, MemoryGameButton):
-                        child.disabled = True
-                await interaction.response.edit_message(
-                    content=self.get_game_status(), view=self)
-
-                btn1, btn2 = self.selected_buttons
-                if btn1.hidden_emoji == btn2.hidden_emoji:
-                    btn1.disabled = True
-                    btn2.disabled = True
-                    self.pairs_found += 1
-
-                    if self.pairs_found == 12:
-                        if self.inactivity_task:
-                            self.inactivity_task.cancel()
-                        if self.timer_task:
-                            self.timer_task.cancel()
-                        await self.end_game(interaction)
-                        return
-                else:
-                    btn1.style = btn2.style = discord.ButtonStyle.danger
-                    await interaction.message.edit(view=self)
-                    await discord.utils.sleep_until(discord.utils.utcnow() +
-                                                    timedelta(seconds=1))
-                    btn1.emoji = btn2.emoji = "❓"
-                    btn1.style = btn2.style = discord.ButtonStyle.secondary
-                    btn1.revealed = btn2.revealed = False
-
-                self.selected_buttons.clear()
-
-                for child in self.children:
-                    if isinstance(child,
-                                  MemoryGameButton) and not child.revealed:
-                        child.disabled = False
-
-                await interaction.message.edit(content=self.get_game_status(),
-                                               view=self)
-            else:
-                await interaction.response.edit_message(
-                    content=self.get_game_status(), view=self)
-
-    async def check_inactivity(self):
-        while True:
-            await asyncio.sleep(1)
-            if (datetime.now() -
-                    self.last_interaction_time).total_seconds() > 20:
-                await self.end_game_inactivity()
-                break
-
-    async def update_timer(self):
-        while True:
-            await asyncio.sleep(1)
-            if self.game_started:
-                elapsed_time = (datetime.now() -
-                                self.start_time).total_seconds()
-                if elapsed_time >= self.time_limit:
-                    await self.end_game_timeout()
-                    break
-                await self.message.edit(content=self.get_game_status())
+        timers.touch((self, 'inactivity'))
+        outcome = self.board.flip(button.cell)
+        if outcome == IGNORED:
+            await interaction.response.defer()
+            return
+        self.renderer.render(self.board)
+        await interaction.response.edit_message(
+            content=self.get_game_status(), view=self)
+
+        if self.board.is_complete():
+            await self.end_game(interaction)
+        elif outcome == MISMATCH:
+            await discord.utils.sleep_until(discord.utils.utcnow() +
+                                            timedelta(seconds=1))
+            self.board.hide_mismatch()
+            self.refresh()
 
     async def end_game_inactivity(self):
-        if self.timer_task:
-            self.timer_task.cancel()
+        self.cancel_timers()
+        await self.live.close()
         for child in self.children:
             child.disabled = True
         await self.message.edit(content="Game ended due to inactivity.",
                                 view=None)
+        self.record_result(won=False)
         self.game_started = False
         await self.remove_hint_reaction()
         self.cog.end_game(self.ctx.author.id, self.ctx.guild.id)
 
     async def end_game_timeout(self):
-        if self.inactivity_task:
-            self.inactivity_task.cancel()
+        self.cancel_timers()
+        await self.live.close()
         for child in self.children:
             child.disabled = True
         await self.message.edit(content="Time's up! Game over.", view=None)
+        self.record_result(won=False)
         self.game_started = False
         await self.remove_hint_reaction()
         self.cog.end_game(self.ctx.author.id, self.ctx.guild.id)
 
     async def end_game(self, interaction: discord.Interaction):
-        if self.inactivity_task:
-            self.inactivity_task.cancel()
-        if self.timer_task:
-            self.timer_task.cancel()
+        self.cancel_timers()
+        await self.live.close()
+        self.record_result(won=True)
         end_time = datetime.now()
         time_taken = end_time - self.start_time
         minutes, seconds = divmod(time_taken.seconds, 60)
@@ -236,7 +269,7 @@ class MemoryGameView(discord.ui.View):
                         value=f"{minutes} minutes and {seconds} seconds",
                         inline=False)
         embed.add_field(name="🔢 Total Moves",
-                        value=str(self.moves),
+                        value=str(self.board.moves),
                         inline=False)
         embed.add_field(name="💡 Hints Used",
                         value=f"{self.hints_used}/2",
@@ -255,6 +288,10 @@ class MemoryGameView(discord.ui.View):
         await self.remove_hint_reaction()
         self.cog.end_game(self.ctx.author.id, self.ctx.guild.id)
 
+    def record_result(self, won: bool):
+        game_stats.record('memory', self.ctx.guild.id, self.ctx.author.id,
+                          self.board.pairs_found, won)
+
     async def remove_hint_reaction(self):
         try:
             await self.message.clear_reaction("💡")
@@ -263,34 +300,17 @@ class MemoryGameView(discord.ui.View):
 
     async def show_hint(self):
         if self.hints_remaining > 0 and self.hint_cooldown == 0:
-            unrevealed_buttons = [
-                btn for btn in self.board
-                if not btn.revealed and not btn.disabled
-            ]
-            if unrevealed_buttons:
-                hint_button = random.choice(unrevealed_buttons)
-                hint_button.emoji = hint_button.hidden_emoji
-                hint_button.style = discord.ButtonStyle.primary
+            hint_cell = self.board.hint_cell()
+            if hint_cell is not None:
                 self.hints_remaining -= 1
                 self.hints_used += 1
-                self.hint_cooldown = 10  # Set a 10-second cooldown
-
-                try:
-                    await self.message.edit(content=self.get_game_status(),
-                                            view=self)
-                    await asyncio.sleep(2)
-                    if not hint_button.revealed:
-                        hint_button.emoji = "❓"
-                        hint_button.style = discord.ButtonStyle.secondary
-                        await self.message.edit(view=self)
-
-                    # Start cooldown countdown
-                    for i in range(10, 0, -1):
-                        self.hint_cooldown = i
-                        await asyncio.sleep(1)
-                    self.hint_cooldown = 0
-                except discord.errors.NotFound:
-                    pass
+                self.hint_ready_at = discord.utils.utcnow() + timedelta(
+                    seconds=HINT_COOLDOWN)
+
+                self.refresh(content=self.get_game_status())
+                await asyncio.sleep(2)
+                self.board.clear_hint(hint_cell)
+                self.refresh()
             else:
                 hint_message = await self.ctx.send(
                     "No more hints available. All pairs are either revealed or found.",
@@ -0,0 +1,170 @@
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set
+
+
+class ReactionRoleEntry:
+    """A single reaction role button, stored with integer ids."""
+
+    __slots__ = ('guild_id', 'message_id', 'channel_id', 'role_id', 'emoji',
+                 'color', 'custom_id', 'link')
+
+    def __init__(self,
+                 guild_id: int,
+                 message_id: int,
+                 channel_id: int,
+                 role_id: int,
+                 emoji: str,
+                 color: int,
+                 custom_id: str,
+                 link: Optional[str] = None) -> None:
+        self.guild_id = guild_id
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.role_id = role_id
+        self.emoji = emoji
+        self.color = color
+        self.custom_id = custom_id
+        self.link = link
+
+    @classmethod
+    def from_record(cls, record: Mapping[str, Any]) -> 'ReactionRoleEntry':
+        """Build an entry from a `reaction_roles` database row."""
+        link = record['link']
+        return cls(guild_id=int(record['guild_id']),
+                   message_id=int(record['message_id']),
+                   channel_id=int(record['channel_id']),
+                   role_id=int(record['role_id']),
+                   emoji=str(record['emoji']),
+                   color=int(record['color']),
+                   custom_id=str(record['custom_id']),
+                   link=link if link and link != 'None' else None)
+
+    def __repr__(self) -> str:
+        return (f"<ReactionRoleEntry message_id={self.message_id} "
+                f"role_id={self.role_id} custom_id={self.custom_id!r}>")
+
+
+class ReactionRoleIndex:
+    """Reaction role entries grouped by message, with secondary indexes.
+
+    Entries are owned by the per-message lists; the guild, channel and role
+    indexes only hold message ids and the custom_id index holds the entry
+    itself, so every lookup the cog performs is a single dict access. A role
+    is usually attached to one or two messages, so its index is a short list
+    rather than a set.
+    """
+
+    def __init__(self) -> None:
+        self._messages: Dict[int, List[ReactionRoleEntry]] = {}
+        self._by_guild: Dict[int, Dict[int, None]] = {}
+        self._by_channel: Dict[int, Dict[int, None]] = {}
+        self._by_role: Dict[int, List[int]] = {}
+        self._by_custom_id: Dict[str, ReactionRoleEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_custom_id)
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._messages
+
+    def __iter__(self) -> Iterator[ReactionRoleEntry]:
+        for entries in self._messages.values():
+            yield from entries
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._by_guild.clear()
+        self._by_channel.clear()
+        self._by_role.clear()
+        self._by_custom_id.clear()
+
+    def add(self, entry: ReactionRoleEntry) -> None:
+        """Add an entry, keeping every index in sync."""
+        self._messages.setdefault(entry.message_id, []).append(entry)
+        self._by_guild.setdefault(entry.guild_id, {})[entry.message_id] = None
+        self._by_channel.setdefault(entry.channel_id,
+                                    {})[entry.message_id] = None
+        role_messages = self._by_role.setdefault(entry.role_id, [])
+        if entry.message_id not in role_messages:
+            role_messages.append(entry.message_id)
+        self._by_custom_id[entry.custom_id] = entry
+
+    def get_message(self, message_id: int) -> List[ReactionRoleEntry]:
+        """Entries attached to a message, in insertion order."""
+        return self._messages.get(message_id, [])
+
+    def by_custom_id(self, custom_id: str) -> Optional[ReactionRoleEntry]:
+        return self._by_custom_id.get(custom_id)
+
+    def guild_ids(self) -> List[int]:
+        return list(self._by_guild)
+
+    def messages_in_guild(self, guild_id: int) -> List[int]:
+        return list(self._by_guild.get(guild_id, ()))
+
+    def messages_in_channel(self, channel_id: int) -> List[int]:
+        return list(self._by_channel.get(channel_id, ()))
+
+    def messages_for_role(self, role_id: int) -> List[int]:
+        return list(self._by_role.get(role_id, ()))
+
+    def channels_in_guild(self, guild_id: int) -> Set[int]:
+        return {
+            self._messages[message_id][0].channel_id
+            for message_id in self._by_guild.get(guild_id, ())
+        }
+
+    def remove_message(self, message_id: int) -> List[ReactionRoleEntry]:
+        """Remove every entry on a message and return them."""
+        entries = self._messages.pop(message_id, [])
+        for entry in entries:
+            self._unlink(entry)
+        return entries
+
+    def remove_channel(self, channel_id: int) -> List[int]:
+        """Remove every message in a channel and return their ids."""
+        message_ids = self.messages_in_channel(channel_id)
+        for message_id in message_ids:
+            self.remove_message(message_id)
+        return message_ids
+
+    def remove_guild(self, guild_id: int) -> List[int]:
+        """Remove every message in a guild and return their ids."""
+        message_ids = self.messages_in_guild(guild_id)
+        for message_id in message_ids:
+            self.remove_message(message_id)
+        return message_ids
+
+    def remove_role(self, role_id: int) -> List[ReactionRoleEntry]:
+        """Remove the entries for a role from every message it is on."""
+        removed: List[ReactionRoleEntry] = []
+        for message_id in self.messages_for_role(role_id):
+            entries = self._messages[message_id]
+            kept = [entry for entry in entries if entry.role_id != role_id]
+            removed.extend(entry for entry in entries
+                           if entry.role_id == role_id)
+            if kept:
+                self._messages[message_id] = kept
+            else:
+                del self._messages[message_id]
+        for entry in removed:
+            self._unlink(entry, keep_message=entry.message_id
+                         in self._messages)
+        return removed
+
+    def _unlink(self, entry: ReactionRoleEntry,
+                keep_message: bool = False) -> None:
+        self._by_custom_id.pop(entry.custom_id, None)
+        role_messages = self._by_role.get(entry.role_id)
+        if role_messages is not None and entry.message_id in role_messages:
+            role_messages.remove(entry.message_id)
+            if not role_messages:
+                del self._by_role[entry.role_id]
+        if keep_message:
+            return
+        for index, key in ((self._by_guild, entry.guild_id),
+                           (self._by_channel, entry.channel_id)):
+            messages = index.get(key)
+            if messages is not None:
+                messages.pop(entry.message_id, None)
+                if not messages:
+                    del index[key]
@@ -3,7 +3,9 @@ import io
 import time
 import aiohttp
 from urllib.parse import urlparse
-from typing import Optional, Dict, Tuple
+from typing import Optional
+from utils.metrics import http_session
+from utils.state import state
 
 class URLShortenerCore:
     def __init__(self, bitly_token: str, rate_limit: int, reset_interval: int) -> None:
@@ -14,7 +16,7 @@ class URLShortenerCore:
 
     async def initialize_session(self) -> None:
         """Initialize the aiohttp session."""
-        self.session = aiohttp.ClientSession()
+        self.session = http_session()
 
     async def close_session(self) -> None:
         """Clean up the aiohttp session."""
@@ -75,17 +77,7 @@ class URLShortenerCore:
         buf.seek(0)
         return buf
 
-    def is_within_rate_limit(self, user_id: int, user_rate_limits: Dict[int, Tuple[float, int]]) -> bool:
-        """Checks if a user is within the rate limit."""
-        current_time = time.time()
-        if user_id in user_rate_limits:
-            last_reset_time, count = user_rate_limits[user_id]
-            if current_time - last_reset_time < self.reset_interval:
-                if count >= self.rate_limit:
-                    return False
-                user_rate_limits[user_id] = (last_reset_time, count + 1)
-            else:
-                user_rate_limits[user_id] = (current_time, 1)
-        else:
-            user_rate_limits[user_id] = (current_time, 1)
-        return True
\ No newline at end of file
+    async def is_within_rate_limit(self, user_id: int) -> bool:
+        """Checks if a user is within the rate limit, counting this use."""
+        count = await state.incr(f"shorten_rate:{user_id}", self.reset_interval)
+        return count <= self.rate_limit
\ No newline at end of file
@@ -1,30 +1,99 @@
+import asyncio
+import heapq
+import itertools
 import random
+from typing import (Any, Awaitable, Callable, Dict, Hashable, List, Optional,
+                    Tuple)
+
+from loguru import logger
+
+Shape = Tuple[Tuple[int, ...], ...]
+
+CELL_EMOJIS = ("⬛", "🟥", "🟦", "🟩", "🟨", "🟪", "🟧", "⬜", "⚪")
+LINE_BONUS = 100  # Flat points per cleared line on top of the level score
+FRAME_INTERVAL = 1.0  # Least seconds between two edits of one game's message
+
+
+def _rotate(shape: Shape) -> Shape:
+    """The shape turned a quarter clockwise."""
+    return tuple(zip(*shape[::-1]))
+
+
+class Rotation:
+    """One orientation of a piece, precomputed for bitwise collision tests."""
+    __slots__ = ('shape', 'width', 'masks')
+
+    def __init__(self, shape: Shape) -> None:
+        self.shape = shape
+        self.width = len(shape[0])
+        # One bitmask per shape row; bit j is column j of the shape
+        self.masks: Tuple[int, ...] = tuple(
+            sum(1 << j for j, cell in enumerate(row) if cell) for row in shape)
+
+
+def _orientations(shape: List[List[int]]) -> Tuple[Rotation, ...]:
+    shapes = [tuple(tuple(row) for row in shape)]
+    for _ in range(3):
+        shapes.append(_rotate(shapes[-1]))
+    return tuple(map(Rotation, shapes))
 
 
 class TetrisPiece:
     SHAPES = [[[1, 1, 1, 1]], [[1, 1], [1, 1]], [[1, 1, 1], [0, 1, 0]],
               [[1, 1, 1], [1, 0, 0]], [[1, 1, 1], [0, 0, 1]],
               [[1, 1, 0], [0, 1, 1]], [[0, 1, 1], [1, 1, 0]]]
+    # Four orientations of every shape, in clockwise order
+    ROTATIONS: List[Tuple[Rotation, ...]] = [
+        _orientations(shape) for shape in SHAPES
+    ]
+
+    def __init__(self, rng: random.Random = random) -> None:
+        self.kind = rng.randrange(len(self.SHAPES))
+        self.rotation = 0
+        self.color = rng.randint(1, 7)
+
+    @property
+    def orientation(self) -> Rotation:
+        return self.ROTATIONS[self.kind][self.rotation]
 
-    def __init__(self):
-        self.shape = random.choice(self.SHAPES)
-        self.color = random.randint(1, 7)
+    @property
+    def shape(self) -> Shape:
+        return self.orientation.shape
 
-    def rotate(self):
-        self.shape = list(zip(*self.shape[::-1]))
+    def rotated(self) -> Rotation:
+        return self.ROTATIONS[self.kind][(self.rotation + 1) % 4]
+
+    def rotate(self) -> None:
+        self.rotation = (self.rotation + 1) % 4
 
 
 class TetrisGame:
+    """Tetris on a bitboard.
+
+    Every board row is an int with bit j set when column j is filled, so a
+    move is valid when none of the piece's row masks, shifted to its
+    column, overlaps the board row below it, and a row is full when it
+    equals FULL_ROW. Cell colours are kept beside the bitboard only for
+    drawing. Rendered rows are cached and only the rows a lock or a line
+    clear touched are redrawn; the falling piece is overlaid on at most
+    four of them.
+    """
     WIDTH = 10
     HEIGHT = 20
+    FULL_ROW = (1 << WIDTH) - 1
     BASE_FALL_SPEED = 1.0
     MIN_FALL_SPEED = 0.15
+    MAX_LEVEL = 15
 
-    def __init__(self):
-        self.board = [[0 for _ in range(self.WIDTH)]
-                      for _ in range(self.HEIGHT)]
-        self.current_piece = None
-        self.next_piece = TetrisPiece()
+    def __init__(self, rng: random.Random = random) -> None:
+        self.rng = rng
+        self.rows: List[int] = [0] * self.HEIGHT
+        self.colors: List[List[int]] = [[0] * self.WIDTH
+                                        for _ in range(self.HEIGHT)]
+        self.row_strings: List[str] = [self.render_row(row)
+                                       for row in self.colors]
+        self.current_piece: Optional[TetrisPiece] = None
+        self.next_piece = TetrisPiece(rng)
         self.piece_x = 0
         self.piece_y = 0
         self.score = 0
@@ -33,35 +102,57 @@ class TetrisGame:
         self.game_over = False
         self.paused = False
         self.started = False
+        # Last render and the state it was drawn from
+        self._rendered: Optional[str] = None
+        self._rendered_key: Optional[Tuple[int, ...]] = None
+        self.board_version = 0  # Bumped whenever locked cells change
+
+    @property
+    def board(self) -> List[List[int]]:
+        """Cell colours of the locked pieces, row by row."""
+        return self.colors
 
-    def new_piece(self):
+    def new_piece(self) -> None:
         self.current_piece = self.next_piece
-        self.next_piece = TetrisPiece()
-        self.piece_x = self.WIDTH // 2 - len(self.current_piece.shape[0]) // 2
+        self.next_piece = TetrisPiece(self.rng)
+        self.piece_x = self.WIDTH // 2 - self.current_piece.orientation.width // 2
         self.piece_y = 0
-        if not self.is_valid_move(self.piece_x, self.piece_y,
-                                  self.current_piece.shape):
+        if not self.fits(self.current_piece.orientation, self.piece_x,
+                         self.piece_y):
             self.game_over = True
 
-    def move(self, dx, dy):
-        if self.current_piece and self.is_valid_move(self.piece_x + dx,
-                                                     self.piece_y + dy,
-                                                     self.current_piece.shape):
+    def fits(self, rotation: Rotation, x: int, y: int) -> bool:
+        if x < 0 or x + rotation.width > self.WIDTH or \
+           y + len(rotation.masks) > self.HEIGHT:
+            return False
+        rows = self.rows
+        for i, mask in enumerate(rotation.masks):
+            if y + i >= 0 and rows[y + i] & (mask << x):
+                return False
+        return True
+
+    def is_valid_move(self, x: int, y: int, shape: Shape) -> bool:
+        return self.fits(Rotation(tuple(map(tuple, shape))), x, y)
+
+    def move(self, dx: int, dy: int) -> bool:
+        if self.current_piece and self.fits(self.current_piece.orientation,
+                                            self.piece_x + dx,
+                                            self.piece_y + dy):
             self.piece_x += dx
             self.piece_y += dy
             return True
         return False
 
-    def rotate(self):
+    def rotate(self) -> bool:
         if not self.current_piece:
             return False
-        rotated_shape = list(zip(*self.current_piece.shape[::-1]))
-        if self.is_valid_move(self.piece_x, self.piece_y, rotated_shape):
-            self.current_piece.shape = rotated_shape
+        if self.fits(self.current_piece.rotated(), self.piece_x,
+                     self.piece_y):
+            self.current_piece.rotate()
             return True
         return False
 
-    def hard_drop(self):
+    def hard_drop(self) -> int:
         if not self.current_piece:
             return 0
         drop_distance = 0
@@ -69,56 +160,274 @@ class TetrisGame:
             drop_distance += 1
         return drop_distance
 
-    def is_valid_move(self, x, y, shape):
-        for i, row in enumerate(shape):
-            for j, cell in enumerate(row):
-                if cell and (y + i >= self.HEIGHT or x + j < 0
-                             or x + j >= self.WIDTH or
-                             (y + i >= 0 and self.board[y + i][x + j])):
-                    return False
-        return True
-
-    def merge_piece(self):
+    def merge_piece(self) -> None:
         if not self.current_piece:
             return
-        for i, row in enumerate(self.current_piece.shape):
-            for j, cell in enumerate(row):
+        rotation = self.current_piece.orientation
+        color = self.current_piece.color
+        for i, mask in enumerate(rotation.masks):
+            y = self.piece_y + i
+            if not 0 <= y < self.HEIGHT:
+                continue
+            self.rows[y] |= mask << self.piece_x
+            row_colors = self.colors[y]
+            for j, cell in enumerate(rotation.shape[i]):
                 if cell:
-                    self.board[self.piece_y + i][self.piece_x +
-                                                 j] = self.current_piece.color
-
-    def clear_lines(self):
-        lines_cleared = 0
-        for i in range(self.HEIGHT - 1, -1, -1):
-            if all(self.board[i]):
-                del self.board[i]
-                self.board.insert(0, [0 for _ in range(self.WIDTH)])
-                lines_cleared += 1
-
-        if lines_cleared:
-            self.lines_cleared += lines_cleared
-            self.score += (lines_cleared**2) * 100 * self.level
-            self.level = min(self.lines_cleared // 10 + 1, 15)
+                    row_colors[self.piece_x + j] = color
+            self.row_strings[y] = self.render_row(row_colors)
+        self.board_version += 1
+
+    def clear_lines(self) -> int:
+        full = [y for y, row in enumerate(self.rows) if row == self.FULL_ROW]
+        if not full:
+            return 0
+        for y in reversed(full):
+            del self.rows[y], self.colors[y], self.row_strings[y]
+        lines_cleared = len(full)
+        self.rows[:0] = [0] * lines_cleared
+        self.colors[:0] = [[0] * self.WIDTH for _ in range(lines_cleared)]
+        self.row_strings[:0] = [self.render_row(self.colors[0])
+                                ] * lines_cleared
+        self.board_version += 1
 
+        self.lines_cleared += lines_cleared
+        self.score += (lines_cleared**2) * 100 * self.level + \
+            lines_cleared * LINE_BONUS
+        self.level_up(lines_cleared)
         return lines_cleared
 
-    def render(self):
-        board_copy = [row[:] for row in self.board]
-        if self.current_piece:
-            for i, row in enumerate(self.current_piece.shape):
-                for j, cell in enumerate(row):
-                    if cell and 0 <= self.piece_y + i < self.HEIGHT and 0 <= self.piece_x + j < self.WIDTH:
-                        board_copy[self.piece_y +
-                                   i][self.piece_x +
-                                      j] = self.current_piece.color
+    def level_up(self, lines_cleared: int) -> None:
+        """Recompute the level after `lines_cleared` more lines."""
+        self.level = min(self.lines_cleared // 10 + 1, self.MAX_LEVEL)
+
+    def tick(self) -> int:
+        """One gravity step: fall a row, or lock, clear and spawn.
+
+        Returns the number of lines cleared.
+        """
+        if self.current_piece is None:
+            self.new_piece()
+            return 0
+        if self.move(0, 1):
+            return 0
+        self.merge_piece()
+        lines_cleared = self.clear_lines()
+        self.new_piece()
+        return lines_cleared
+
+    def render(self) -> str:
+        piece = self.current_piece
+        key = (self.board_version, piece.kind, piece.rotation, piece.color,
+               self.piece_x, self.piece_y) if piece else (self.board_version, )
+        if key == self._rendered_key:
+            return self._rendered
+        rows = self.row_strings
+        if piece:
+            rows = rows[:]
+            rotation = piece.orientation
+            for i, shape_row in enumerate(rotation.shape):
+                y = self.piece_y + i
+                if 0 <= y < self.HEIGHT:
+                    cells = self.colors[y][:]
+                    for j, cell in enumerate(shape_row):
+                        if cell:
+                            cells[self.piece_x + j] = piece.color
+                    rows[y] = self.render_row(cells)
+        self._rendered = "\n".join(rows)
+        self._rendered_key = key
+        return self._rendered
+
+    def frame(self) -> Tuple[Any, ...]:
+        """Everything the game message shows; equal frames need no edit."""
+        return (self.render(), self.score, self.level, self.lines_cleared,
+                self.paused, self.next_piece.kind, self.game_over)
 
-        return "\n".join("".join(self.cell_to_emoji(cell) for cell in row)
-                         for row in board_copy)
+    @classmethod
+    def render_row(cls, cells: List[int]) -> str:
+        return "".join(map(CELL_EMOJIS.__getitem__, cells))
 
     @staticmethod
-    def cell_to_emoji(cell):
-        return ["⬛", "🟥", "🟦", "🟩", "🟨", "🟪", "🟧", "⬜", "⚪"][cell]
+    def cell_to_emoji(cell: int) -> str:
+        return CELL_EMOJIS[cell]
 
-    def get_fall_speed(self):
+    def get_fall_speed(self) -> float:
         return max(self.BASE_FALL_SPEED - (self.level - 1) * 0.05,
                    self.MIN_FALL_SPEED)
+
+
+FrameCallback = Callable[[Hashable, Any], Awaitable[None]]
+
+
+class _ScheduledGame:
+    __slots__ = ('game', 'target', 'generation', 'frame_due', 'last_edit',
+                 'last_frame', 'editing', 'dirty')
+
+    def __init__(self, game: TetrisGame, target: Any) -> None:
+        self.game = game
+        self.target = target  # Passed back to the callbacks, e.g. a message
+        self.generation = 0  # Bumped to invalidate queued gravity ticks
+        self.frame_due = False  # A frame deadline is queued
+        self.last_edit = float('-inf')
+        self.last_frame: Optional[Tuple[Any, ...]] = None
+        self.editing = False
+        self.dirty = False  # Changed while an edit was in flight
+
+
+class TetrisScheduler:
+    """One task that runs gravity and redraws for every active game.
+
+    Deadlines for both live in a single heap. A gravity tick re-queues
+    itself at the game's current fall speed; a paused game simply has no
+    tick queued, so it costs nothing until it resumes. Redraws are
+    coalesced: a game is edited at most once per `frame_interval`, the
+    edit shows whatever the latest state is by then, and it is skipped when
+    the frame matches the last one sent. Edits run as their own tasks so a
+    slow request for one game never delays another game's gravity.
+    """
+
+    def __init__(self,
+                 on_frame: FrameCallback,
+                 on_game_over: FrameCallback,
+                 frame_interval: float = FRAME_INTERVAL) -> None:
+        self.on_frame = on_frame
+        self.on_game_over = on_game_over
+        self.frame_interval = frame_interval
+        self.games: Dict[Hashable, _ScheduledGame] = {}
+        # (deadline, tie-breaker, key, generation or None for a redraw)
+        self._heap: List[Tuple[float, int, Hashable, Optional[int]]] = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._edits: set = set()
+
+    def __len__(self) -> int:
+        return len(self.games)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.games
+
+    def add(self, key: Hashable, game: TetrisGame, target: Any) -> None:
+        """Start running `game`; spawns its first piece if it has none."""
+        if game.current_piece is None:
+            game.new_piece()
+        self.games[key] = _ScheduledGame(game, target)
+        self._queue_tick(key)
+        self.request_frame(key)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def remove(self, key: Hashable) -> Optional[TetrisGame]:
+        """Stop scheduling `key`; queued deadlines for it are skipped."""
+        entry = self.games.pop(key, None)
+        return entry.game if entry else None
+
+    def set_paused(self, key: Hashable, paused: bool) -> None:
+        entry = self.games.get(key)
+        if entry is None or entry.game.paused == paused:
+            return
+        entry.game.paused = paused
+        entry.generation += 1
+        if not paused:
+            self._queue_tick(key)
+        self.request_frame(key)
+
+    def request_frame(self, key: Hashable) -> None:
+        """Redraw `key` as soon as its frame budget allows."""
+        entry = self.games.get(key)
+        if entry is None or entry.frame_due:
+            return
+        if entry.editing:
+            entry.dirty = True
+            return
+        entry.frame_due = True
+        loop = asyncio.get_running_loop()
+        self._push(max(loop.time(), entry.last_edit + self.frame_interval),
+                   key, None)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._edits:
+            task.cancel()
+        self.games.clear()
+        self._heap.clear()
+
+    def _queue_tick(self, key: Hashable) -> None:
+        entry = self.games[key]
+        self._push(asyncio.get_running_loop().time() +
+                   entry.game.get_fall_speed(), key, entry.generation)
+
+    def _push(self, deadline: float, key: Hashable,
+              generation: Optional[int]) -> None:
+        wake = not self._heap or deadline < self._heap[0][0]
+        heapq.heappush(self._heap,
+                       (deadline, next(self._counter), key, generation))
+        if wake:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, key, generation = heapq.heappop(self._heap)
+            entry = self.games.get(key)
+            if entry is None:
+                continue
+            try:
+                if generation is None:
+                    entry.frame_due = False
+                    self._frame(key, entry)
+                elif generation == entry.generation:
+                    self._tick(key, entry)
+            except Exception:
+                logger.exception(f"Tetris game {key} failed")
+                self.remove(key)
+
+    def _tick(self, key: Hashable, entry: _ScheduledGame) -> None:
+        game = entry.game
+        game.tick()
+        if game.game_over:
+            self.remove(key)
+            self._spawn(self.on_game_over(key, entry.target))
+            return
+        self._queue_tick(key)
+        self.request_frame(key)
+
+    def _frame(self, key: Hashable, entry: _ScheduledGame) -> None:
+        frame = entry.game.frame()
+        if frame == entry.last_frame:
+            return
+        entry.last_frame = frame
+        entry.last_edit = asyncio.get_running_loop().time()
+        entry.editing = True
+        task = self._spawn(self.on_frame(key, entry.target))
+        task.add_done_callback(lambda _: self._edited(key, entry))
+
+    def _edited(self, key: Hashable, entry: _ScheduledGame) -> None:
+        entry.editing = False
+        if entry.dirty:
+            entry.dirty = False
+            self.request_frame(key)
+
+    def _spawn(self, coroutine: Awaitable[None]) -> asyncio.Task:
+        task = asyncio.ensure_future(coroutine)
+        self._edits.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._edits.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error(
+                "Tetris message update failed")
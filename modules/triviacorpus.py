@@ -0,0 +1,207 @@
+"""Local trivia corpus: opentdb-style questions in an indexed SQLite file.
+
+Build or extend the corpus from question dumps (an opentdb API response, or
+a JSON list of its ``results``):
+``python -m modules.triviacorpus dump1.json dump2.json``
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+import config
+from utils.expiring import ExpiringMap
+
+DECK_TTL = 6 * 3600  # Seconds a guild's undrawn questions are remembered
+MAX_DECKS = 10_000  # Guild decks kept before the oldest are dropped
+
+# opentdb category names -> the ids its API filters on
+OPENTDB_CATEGORIES: Dict[str, int] = {
+    "General Knowledge": 9,
+    "Entertainment: Books": 10,
+    "Entertainment: Film": 11,
+    "Entertainment: Music": 12,
+    "Entertainment: Musicals & Theatres": 13,
+    "Entertainment: Television": 14,
+    "Entertainment: Video Games": 15,
+    "Entertainment: Board Games": 16,
+    "Science & Nature": 17,
+    "Science: Computers": 18,
+    "Science: Mathematics": 19,
+    "Mythology": 20,
+    "Sports": 21,
+    "Geography": 22,
+    "History": 23,
+    "Politics": 24,
+    "Art": 25,
+    "Celebrities": 26,
+    "Animals": 27,
+    "Vehicles": 28,
+    "Entertainment: Comics": 29,
+    "Science: Gadgets": 30,
+    "Entertainment: Japanese Anime & Manga": 31,
+    "Entertainment: Cartoon & Animations": 32,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER,
+    category TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    question TEXT NOT NULL UNIQUE,
+    correct_answer TEXT NOT NULL,
+    incorrect_answers TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_by_category
+    ON questions (category_id, difficulty);
+CREATE INDEX IF NOT EXISTS questions_by_difficulty
+    ON questions (difficulty);
+"""
+
+PoolKey = Tuple[Optional[int], Optional[str]]  # (category id, difficulty)
+
+
+def _filter(key: PoolKey) -> Tuple[str, List[Any]]:
+    category, difficulty = key
+    clauses, params = [], []
+    if category is not None:
+        clauses.append("category_id = ?")
+        params.append(category)
+    if difficulty is not None:
+        clauses.append("difficulty = ?")
+        params.append(difficulty)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class TriviaCorpus:
+    """Read side of the corpus, opened on first use.
+
+    Each guild draws from a shuffled deck of question ids per category and
+    difficulty, so nobody in a guild sees a question twice until the whole
+    combination has been asked; then the deck is reshuffled. Decks hold
+    only ids and the question itself is one primary-key lookup, so drawing
+    stays cheap however large the corpus grows.
+    """
+
+    def __init__(self, path: str = config.TRIVIA_CORPUS) -> None:
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self.counts: Dict[PoolKey, int] = {}
+        # (guild, pool key) -> question ids not yet drawn
+        self.decks = ExpiringMap(MAX_DECKS)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._db is None:
+            if not os.path.exists(self.path):
+                return None
+            self._db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            logger.info(f"Opened trivia corpus {self.path}")
+        return self._db
+
+    def count(self, key: PoolKey) -> int:
+        """Questions matching `key`; 0 when there is no corpus.
+
+        Cached per key, so combinations the corpus lacks cost a dict lookup.
+        """
+        if key not in self.counts:
+            db = self._connection()
+            if db is None:
+                return 0
+            where, params = _filter(key)
+            self.counts[key] = db.execute(
+                f"SELECT COUNT(*) FROM questions{where}", params).fetchone()[0]
+        return self.counts[key]
+
+    def draw(self, guild_id: Optional[int],
+             key: PoolKey) -> Optional[Dict[str, Any]]:
+        """A question in the API's result format, or None if none match."""
+        db = self._connection()
+        if db is None:
+            return None
+        deck: Optional[List[int]] = self.decks.get((guild_id, key))
+        if not deck:
+            where, params = _filter(key)
+            deck = [
+                row[0] for row in db.execute(
+                    f"SELECT id FROM questions{where}", params)
+            ]
+            if not deck:
+                return None
+            random.shuffle(deck)
+        question_id = deck.pop()
+        self.decks.set((guild_id, key), deck, DECK_TTL)
+        category, difficulty, question, correct, incorrect = db.execute(
+            "SELECT category, difficulty, question, correct_answer, "
+            "incorrect_answers FROM questions WHERE id = ?",
+            (question_id, )).fetchone()
+        return {
+            'category': category,
+            'difficulty': difficulty,
+            'question': question,
+            'correct_answer': correct,
+            'incorrect_answers': json.loads(incorrect)
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        self.counts.clear()
+
+
+# Instantiate a global corpus; the file is opened on first use
+corpus: TriviaCorpus = TriviaCorpus()
+
+
+def import_questions(path: str, questions: Iterable[Dict[str, Any]]) -> int:
+    """Add multiple-choice questions to the corpus at `path`.
+
+    Returns how many were new; questions already stored are skipped.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db = sqlite3.connect(path)
+    try:
+        db.executescript(SCHEMA)
+        before = db.total_changes
+        with db:
+            db.executemany(
+                "INSERT OR IGNORE INTO questions (category_id, category, "
+                "difficulty, question, correct_answer, incorrect_answers) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((q.get('category_id',
+                        OPENTDB_CATEGORIES.get(q['category'])), q['category'],
+                  q['difficulty'], q['question'], q['correct_answer'],
+                  json.dumps(q['incorrect_answers'])) for q in questions
+                 if len(q.get('incorrect_answers', ())) == 3))
+        return db.total_changes - before
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('dumps',
+                        nargs='+',
+                        help="JSON files of opentdb questions")
+    parser.add_argument('--corpus',
+                        default=config.TRIVIA_CORPUS,
+                        help="corpus file to create or extend")
+    args = parser.parse_args()
+    for dump in args.dumps:
+        with open(dump, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('results', [])
+        added = import_questions(args.corpus, data)
+        print(f"{dump}: {added} new of {len(data)} questions")
+
+
+if __name__ == '__main__':
+    main()
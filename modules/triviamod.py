@@ -1,23 +1,235 @@
 import discord
 from discord.ext import commands
-import aiohttp
 import random
 import html
 import asyncio
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+import aiohttp
+from loguru import logger
+import config
+from modules.triviacorpus import corpus
+from modules.gamestats import game_stats
+from utils.expiring import ExpiringMap
+from utils.timers import timers
+from utils.metrics import http_session
+
+QUESTION_TIME = 30  # Seconds to answer a question
+TRIVIA_API = 'https://opentdb.com/api.php'
+TRIVIA_TOKEN_API = 'https://opentdb.com/api_token.php'
+BATCH_SIZE = 50  # Questions per API request, the API's maximum
+LOW_WATER = 15  # Refill a pool in the background below this many questions
+FETCH_INTERVAL = 5.0  # Seconds between API requests, the API's rate limit
+SESSION_TTL = 3600  # Seconds a player's asked questions are remembered
+REFILL_WAIT = 10.0  # Seconds a round waits on the API for its first question
+# opentdb response codes
+RESPONSE_OK, RESPONSE_NO_RESULTS = 0, 1
+RESPONSE_TOKEN_NOT_FOUND, RESPONSE_TOKEN_EMPTY, RESPONSE_RATE_LIMIT = 3, 4, 5
+
+PoolKey = Tuple[Optional[int], Optional[str]]  # (category id, difficulty)
+
+
+class NoQuestionsAvailable(Exception):
+    """Neither the API nor the corpus has a question for a combination."""
+
+
+def prepare_question(question_data: Dict[str, Any]) -> Dict[str, Any]:
+    """An API result as the fields the trivia embed needs, answers shuffled."""
+    correct_answer = html.unescape(question_data['correct_answer'])
+    all_answers = [
+        html.unescape(answer) for answer in question_data['incorrect_answers']
+    ] + [correct_answer]
+    random.shuffle(all_answers)
+    return {
+        'category': html.unescape(question_data['category']),
+        'difficulty': question_data['difficulty'],
+        'question': html.unescape(question_data['question']),
+        'correct_answer': chr(65 + all_answers.index(correct_answer)),
+        'all_answers': all_answers
+    }
+
+
+class QuestionPool:
+    """Pre-fetched trivia questions, so a round never waits on the API.
+
+    Questions are fetched BATCH_SIZE at a time into one buffer per category
+    and difficulty. Taking a question that leaves a buffer under LOW_WATER
+    starts a background refill, so only the very first question of a
+    combination waits for a request. Requests are spaced FETCH_INTERVAL
+    apart to stay inside the API's rate limit, and each buffer uses an API
+    session token so one refill does not repeat another. Questions already
+    asked in a player's session are skipped.
+
+    With the "auto" source, a round that finds its buffer empty is served
+    from the local corpus instead of waiting on the API; the "corpus" source
+    never touches the network and "api" never reads the corpus.
+    """
+
+    def __init__(self, source: str = config.TRIVIA_SOURCE) -> None:
+        self.source = source
+        self.pools: Dict[PoolKey, Deque[Dict[str, Any]]] = {}
+        self.tokens: Dict[PoolKey, str] = {}
+        # Batch size for combinations with fewer than BATCH_SIZE questions
+        self.batch_sizes: Dict[PoolKey, int] = {}
+        self.refills: Dict[PoolKey, asyncio.Task] = {}
+        # player -> questions asked this session
+        self.sessions = ExpiringMap()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._fetch_lock = asyncio.Lock()
+        self._last_fetch = float('-inf')
+
+    def size(self, key: PoolKey) -> int:
+        return len(self.pools.get(key, ()))
+
+    async def next_question(
+            self,
+            user_id: int,
+            category: Optional[int] = None,
+            difficulty: Optional[str] = None,
+            guild_id: Optional[int] = None) -> Dict[str, Any]:
+        key = (category, difficulty)
+        pool = self.pools.setdefault(key, deque())
+        seen: Set[str] = self.sessions.get(user_id) or set()
+        question = self._take_unseen(pool, seen)
+        if question is None and self.source != 'api' and corpus.count(key):
+            # The corpus answers at once; the refill below catches the API up
+            question = corpus.draw(guild_id, key)
+        if question is None:
+            await self._refill_now(key)
+            question = self._take_unseen(pool, seen)
+        if question is None:
+            seen.clear()  # This player has seen everything fetched
+            question = pool.popleft()
+        seen.add(question['question'])
+        self.sessions.set(user_id, seen, SESSION_TTL)
+        if len(pool) < LOW_WATER:
+            self.refill(key)
+        return prepare_question(question)
+
+    @staticmethod
+    def _take_unseen(pool: Deque[Dict[str, Any]],
+                     seen: Set[str]) -> Optional[Dict[str, Any]]:
+        for candidate in pool:
+            if candidate['question'] not in seen:
+                pool.remove(candidate)
+                return candidate
+        return None
+
+    def refill(self, key: PoolKey) -> None:
+        """Top up `key` in the background unless a refill is running."""
+        if self.source == 'corpus':
+            return
+        task = self.refills.get(key)
+        if task is None or task.done():
+            self.refills[key] = asyncio.create_task(self._refill(key))
+
+    async def _refill_now(self, key: PoolKey) -> None:
+        self.refill(key)
+        task = self.refills.get(key)
+        if task is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(task), REFILL_WAIT)
+            except asyncio.TimeoutError:
+                pass  # The refill carries on for the next round
+        if not self.pools[key]:
+            raise NoQuestionsAvailable(key)
+
+    async def _refill(self, key: PoolKey) -> None:
+        try:
+            questions = await self._fetch(key)
+        except Exception as e:
+            logger.warning(f"Failed to fetch trivia questions for {key}: {e}")
+            return
+        self.pools.setdefault(key, deque()).extend(questions)
+
+    async def _request(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._fetch_lock:
+            wait = self._last_fetch + FETCH_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if self.session is None or self.session.closed:
+                self.session = http_session()
+            try:
+                async with self.session.get(url, params=params) as response:
+                    return await response.json(content_type=None)
+            finally:
+                self._last_fetch = time.monotonic()
+
+    async def _fetch(self, key: PoolKey) -> List[Dict[str, Any]]:
+        category, difficulty = key
+        rate_limited = token_renewed = token_reset = shrunk = False
+        while True:
+            if key not in self.tokens:
+                data = await self._request(TRIVIA_TOKEN_API,
+                                           {'command': 'request'})
+                self.tokens[key] = data['token']
+            amount = self.batch_sizes.get(key, BATCH_SIZE)
+            params: Dict[str, Any] = {
+                'amount': amount,
+                'type': 'multiple',
+                'token': self.tokens[key]
+            }
+            if category is not None:
+                params['category'] = category
+            if difficulty is not None:
+                params['difficulty'] = difficulty
+            data = await self._request(TRIVIA_API, params)
+            code = data.get('response_code')
+            if code == RESPONSE_OK:
+                return data['results']
+            if code == RESPONSE_RATE_LIMIT and not rate_limited:
+                rate_limited = True
+            elif code == RESPONSE_TOKEN_NOT_FOUND and not token_renewed:
+                # Tokens expire after six hours unused; get a fresh one
+                del self.tokens[key]
+                token_renewed = True
+            elif code == RESPONSE_NO_RESULTS and amount > 1:
+                # Fewer questions match than were asked for. Retry smaller
+                # once; later refills keep shrinking if that is still too
+                # many, so no single fetch queues a string of requests
+                self.batch_sizes[key] = amount // 2
+                if shrunk:
+                    raise RuntimeError(
+                        f"opentdb has fewer than {amount} questions")
+                shrunk = True
+            elif code in (RESPONSE_TOKEN_EMPTY,
+                          RESPONSE_NO_RESULTS) and not token_reset:
+                # Every question of this combination was handed out; start over
+                await self._request(TRIVIA_TOKEN_API, {
+                    'command': 'reset',
+                    'token': self.tokens[key]
+                })
+                token_reset = True
+            else:
+                raise RuntimeError(f"opentdb returned response code {code}")
+
+    async def close(self) -> None:
+        for task in self.refills.values():
+            task.cancel()
+        if self.session is not None:
+            await self.session.close()
+        corpus.close()
+
+
+# Instantiate a global question pool
+question_pool: QuestionPool = QuestionPool()
 
 
 class TriviaView(discord.ui.View):
 
-    def __init__(self, correct_answer, cog, user_id, score):
-        super().__init__(timeout=35.0)
+    def __init__(self, correct_answer, cog, user_id, score, difficulty=None):
+        # Expiry is driven by the shared timer service, see start_timer
+        super().__init__(timeout=None)
         self.correct_answer = correct_answer
         self.cog = cog
         self.user_id = user_id
         self.score = score
+        self.difficulty = difficulty
         self.answered = False
-        self.time_left = 30
+        self.time_left = QUESTION_TIME
         self.timer_message = None
-        self.timer_task = None
         self.message = None
 
     async def interaction_check(self,
@@ -35,45 +247,32 @@ class TriviaView(discord.ui.View):
 
     async def on_timeout(self):
         if not self.answered:
+            self.answered = True
+            self.stop()
+            guild = self.message.guild
+            game_stats.record('trivia', guild.id if guild else None,
+                              self.user_id, self.score)
             for item in self.children:
                 item.disabled = True
             await self.message.edit(
                 content="Time's up! You didn't answer in time.", view=self)
             await self.safe_delete_timer()
             await asyncio.sleep(2)
-            play_again_view = PlayAgainView(self.cog, self.user_id, self.score)
+            play_again_view = PlayAgainView(self.cog, self.user_id, self.score,
+                                            self.difficulty)
             await self.message.edit(content=f"Your final score: {self.score}",
                                     view=play_again_view)
             play_again_view.message = self.message
 
     async def start_timer(self, channel):
+        # Discord renders the countdown itself, so the message never needs editing
+        deadline = discord.utils.utcnow() + timedelta(seconds=self.time_left)
         self.timer_message = await channel.send(
-            f"Time left: {self.time_left} seconds")
-        self.timer_task = asyncio.create_task(self.run_timer())
-
-    async def run_timer(self):
-        try:
-            while self.time_left > 0 and not self.answered:
-                await asyncio.sleep(1)
-                self.time_left -= 1
-                if self.timer_message:
-                    try:
-                        await self.timer_message.edit(
-                            content=f"Time left: {self.time_left} seconds")
-                    except discord.NotFound:
-                        break
-            if not self.answered:
-                await self.on_timeout()
-        except asyncio.CancelledError:
-            pass
+            f"Time's up {discord.utils.format_dt(deadline, 'R')}")
+        timers.schedule(self, self.time_left, self.on_timeout)
 
     async def safe_delete_timer(self):
-        if self.timer_task:
-            self.timer_task.cancel()
-            try:
-                await self.timer_task
-            except asyncio.CancelledError:
-                pass
+        timers.cancel(self)
         if self.timer_message:
             try:
                 await self.timer_message.delete()
@@ -119,55 +318,30 @@ class TriviaView(discord.ui.View):
             content = f"**Correct!** The answer was {self.correct_answer}."
             await interaction.response.edit_message(content=content, view=self)
             await asyncio.sleep(2)
-            await self.cog._send_trivia(interaction, self.user_id, self.score)
+            await self.cog._send_trivia(interaction, self.user_id, self.score,
+                                        self.difficulty)
         else:
+            game_stats.record('trivia', interaction.guild_id, self.user_id,
+                              self.score)
             content = f"**{chosen_answer}** was not the correct answer. The correct answer was **{self.correct_answer}**."
             await interaction.response.edit_message(content=content, view=self)
             await asyncio.sleep(2)
-            play_again_view = PlayAgainView(self.cog, self.user_id, self.score)
+            play_again_view = PlayAgainView(self.cog, self.user_id, self.score,
+                                            self.difficulty)
             await interaction.edit_original_response(
                 content=f"Your final score: {self.score}",
                 view=play_again_view)
             play_again_view.message = await interaction.original_response()
 
-    @staticmethod
-    async def fetch_trivia_question():
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                    'https://opentdb.com/api.php?amount=1&type=multiple'
-            ) as response:
-                data = await response.json()
-
-        question_data = data['results'][0]
-        category = question_data['category']
-        difficulty = question_data['difficulty']
-        question = html.unescape(question_data['question'])
-        correct_answer = html.unescape(question_data['correct_answer'])
-        incorrect_answers = [
-            html.unescape(answer)
-            for answer in question_data['incorrect_answers']
-        ]
-
-        all_answers = incorrect_answers + [correct_answer]
-        random.shuffle(all_answers)
-        correct_letter = chr(65 + all_answers.index(correct_answer))
-
-        return {
-            'category': category,
-            'difficulty': difficulty,
-            'question': question,
-            'correct_answer': correct_letter,
-            'all_answers': all_answers
-        }
-
 
 class PlayAgainView(discord.ui.View):
 
-    def __init__(self, cog, user_id, score):
+    def __init__(self, cog, user_id, score, difficulty=None):
         super().__init__(timeout=30.0)
         self.cog = cog
         self.user_id = user_id
         self.score = score
+        self.difficulty = difficulty
         self.message = None
 
     async def interaction_check(self,
@@ -189,7 +363,8 @@ class PlayAgainView(discord.ui.View):
                          button: discord.ui.Button):
         self.stop()
         await interaction.response.defer()
-        await self.cog._send_trivia(interaction, self.user_id, 0)
+        await self.cog._send_trivia(interaction, self.user_id, 0,
+                                    self.difficulty)
 
     @discord.ui.button(label="Quit", style=discord.ButtonStyle.red)
     async def quit_game(self, interaction: discord.Interaction,
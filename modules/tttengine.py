@@ -0,0 +1,489 @@
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+SIZE = 3
+CELLS = SIZE * SIZE
+FULL_BOARD = (1 << CELLS) - 1
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))  # dx, dy of every line
+
+
+def line_masks(width: int, height: int, k: int) -> List[int]:
+    """Every run of `k` cells in a row, column or diagonal, as bitmasks.
+
+    Cell index is y * width + x.
+    """
+    masks = []
+    for y in range(height):
+        for x in range(width):
+            for dx, dy in DIRECTIONS:
+                end_x, end_y = x + dx * (k - 1), y + dy * (k - 1)
+                if 0 <= end_x < width and 0 <= end_y < height:
+                    masks.append(
+                        sum(1 << ((y + dy * i) * width + x + dx * i)
+                            for i in range(k)))
+    return masks
+
+
+# Every row, column and diagonal of the classic board
+WIN_LINES: Tuple[int, ...] = tuple(line_masks(SIZE, SIZE, SIZE))
+
+# Chance that the bot plays a random legal move instead of the best one
+DIFFICULTIES: Dict[str, float] = {'easy': 0.6, 'medium': 0.25, 'hard': 0.0}
+DEFAULT_DIFFICULTY = 'hard'
+
+
+def has_line(bits: int) -> bool:
+    return any(bits & line == line for line in WIN_LINES)
+
+
+def free_cells(x_bits: int, o_bits: int) -> List[int]:
+    taken = x_bits | o_bits
+    return [cell for cell in range(CELLS) if not taken >> cell & 1]
+
+
+class PerfectPlayTable:
+    """The solved game: score and best moves for every reachable position.
+
+    A position is two 9-bit masks, one per side, packed into one int; X
+    always moves first, so whose turn it is follows from the counts. Scores
+    are from the side to move: 0 for a draw, otherwise the number of empty
+    cells left at the end plus one, positive for a win and negative for a
+    loss, so faster wins and slower losses rank higher. All 5,478 legal
+    positions are solved once on first use, after which a bot move is a
+    dict lookup.
+    """
+
+    def __init__(self) -> None:
+        # position -> (score for the side to move, optimal cells)
+        self.positions: Dict[int, Tuple[int, Tuple[int, ...]]] = {}
+
+    def __len__(self) -> int:
+        self.ensure_built()
+        return len(self.positions)
+
+    def ensure_built(self) -> None:
+        if not self.positions:
+            self._solve(0, 0)
+
+    @staticmethod
+    def key(x_bits: int, o_bits: int) -> int:
+        return x_bits | o_bits << CELLS
+
+    def _solve(self, x_bits: int, o_bits: int) -> int:
+        key = self.key(x_bits, o_bits)
+        solved = self.positions.get(key)
+        if solved is not None:
+            return solved[0]
+        x_to_move = x_bits.bit_count() == o_bits.bit_count()
+        empty = CELLS - (x_bits | o_bits).bit_count()
+        if has_line(o_bits if x_to_move else x_bits):
+            score, moves = -(empty + 1), ()
+        elif not empty:
+            score, moves = 0, ()
+        else:
+            results = []
+            for cell in free_cells(x_bits, o_bits):
+                if x_to_move:
+                    results.append(
+                        (-self._solve(x_bits | 1 << cell, o_bits), cell))
+                else:
+                    results.append(
+                        (-self._solve(x_bits, o_bits | 1 << cell), cell))
+            score = max(result for result, _ in results)
+            moves = tuple(cell for result, cell in results if result == score)
+        self.positions[key] = (score, moves)
+        return score
+
+    def lookup(self, x_bits: int,
+               o_bits: int) -> Tuple[int, Tuple[int, ...]]:
+        self.ensure_built()
+        return self.positions[self.key(x_bits, o_bits)]
+
+    def choose_move(self,
+                    x_bits: int,
+                    o_bits: int,
+                    difficulty: str = DEFAULT_DIFFICULTY,
+                    rng: random.Random = random) -> int:
+        """A cell for the side to move, random at the difficulty's rate."""
+        if rng.random() < DIFFICULTIES[difficulty]:
+            return rng.choice(free_cells(x_bits, o_bits))
+        return rng.choice(self.lookup(x_bits, o_bits)[1])
+
+
+# Instantiate the global table; it is solved on first use
+perfect_play: PerfectPlayTable = PerfectPlayTable()
+
+
+SEARCH_TIME_BUDGET = 1.0  # Seconds a bot may think about one move
+WIDE_CANDIDATES_MAX_CELLS = 25  # Boards this small also try cells two
+# away from a stone, where quiet defensive moves often are
+WIN_SCORE = 1_000_000  # Beats any heuristic score
+# Heuristic weight of a line holding only one side's stones, by stone count
+# (up to the largest win length a 5x5 button grid allows)
+LINE_WEIGHTS = (0, 1, 8, 64, 512, 4096)
+# Transposition table bound types
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class MNKBoard:
+    """An m-by-n board where `k` in a row wins, as two bitmasks.
+
+    Each side's stone count on every run of k cells is kept up to date as
+    stones are played and taken back, along with the heuristic score and
+    the runs one stone short of a win. A move only touches the runs through
+    its cell, so checking for a win, scoring a position and finding the
+    cells that win at once never rescan the board.
+    """
+
+    def __init__(self, width: int, height: int, k: int) -> None:
+        if not 1 <= k <= max(width, height):
+            raise ValueError(f"Win length {k} does not fit a {width}x{height} board")
+        self.width = width
+        self.height = height
+        self.k = k
+        self.cells = width * height
+        self.full = (1 << self.cells) - 1
+        self.lines = line_masks(width, height, k)
+        # Cell -> indices of the runs through it
+        self.lines_through: List[List[int]] = [[] for _ in range(self.cells)]
+        for index, mask in enumerate(self.lines):
+            for cell in range(self.cells):
+                if mask >> cell & 1:
+                    self.lines_through[cell].append(index)
+        centre_x, centre_y = (width - 1) / 2, (height - 1) / 2
+        # Cells nearest the centre first; they sit on the most lines
+        self.move_order = sorted(
+            range(self.cells),
+            key=lambda cell: abs(cell % width - centre_x) + abs(
+                cell // width - centre_y))
+        # Cells within `radius` of each cell, including diagonally
+        radius = 2 if self.cells <= WIDE_CANDIDATES_MAX_CELLS else 1
+        self.neighbours: List[int] = [
+            sum(1 << (ny * width + nx)
+                for nx in range(x - radius, x + radius + 1)
+                for ny in range(y - radius, y + radius + 1)
+                if 0 <= nx < width and 0 <= ny < height and
+                (nx, ny) != (x, y)) for y in range(height)
+            for x in range(width)
+        ]
+        self.bits = [0, 0]  # Stones of the first and second player
+        # Stones of each side on each run
+        self.counts = [[0] * len(self.lines), [0] * len(self.lines)]
+        # Runs each side is one or two stones short of completing, among
+        # those holding none of the other side's stones
+        self.one_short: List[Set[int]] = [set(), set()]
+        self.two_short: List[Set[int]] = [set(), set()]
+        self.score = 0  # Heuristic score for the first player
+        self.history: List[int] = []
+        self.winner: Optional[int] = None  # 0 or 1 once someone has won
+
+    @property
+    def to_move(self) -> int:
+        return len(self.history) & 1
+
+    @property
+    def taken(self) -> int:
+        return self.bits[0] | self.bits[1]
+
+    def is_full(self) -> bool:
+        return self.taken == self.full
+
+    def is_over(self) -> bool:
+        return self.winner is not None or self.is_full()
+
+    def free_cells(self) -> List[int]:
+        taken = self.taken
+        return [cell for cell in self.move_order if not taken >> cell & 1]
+
+    def candidate_cells(self, ranked: bool = True) -> List[int]:
+        """Free cells near a stone, which is where useful moves are.
+
+        When `ranked`, the most promising come first: a cell scores by the
+        runs through it that it extends for the side to move or cuts for the
+        opponent, longer runs weighing more.
+        """
+        taken = self.taken
+        if not taken:
+            return self.free_cells()
+        cells = [
+            cell for cell in self.move_order
+            if not taken >> cell & 1 and self.neighbours[cell] & taken
+        ]
+        if not ranked:
+            return cells
+        side = self.to_move
+        mine, theirs = self.counts[side], self.counts[1 - side]
+        scored = []
+        for cell in cells:
+            score = 0
+            for line in self.lines_through[cell]:
+                if not theirs[line]:
+                    score += LINE_WEIGHTS[mine[line] + 1]
+                elif not mine[line]:
+                    score += LINE_WEIGHTS[theirs[line]]
+            scored.append((score, cell))
+        # Stable, so equal scores keep the centre-first order
+        scored.sort(key=lambda item: -item[0])
+        return [cell for _, cell in scored]
+
+    def winning_cells(self, side: int) -> int:
+        """Free cells where `side` would complete a run, as a bitmask."""
+        bits = self.bits[side]
+        cells = 0
+        for line in self.one_short[side]:
+            cells |= self.lines[line] & ~bits
+        return cells
+
+    def threat_cells(self, side: int) -> int:
+        """Free cells where `side` would leave a run one stone short."""
+        taken = self.taken
+        cells = 0
+        for line in self.two_short[side]:
+            cells |= self.lines[line] & ~taken
+        return cells
+
+    def _place(self, side: int, cell: int, step: int) -> bool:
+        """Add (`step` 1) or remove (-1) a stone of `side` on `cell`.
+
+        Returns whether `side` now holds a whole run through `cell`.
+        """
+        self.bits[side] ^= 1 << cell
+        mine, theirs = self.counts[side], self.counts[1 - side]
+        near = self.k - 1
+        delta = 0  # Change in score for `side`
+        won = False
+        for line in self.lines_through[cell]:
+            before = mine[line]
+            after = mine[line] = before + step
+            other = theirs[line]
+            if other:
+                # The run was theirs alone before, or is again now
+                if not before:
+                    delta += LINE_WEIGHTS[other]
+                    if other == near:
+                        self.one_short[1 - side].discard(line)
+                    elif other == near - 1:
+                        self.two_short[1 - side].discard(line)
+                elif not after:
+                    delta -= LINE_WEIGHTS[other]
+                    if other == near:
+                        self.one_short[1 - side].add(line)
+                    elif other == near - 1:
+                        self.two_short[1 - side].add(line)
+                continue
+            delta += LINE_WEIGHTS[after] - LINE_WEIGHTS[before]
+            if before == near:
+                self.one_short[side].discard(line)
+            elif before == near - 1:
+                self.two_short[side].discard(line)
+            if after == near:
+                self.one_short[side].add(line)
+            elif after == near - 1:
+                self.two_short[side].add(line)
+            elif after > near:
+                won = True
+        self.score += -delta if side else delta
+        return won
+
+    def play(self, cell: int) -> bool:
+        """Place the side to move on `cell`; True if that completes a line."""
+        side = len(self.history) & 1
+        self.history.append(cell)
+        if self._place(side, cell, 1):
+            self.winner = side
+            return True
+        return False
+
+    def undo(self) -> None:
+        cell = self.history.pop()
+        self._place(len(self.history) & 1, cell, -1)
+        self.winner = None
+
+    def evaluate(self) -> int:
+        """Heuristic score for the side to move: open lines, weighted."""
+        return -self.score if self.to_move else self.score
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class MNKSearch:
+    """Iterative-deepening alpha-beta with a transposition table.
+
+    Each iteration searches one ply deeper than the last, trying the best
+    move found so far first and the rest in `candidate_cells` order, later
+    moves against a null window. A side that can complete a line scores the
+    win at once, a side facing one such cell must block it, and past the
+    depth limit only threats are followed; none of that costs depth, so
+    forcing sequences are read to the end. When `time_budget` runs out the
+    unfinished iteration is thrown away and the best move of the last
+    complete one is played, so a move never takes much longer than the
+    budget however large the board. A `node_budget` replaces the clock with
+    a node count, which plays the same moves on any machine. The table is
+    kept between moves of the same game.
+    """
+
+    def __init__(self,
+                 time_budget: float = SEARCH_TIME_BUDGET,
+                 node_budget: Optional[int] = None) -> None:
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        # (bits of both sides) -> (depth, score, bound type, best cell)
+        self.table: Dict[Tuple[int, int], Tuple[int, int, int, int]] = {}
+        self.deadline = 0.0
+        self.nodes = 0
+        self.depth_reached = 0
+
+    def choose_move(self, board: MNKBoard) -> int:
+        self.deadline = float('inf') if self.node_budget else \
+            time.perf_counter() + self.time_budget
+        self.nodes = 0
+        self.depth_reached = 0
+        moves = board.free_cells()
+        best = moves[0]
+        # A move that wins at once, or the only one stopping the opponent
+        for side in (board.to_move, 1 - board.to_move):
+            cells = board.winning_cells(side)
+            if cells:
+                return cells.bit_length() - 1
+        for depth in range(1, len(moves) + 1):
+            try:
+                score, cell = self._root(board, depth)
+            except SearchTimeout:
+                break
+            best = cell
+            self.depth_reached = depth
+            if abs(score) >= WIN_SCORE - board.cells:
+                break  # Forced result found; deeper search changes nothing
+        return best
+
+    def _ordered(self, board: MNKBoard, first: Optional[int],
+                 depth: int) -> List[int]:
+        # Just above the leaves ranking costs more than the cutoffs it buys
+        moves = board.candidate_cells(ranked=depth > 1)
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def _root(self, board: MNKBoard, depth: int) -> Tuple[int, int]:
+        entry = self.table.get((board.bits[0], board.bits[1]))
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_cell = -1
+        for cell in self._ordered(board, entry[3] if entry else None, depth):
+            board.play(cell)
+            try:
+                score = self._child(board, depth - 1, alpha, beta,
+                                    best_cell < 0)
+            finally:
+                board.undo()
+            if score > alpha or best_cell < 0:
+                alpha, best_cell = score, cell
+        self.table[(board.bits[0], board.bits[1])] = (depth, alpha, EXACT,
+                                                      best_cell)
+        return alpha, best_cell
+
+    def _child(self, board: MNKBoard, depth: int, alpha: int, beta: int,
+               first: bool) -> int:
+        """Score of the move just played, for the side that played it.
+
+        Moves after the first are only checked against a null window and
+        searched in full when they turn out better.
+        """
+        if first:
+            return -self._search(board, depth, -beta, -alpha)
+        score = -self._search(board, depth, -alpha - 1, -alpha)
+        if alpha < score < beta:
+            score = -self._search(board, depth, -beta, -score)
+        return score
+
+    def _threats_only(self, board: MNKBoard, alpha: int, beta: int) -> int:
+        """Past the depth limit, follow only moves that force a block.
+
+        The side to move may stop and take the heuristic score, or make a
+        threat; the opponent's reply is forced, so a winning attack of any
+        length is found without widening the search.
+        """
+        best_score = board.evaluate()
+        if best_score >= beta:
+            return best_score
+        alpha = max(alpha, best_score)
+        cells = board.threat_cells(board.to_move)
+        while cells:
+            cell = cells.bit_length() - 1
+            cells &= ~(1 << cell)
+            board.play(cell)
+            try:
+                score = -self._search(board, 0, -beta, -alpha)
+            finally:
+                board.undo()
+            if score > best_score:
+                best_score = score
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    break
+        return best_score
+
+    def _search(self, board: MNKBoard, depth: int, alpha: int,
+                beta: int) -> int:
+        self.nodes += 1
+        if not self.nodes & 1023 and (
+                time.perf_counter() > self.deadline or
+                self.node_budget and self.nodes > self.node_budget):
+            raise SearchTimeout
+        if board.winner is not None:
+            # The previous move won; sooner losses score lower
+            return -(WIN_SCORE - len(board.history))
+        if board.is_full():
+            return 0
+        side = board.to_move
+        if board.winning_cells(side):
+            return WIN_SCORE - len(board.history) - 1
+        threats = board.winning_cells(1 - side)
+        if threats & (threats - 1):
+            # Two cells win for the opponent and only one can be blocked
+            return -(WIN_SCORE - len(board.history) - 2)
+        if threats:
+            # The block is forced; play it without spending depth
+            cell = threats.bit_length() - 1
+            board.play(cell)
+            try:
+                return -self._search(board, depth, -beta, -alpha)
+            finally:
+                board.undo()
+        if depth == 0:
+            return self._threats_only(board, alpha, beta)
+
+        key = (board.bits[0], board.bits[1])
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            _, score, bound, _ = entry
+            if bound == EXACT or \
+               (bound == LOWER and score >= beta) or \
+               (bound == UPPER and score <= alpha):
+                return score
+
+        original_alpha = alpha
+        best_score, best_cell = -WIN_SCORE - 1, -1
+        for cell in self._ordered(board, entry[3] if entry else None, depth):
+            board.play(cell)
+            try:
+                score = self._child(board, depth - 1, alpha, beta,
+                                    best_cell < 0)
+            finally:
+                board.undo()
+            if score > best_score:
+                best_score, best_cell = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (depth, best_score, bound, best_cell)
+        return best_score
@@ -3,12 +3,27 @@ from discord.ui import View, Button
 import asyncio
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from modules.tttengine import (DEFAULT_DIFFICULTY, DIFFICULTIES, SIZE,
+                                MNKBoard, MNKSearch, perfect_play)
+from modules.gamestats import game_stats
+from utils.timers import timers
 
 DEFAULT_PLAYER_X = "❌"
 DEFAULT_PLAYER_O = "⭕"
 EMPTY = "‎‎‎‎‎‎‎‎‎‎‎‎‎‎‎‎‎‎"  # A zero-width space to make buttons appear empty
 COOLDOWN_TIME = 1.0  # Cooldown time in seconds
 REMATCH_TIMEOUT = 30.0  # Rematch button timeout in seconds
+INACTIVITY_TIMEOUT = 20.0  # Seconds without a move before the game ends
+MAX_BOARD_SIZE = 5  # Discord shows at most 5 rows of 5 buttons
+# Default win length per board size
+WIN_LENGTHS = {3: 3, 4: 4, 5: 4}
+SEARCH_WORKERS = 2  # Bot moves on larger boards searched at once
+
+# Bot searches get their own threads so they never hold up image rendering
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS,
+                                     thread_name_prefix='ttt-search')
 
 
 class TicTacToeButton(discord.ui.Button):
@@ -19,6 +34,7 @@ class TicTacToeButton(discord.ui.Button):
                          row=y)
         self.x = x
         self.y = y
+        self.index = y * game.size + x  # Cell number on the game's board
         self.game = game
         self.emoji = None
 
@@ -48,6 +64,7 @@ class TicTacToeButton(discord.ui.Button):
 
         self.game.last_move_time = current_time
 
+        self.game.play(self.index)
         self.emoji = self.game.current_symbol
         self.label = None
         self.style = discord.ButtonStyle.success if self.game.current_player == self.game.player1 else discord.ButtonStyle.danger
@@ -78,9 +95,8 @@ class RematchButton(discord.ui.Button):
     def __init__(self, game):
         super().__init__(style=discord.ButtonStyle.primary,
                          label="Rematch",
-                         row=3)
+                         row=game.size)
         self.game = game
-        self.timeout_task = None
 
     async def callback(self, interaction: discord.Interaction):
         if interaction.user not in [self.game.player1, self.game.player2]:
@@ -88,13 +104,14 @@ class RematchButton(discord.ui.Button):
                 "You are not part of this game!", ephemeral=True)
             return
 
-        if self.timeout_task:
-            self.timeout_task.cancel()
+        timers.cancel(self)
 
         # Create a new game with the same players
         new_game = TicTacToeGame(self.game.player1, self.game.player2,
                                  self.game.ctx, self.game.player_x.name,
-                                 self.game.player_o.name)
+                                 self.game.player_o.name,
+                                 self.game.difficulty, self.game.size,
+                                 self.game.board.k)
         new_game.message = self.game.message
 
         # Disable the rematch button for the old game
@@ -111,8 +128,7 @@ class RematchButton(discord.ui.Button):
             view=new_game.board_view)
         new_game.reset_timeout_task()
 
-    async def start_timeout(self):
-        await asyncio.sleep(REMATCH_TIMEOUT)
+    async def expire(self):
         if not self.disabled:
             self.disabled = True
             try:
@@ -123,8 +139,15 @@ class RematchButton(discord.ui.Button):
 
 class TicTacToeGame:
 
-    def __init__(self, player1: discord.Member, player2: discord.Member,
-                 ctx: discord.Interaction, player_x: str, player_o: str):
+    def __init__(self,
+                 player1: discord.Member,
+                 player2: discord.Member,
+                 ctx: discord.Interaction,
+                 player_x: str,
+                 player_o: str,
+                 difficulty: str = DEFAULT_DIFFICULTY,
+                 size: int = SIZE,
+                 win_length: Optional[int] = None):
         self.player1 = player1
         self.player2 = player2
         self.vs_bot = player2.bot
@@ -133,9 +156,15 @@ class TicTacToeGame:
         self.current_symbol = self._format_emoji(player_x or DEFAULT_PLAYER_X)
         self.player_x = self._format_emoji(player_x or DEFAULT_PLAYER_X)
         self.player_o = self._format_emoji(player_o or DEFAULT_PLAYER_O)
+        self.x_player = self.current_player  # X always moves first
+        self.difficulty = difficulty  # Only used by the bot
+        self.size = size
+        self.board = MNKBoard(size, size, win_length or WIN_LENGTHS[size])
+        # Bot search state, kept between moves; the classic board is solved
+        self.search = MNKSearch()
+        self.buttons: list[TicTacToeButton] = []
         self.board_view = self.create_board_view()
         self.ctx = ctx
-        self.timeout_task = None
         self.message = None
         self.last_move_time = 0  # Initialize last move time
 
@@ -148,78 +177,90 @@ class TicTacToeGame:
             return discord.PartialEmoji(name=emoji)
 
     def reset_timeout_task(self):
-        if self.timeout_task:
-            self.timeout_task.cancel()
-        self.timeout_task = asyncio.create_task(self.handle_timeout())
+        if not timers.touch(self):
+            timers.schedule(self, INACTIVITY_TIMEOUT, self.handle_timeout)
 
     async def handle_timeout(self):
-        await asyncio.sleep(20)
         if self.message:
             await self.clear_board("Game ended due to inactivity.")
 
     def create_board_view(self) -> View:
         view = View(timeout=None)
-        for y in range(3):  # Fixed 3x3 board
-            for x in range(3):
-                view.add_item(TicTacToeButton(x, y, self))
+        for y in range(self.size):
+            for x in range(self.size):
+                button = TicTacToeButton(x, y, self)
+                self.buttons.append(button)
+                view.add_item(button)
         return view
 
+    def play(self, index: int) -> None:
+        """Mark cell `index` for the side to move (before `switch_turn`)."""
+        self.board.play(index)
+
     def switch_turn(self):
         self.current_player = self.player2 if self.current_player == self.player1 else self.player1
         self.current_symbol = self.player_o if self.current_symbol == self.player_x else self.player_x
 
     def check_winner(self) -> discord.PartialEmoji | None:
-        winning_combinations = [
-            [(0, 0), (0, 1), (0, 2)],  # Top row
-            [(1, 0), (1, 1), (1, 2)],  # Middle row
-            [(2, 0), (2, 1), (2, 2)],  # Bottom row
-            [(0, 0), (1, 0), (2, 0)],  # Left column
-            [(0, 1), (1, 1), (2, 1)],  # Middle column
-            [(0, 2), (1, 2), (2, 2)],  # Right column
-            [(0, 0), (1, 1), (2, 2)],  # Diagonal from top-left
-            [(0, 2), (1, 1), (2, 0)]  # Diagonal from top-right
-        ]
-
-        for combo in winning_combinations:
-            symbols = [self.get_button(x, y).emoji for x, y in combo]
-            if symbols[0] is not None and all(symbol == symbols[0]
-                                              for symbol in symbols):
-                return symbols[0]  # Return the winning symbol
-
-        return None  # No winner found
+        # Only the last move can have completed a line
+        if self.board.winner is None:
+            return None  # No winner found
+        return self.player_x if self.board.winner == 0 else self.player_o
 
     def get_button(self, x: int, y: int) -> TicTacToeButton:
-        for button in self.board_view.children:
-            if isinstance(button,
-                          TicTacToeButton) and button.x == x and button.y == y:
-                return button
-        return None
+        return self.buttons[y * self.size + x]
 
     def check_draw(self) -> bool:
-        return all(button.emoji is not None
-                   for button in self.board_view.children
-                   if isinstance(button, TicTacToeButton))
+        return self.board.is_full()
+
+    @property
+    def result_row(self) -> Optional[int]:
+        """The free button row below the board, if the grid has one."""
+        return self.size if self.size < MAX_BOARD_SIZE else None
+
+    def result_text(self) -> str:
+        """The result as message content, when there is no row for buttons."""
+        if self.result_row is not None:
+            return ""
+        winning_symbol = self.check_winner()
+        if winning_symbol is None:
+            return "It's a draw!"
+        winner, loser = self.players_by_result(winning_symbol)
+        return f"{winner.mention} won! {loser.mention} lost!"
+
+    def players_by_result(
+        self, winning_symbol: discord.PartialEmoji
+    ) -> tuple[discord.Member, discord.Member]:
+        o_player = self.player2 if self.x_player == self.player1 else self.player1
+        if winning_symbol == self.player_x:
+            return self.x_player, o_player
+        return o_player, self.x_player
 
     async def show_winner(self, interaction: discord.Interaction):
         winning_symbol = self.check_winner()
         if winning_symbol:
-            winner = self.player1 if winning_symbol == self.player_x else self.player2
-            loser = self.player2 if winner == self.player1 else self.player1
+            winner, loser = self.players_by_result(winning_symbol)
             await self.end_game("win", winner=winner, loser=loser)
-            await interaction.edit_original_response(content="",
-                                                     view=self.board_view)
+            await interaction.edit_original_response(
+                content=self.result_text(), view=self.board_view)
 
     async def show_draw(self, interaction: discord.Interaction):
         await self.end_game("draw")
-        await interaction.edit_original_response(content="",
+        await interaction.edit_original_response(content=self.result_text(),
                                                  view=self.board_view)
 
     async def end_game(self,
                        result: str,
                        winner: discord.Member = None,
                        loser: discord.Member = None):
-        if self.timeout_task:
-            self.timeout_task.cancel()
+        timers.cancel(self)
+        # The view store keeps this game alive; the search table is not needed
+        self.search.table.clear()
+        for player in (self.player1, self.player2):
+            if not player.bot:
+                won = player == winner
+                game_stats.record('ttt', self.ctx.guild_id, player.id,
+                                  int(won), won)
 
         # Make all TicTacToeButtons grey and disabled
         for button in self.board_view.children:
@@ -228,26 +269,27 @@ class TicTacToeGame:
                 button.disabled = True
 
         # Remove any existing result buttons
-        if len(self.board_view.children) > 9:
-            self.board_view.remove_item(self.board_view.children[-1])
-        if len(self.board_view.children) > 9:
-            self.board_view.remove_item(self.board_view.children[-1])
+        for item in self.board_view.children[len(self.buttons):]:
+            self.board_view.remove_item(item)
+
+        if self.result_row is None:
+            return  # A full grid; the result goes in the message instead
 
         if result == "draw":
             result_button = Button(style=discord.ButtonStyle.blurple,
                                    label="It's a draw!",
                                    disabled=True,
-                                   row=3)
+                                   row=self.result_row)
             self.board_view.add_item(result_button)
         else:
             win_button = Button(style=discord.ButtonStyle.green,
                                 label=f"{winner.name} won!",
                                 disabled=True,
-                                row=3)
+                                row=self.result_row)
             lose_button = Button(style=discord.ButtonStyle.red,
                                  label=f"{loser.name} lost!",
                                  disabled=True,
-                                 row=3)
+                                 row=self.result_row)
             self.board_view.add_item(win_button)
             self.board_view.add_item(lose_button)
 
@@ -256,77 +298,48 @@ class TicTacToeGame:
         self.board_view.add_item(rematch_button)
 
         # Start the rematch button timeout
-        rematch_button.timeout_task = asyncio.create_task(
-            rematch_button.start_timeout())
+        timers.schedule(rematch_button, REMATCH_TIMEOUT, rematch_button.expire)
 
     async def bot_move(self, interaction: discord.Interaction):
-        best_score = -float('inf')
-        best_move = None
-
-        for button in self.board_view.children:
-            if isinstance(button, TicTacToeButton) and button.emoji is None:
-                button.emoji = self.current_symbol
-                score = self.minimax(0, False)
-                button.emoji = None
-                if score > best_score:
-                    best_score = score
-                    best_move = button
-
-        if best_move:
-            best_move.emoji = self.current_symbol
-            best_move.label = None
-            best_move.style = discord.ButtonStyle.danger
-            best_move.disabled = True
-
-            self.reset_timeout_task(
-            )  # Reset the inactivity timer after bot's move
-
-            winning_symbol = self.check_winner()
-            if winning_symbol:
-                await self.show_winner(interaction)
-            elif self.check_draw():
-                await self.show_draw(interaction)
-            else:
-                self.switch_turn()
-                await interaction.edit_original_response(
-                    content=f"It's {self.current_player.mention}'s turn",
-                    view=self.board_view)
+        board = self.board
+        if (self.size, board.k) == (SIZE, SIZE):
+            index = perfect_play.choose_move(board.bits[0], board.bits[1],
+                                             self.difficulty)
+        elif random.random() < DIFFICULTIES[self.difficulty]:
+            index = random.choice(board.free_cells())
+        else:
+            # Bounded by the search's time budget, and off the event loop
+            index = await asyncio.get_running_loop().run_in_executor(
+                search_executor, self.search.choose_move, board)
+        best_move = self.buttons[index]
+        self.play(index)
+        best_move.emoji = self.current_symbol
+        best_move.label = None
+        best_move.style = discord.ButtonStyle.danger
+        best_move.disabled = True
+
+        self.reset_timeout_task()  # Reset the inactivity timer after bot's move
 
-    def minimax(self, depth: int, is_maximizing: bool) -> int:
-        if self.check_winner():
-            return 1 if not is_maximizing else -1
+        winning_symbol = self.check_winner()
+        if winning_symbol:
+            await self.show_winner(interaction)
         elif self.check_draw():
-            return 0
-
-        if is_maximizing:
-            best_score = -float('inf')
-            for button in self.board_view.children:
-                if isinstance(button,
-                              TicTacToeButton) and button.emoji is None:
-                    button.emoji = self.current_symbol
-                    score = self.minimax(depth + 1, False)
-                    button.emoji = None
-                    best_score = max(score, best_score)
-            return best_score
+            await self.show_draw(interaction)
         else:
-            best_score = float('inf')
-            for button in self.board_view.children:
-                if isinstance(button,
-                              TicTacToeButton) and button.emoji is None:
-                    button.emoji = self.player_x if self.current_symbol == self.player_o else self.player_o
-                    score = self.minimax(depth + 1, True)
-                    button.emoji = None
-                    best_score = min(score, best_score)
-            return best_score
+            self.switch_turn()
+            await interaction.edit_original_response(
+                content=f"It's {self.current_player.mention}'s turn",
+                view=self.board_view)
 
     async def clear_board(self, content: str):
-        for button in self.board_view.children:
+        self.search.table.clear()
+        for button in list(self.board_view.children):
             if isinstance(button, TicTacToeButton):
                 self.board_view.remove_item(button)
 
         if self.message:
             try:
-                self.message.edit(content=content, view=self.board_view)
+                await self.message.edit(content=content, view=self.board_view)
             except discord.errors.NotFound:
                 pass
 
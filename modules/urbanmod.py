@@ -3,7 +3,7 @@ from discord import ui
 from discord import app_commands
 from urllib.parse import quote
 import re
-import aiohttp
+from utils.metrics import http_session
 
 
 class UrbanDictionarySelect(ui.Select):
@@ -105,7 +105,7 @@ async def search_urban_dictionary(
     if not current:
         return []
 
-    async with aiohttp.ClientSession() as session:
+    async with http_session() as session:
         url = f"https://api.urbandictionary.com/v0/autocomplete?term={quote(current)}"
         async with session.get(url) as response:
             if response.status == 200:
@@ -1,7 +1,9 @@
 import discord
-import pycountry
 from datetime import datetime
-import pytz
+from utils.lazy import lazy_import
+
+pycountry = lazy_import('pycountry')
+pytz = lazy_import('pytz')
 
 
 def get_country_name(country_code):
@@ -1,10 +1,10 @@
-import aiohttp
 from bs4 import BeautifulSoup
 import textwrap
 from abc import ABC, abstractmethod
 import discord
 from typing import Any, Tuple, List
 import asyncio
+from utils.metrics import http_session
 
 class CustomWikipediaAPI:
     BASE_URL = "https://en.wikipedia.org/w/api.php"
@@ -17,7 +17,7 @@ class CustomWikipediaAPI:
             "limit": 1,
             "format": "json"
         }
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(CustomWikipediaAPI.BASE_URL, params=params) as response:
                 data = await response.json()
                 return data[1][0] if data[1] else None, data[3][0] if data[3] else None
@@ -33,7 +33,7 @@ class CustomWikipediaAPI:
             "titles": title,
             "format": "json"
         }
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(CustomWikipediaAPI.BASE_URL, params=params) as response:
                 data = await response.json()
                 page = next(iter(data['query']['pages'].values()))
@@ -56,7 +56,7 @@ class CustomWikipediaAPI:
             "limit": 25,
             "format": "json"
         }
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(CustomWikipediaAPI.BASE_URL, params=params) as response:
                 data = await response.json()
                 return data[1] if data[1] else []
@@ -0,0 +1,142 @@
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_RESOLUTION = 1.0  # Seconds per wheel slot
+DEFAULT_SLOTS = 4096  # Wheel span is SLOTS * RESOLUTION (a bit over an hour)
+
+
+class ExpiringMap:
+    """Dict with per-key expiry, amortised O(1) eviction and a size ceiling.
+
+    Keys are filed in a timing wheel by expiry: a ring of slots, each
+    covering `resolution` seconds. Every operation first advances the wheel
+    to the current time and drops the expired keys of the slots it passed, so
+    the work is spread over the calls that caused it. Keys whose TTL is
+    longer than the wheel's span are re-filed when their slot comes round.
+    Once `max_entries` is reached, inserting evicts the key closest to
+    expiring, so memory stays bounded no matter how many keys are seen.
+    """
+
+    def __init__(self,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 resolution: float = DEFAULT_RESOLUTION,
+                 slots: int = DEFAULT_SLOTS,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.resolution = resolution
+        self.clock = clock
+        self.evictions = 0  # Live keys dropped to stay under max_entries
+        # key -> (value, expiry time or None for no expiry)
+        self._entries: Dict[Hashable, Tuple[Any, Optional[float]]] = {}
+        self._wheel: List[Set[Hashable]] = [set() for _ in range(slots)]
+        self._tick = self._tick_of(clock())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _tick_of(self, when: float) -> int:
+        return int(when // self.resolution)
+
+    def _file(self, key: Hashable, expires: float) -> None:
+        # One slot past the expiry tick, so the key has expired when it is
+        # reached
+        slot = (self._tick_of(expires) + 1) % len(self._wheel)
+        self._wheel[slot].add(key)
+
+    def _expire_slot(self, slot: int, now: float) -> None:
+        keys, self._wheel[slot] = self._wheel[slot], set()
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] is None:
+                continue
+            if entry[1] <= now:
+                del self._entries[key]
+            else:
+                self._file(key, entry[1])
+
+    def _advance(self, now: float) -> None:
+        tick = self._tick_of(now)
+        if tick <= self._tick:
+            return
+        slots = len(self._wheel)
+        if tick - self._tick >= slots:
+            # Idle for a whole revolution: every slot is due once
+            for slot in range(slots):
+                self._expire_slot(slot, now)
+        else:
+            for passed in range(self._tick + 1, tick + 1):
+                self._expire_slot(passed % slots, now)
+        self._tick = tick
+
+    def _live(self, key: Hashable,
+              now: float) -> Optional[Tuple[Any, Optional[float]]]:
+        self._advance(now)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            # Expired within the current tick; its slot has not come up yet
+            del self._entries[key]
+            return None
+        return entry
+
+    def _evict_one(self) -> None:
+        slots = len(self._wheel)
+        for offset in range(1, slots + 1):
+            bucket = self._wheel[(self._tick + offset) % slots]
+            while bucket:
+                key = bucket.pop()
+                if self._entries.pop(key, None) is not None:
+                    self.evictions += 1
+                    return
+        # Only keys without expiry are left
+        del self._entries[next(iter(self._entries))]
+        self.evictions += 1
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float],
+               now: float) -> None:
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            self._evict_one()
+        expires = now + ttl if ttl is not None else None
+        self._entries[key] = (value, expires)
+        if expires is not None:
+            self._file(key, expires)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._live(key, self.clock())
+        return entry[0] if entry is not None else default
+
+    def set(self, key: Hashable, value: Any,
+            ttl: Optional[float] = None) -> None:
+        now = self.clock()
+        self._advance(now)
+        self._store(key, value, ttl, now)
+
+    def set_if_absent(self, key: Hashable, value: Any, ttl: float) -> bool:
+        """Set `key` unless a live entry exists; True if it was set."""
+        now = self.clock()
+        if self._live(key, now) is not None:
+            return False
+        self._store(key, value, ttl, now)
+        return True
+
+    def incr(self, key: Hashable, ttl: float) -> int:
+        """Count hits in a window of `ttl` seconds starting at the first one."""
+        now = self.clock()
+        entry = self._live(key, now)
+        if entry is None:
+            self._store(key, 1, ttl, now)
+            return 1
+        self._entries[key] = (entry[0] + 1, entry[1])
+        return entry[0] + 1
+
+    def remaining(self, key: Hashable) -> float:
+        """Seconds until `key` expires; 0 if it is missing."""
+        now = self.clock()
+        entry = self._live(key, now)
+        if entry is None or entry[1] is None:
+            return 0.0
+        return entry[1] - now
+
+    def delete(self, key: Hashable) -> None:
+        # Its wheel slot skips the key once the entry is gone
+        self._entries.pop(key, None)
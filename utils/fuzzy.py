@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+DEFAULT_MAX_DISTANCE = 2  # Edits covered by the precomputed deletions
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Edits (insert, delete, substitute, swap adjacent) from `a` to `b`.
+
+    Optimal string alignment distance; returns `limit + 1` as soon as the
+    distance is known to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1,
+                        previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[
+                    j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current.append(value)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def deletions(term: str, max_distance: int) -> Set[str]:
+    """`term` and every string made by deleting up to `max_distance` characters."""
+    variants = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        frontier = {
+            word[:index] + word[index + 1:]
+            for word in frontier for index in range(len(word))
+        }
+        variants |= frontier
+    return variants
+
+
+class FuzzyIndex:
+    """Nearest-match lookups by edit distance (symmetric delete, as in SymSpell).
+
+    Two strings within `d` edits (a swap of adjacent characters counts as
+    one) share a string reachable from both by at most `d` deletions, so
+    every term is filed under all of its deletions up front. A query then
+    generates its own deletions, collects the terms filed under them and
+    checks only those with a bounded edit distance, instead of comparing
+    against every term.
+    """
+
+    def __init__(self,
+                 terms: Iterable[str] = (),
+                 max_distance: int = DEFAULT_MAX_DISTANCE) -> None:
+        self.max_distance = max_distance
+        self.terms: Set[str] = set()
+        self.deletes: Dict[str, Set[str]] = {}
+        for term in terms:
+            self.add(term)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def add(self, term: str) -> None:
+        if term in self.terms:
+            return
+        self.terms.add(term)
+        for variant in deletions(term, self.max_distance):
+            self.deletes.setdefault(variant, set()).add(term)
+
+    def search(self, query: str, max_distance: int) -> List[Tuple[int, str]]:
+        """(distance, term) for every term within `max_distance`, closest first."""
+        max_distance = min(max_distance, self.max_distance)
+        candidates: Set[str] = set()
+        for variant in deletions(query, max_distance):
+            candidates.update(self.deletes.get(variant, ()))
+        matches = []
+        for term in candidates:
+            distance = edit_distance(query, term, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, term))
+        matches.sort()
+        return matches
@@ -0,0 +1,129 @@
+import importlib.abc
+import importlib.util
+import sys
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return `name` as a module that is only executed on first attribute access.
+
+    Heavy optional dependencies (requests, pycountry, pytz, ...) are
+    imported through this so that loading a cog does not pay for features
+    nobody has used yet. Parent packages are still imported eagerly.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class _TimedLoader:
+    """Delegating loader that reports how long `exec_module` took."""
+
+    def __init__(self, loader: Any, fullname: str,
+                 profiler: 'ImportProfiler') -> None:
+        self._loader = loader
+        self._fullname = fullname
+        self._profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Optional[ModuleType]:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        self._profiler._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(self._fullname, time.perf_counter() - start)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+
+    def __init__(self, profiler: 'ImportProfiler') -> None:
+        self.profiler = profiler
+
+    def find_spec(self, fullname: str, path: Any, target: Any = None) -> Any:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader,
+                                                       'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, fullname,
+                                               self.profiler)
+                return spec
+        return None
+
+
+class ImportProfiler:
+    """Per-module import timings in the spirit of `python -X importtime`.
+
+    While `profile()` is active, every module imported for the first time is
+    timed; self time excludes the nested imports it triggered. The finder
+    wraps loaders, so it is opt-in and only installed around cog imports.
+    """
+
+    def __init__(self) -> None:
+        # owner -> [(module, self seconds, cumulative seconds)]
+        self.reports: Dict[str, List[Tuple[str, float, float]]] = {}
+        self._current: Optional[List[Tuple[str, float, float]]] = None
+        self._children: List[float] = []
+
+    @contextmanager
+    def profile(self, owner: str) -> Iterator[None]:
+        finder = _TimingFinder(self)
+        self._current = self.reports.setdefault(owner, [])
+        sys.meta_path.insert(0, finder)
+        try:
+            yield
+        finally:
+            sys.meta_path.remove(finder)
+            self._current = None
+
+    def _enter(self) -> None:
+        self._children.append(0.0)
+
+    def _exit(self, fullname: str, elapsed: float) -> None:
+        nested = self._children.pop()
+        if self._children:
+            self._children[-1] += elapsed
+        if self._current is not None:
+            self._current.append((fullname, elapsed - nested, elapsed))
+
+    def heaviest(self, owner: str,
+                 limit: int = 5) -> List[Tuple[str, float, float]]:
+        """The modules with the largest cumulative import time for `owner`."""
+        return sorted(self.reports.get(owner, ()),
+                      key=lambda row: row[2],
+                      reverse=True)[:limit]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the process in MiB, where available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# Instantiate a global import profiler
+import_profiler: ImportProfiler = ImportProfiler()
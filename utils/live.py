@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+import discord
+from loguru import logger
+
+from utils.metrics import LIVE_EDITS, LIVE_FRAMES_DROPPED
+from utils.ratelimit import SlidingWindowLimiter
+
+EDIT_BURST = 5  # Edits Discord allows per message per window
+EDIT_WINDOW = 5.0  # Seconds
+
+
+class LiveMessage:
+    """A message that always converges on the latest state without throttling.
+
+    `update` records the desired edit and returns at once. At most one edit
+    is in flight, and at most `burst` are sent per `window` seconds. Updates
+    that arrive while an edit is waiting are merged into it, later fields
+    winning, so intermediate frames are dropped rather than queued;
+    `dropped_frames` counts them. `close` drops whatever is still pending and
+    waits for the edit in flight, so a final edit sent afterwards is never
+    overwritten by a stale frame.
+    """
+
+    def __init__(self,
+                 message: discord.Message,
+                 burst: int = EDIT_BURST,
+                 window: float = EDIT_WINDOW) -> None:
+        self.message = message
+        self.dropped_frames = 0
+        self.closed = False
+        self.pending: Dict[str, Any] = {}
+        self.budget = SlidingWindowLimiter(burst, window)
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, **fields: Any) -> None:
+        """Queue an edit with `fields` (as for `Message.edit`)."""
+        if self.closed:
+            return
+        if self.pending:
+            self.dropped_frames += 1
+            LIVE_FRAMES_DROPPED.labels().inc()
+        self.pending.update(fields)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    async def settle(self) -> None:
+        """Wait until every queued edit has been sent."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def close(self) -> None:
+        self.closed = True
+        self.pending.clear()
+        await self.settle()
+
+    async def _flush(self) -> None:
+        while self.pending:
+            await self.budget.acquire()
+            if not self.pending:
+                return  # Closed while waiting
+            fields, self.pending = self.pending, {}
+            try:
+                self.message = await self.message.edit(**fields)
+                LIVE_EDITS.labels().inc()
+            except discord.NotFound:
+                self.closed = True
+                self.pending.clear()
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to edit live message: {e}")
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Dict, Iterable
+
+import discord
+
+QUERY_BATCH = 100  # Discord caps user_ids per member request
+
+_chunk_locks: Dict[int, asyncio.Lock] = {}
+
+
+async def ensure_chunked(guild: discord.Guild) -> None:
+    """Request the full member list of `guild` once, the first time it is needed.
+
+    Guilds are not chunked at startup, so anything reading `guild.members` or
+    `role.members` calls this first.
+    """
+    if guild.chunked:
+        return
+    lock = _chunk_locks.setdefault(guild.id, asyncio.Lock())
+    async with lock:
+        if not guild.chunked:
+            await guild.chunk(cache=True)
+    _chunk_locks.pop(guild.id, None)
+
+
+async def resolve_members(guild: discord.Guild,
+                          user_ids: Iterable[int]) -> Dict[int, discord.Member]:
+    """Members for `user_ids`, fetching only the ones missing from the cache."""
+    members: Dict[int, discord.Member] = {}
+    missing = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member is not None:
+            members[user_id] = member
+        else:
+            missing.append(user_id)
+    for start in range(0, len(missing), QUERY_BATCH):
+        for member in await guild.query_members(
+                user_ids=missing[start:start + QUERY_BATCH], cache=True):
+            members[member.id] = member
+    return members
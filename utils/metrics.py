@@ -0,0 +1,373 @@
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import (Any, Callable, Dict, Iterator, List, Optional, Sequence,
+                    Tuple)
+
+import aiohttp
+from loguru import logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                    1.0)
+LOOP_LAG_INTERVAL = 0.5  # Seconds between event loop lag samples
+
+LabelValues = Tuple[str, ...]
+
+
+class CounterValue:
+    __slots__ = ('value', )
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class GaugeValue:
+    __slots__ = ('value', )
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class HistogramValue:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'max')
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the wall time spent inside the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= target:
+                return lower + (bound - lower) * (target - seen) / count
+            seen += count
+            lower = bound
+        return min(self.max, self.buckets[-1]) if self.buckets else self.max
+
+
+class Metric:
+    """A named metric family whose children are keyed by label values."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, Any] = {}
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def children(self) -> List[Tuple[LabelValues, Any]]:
+        return list(self._children.items())
+
+    def clear(self) -> None:
+        self._children.clear()
+
+    def _label_string(self, values: LabelValues, extra: str = '') -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.labelnames, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in self._children.items():
+            lines.append(
+                f"{self.name}{self._label_string(values)} {child.value}")
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_child(self) -> GaugeValue:
+        return GaugeValue()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> Any:
+        return self.labels().time()
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                le = self._label_string(values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = self._label_string(values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {child.count}")
+            labels = self._label_string(values)
+            lines.append(f"{self.name}_sum{labels} {child.sum}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+
+
+class MetricsRegistry:
+    """Holds every metric family and renders them in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: Metric) -> Any:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str,
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self,
+                  name: str,
+                  documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(
+            Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before rendering."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector failed")
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            metric.render(lines)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n',
+                                               '\\n').replace('"', '\\"')
+
+
+# Instantiate a global metrics registry
+registry: MetricsRegistry = MetricsRegistry()
+
+LOOP_LAG = registry.histogram(
+    'nira_event_loop_lag_seconds',
+    'How late the event loop ran a scheduled wakeup',
+    buckets=LOOP_LAG_BUCKETS)
+COMMAND_LATENCY = registry.histogram(
+    'nira_command_duration_seconds', 'Time spent running a command',
+    ('command', 'type'))
+LISTENER_LATENCY = registry.histogram(
+    'nira_listener_duration_seconds', 'Time spent in an event listener',
+    ('event', 'listener'))
+DB_QUERY_LATENCY = registry.histogram(
+    'nira_db_query_duration_seconds', 'Database query round-trip time',
+    ('operation', ))
+HTTP_REQUEST_LATENCY = registry.histogram(
+    'nira_http_request_duration_seconds', 'Outbound HTTP request time',
+    ('host', ))
+HTTP_REQUEST_ERRORS = registry.counter(
+    'nira_http_request_errors_total', 'Outbound HTTP requests that raised',
+    ('host', ))
+RENDER_QUEUE_DEPTH = registry.gauge(
+    'nira_render_queue_depth', 'Render jobs waiting for a free worker')
+RENDER_IN_FLIGHT = registry.gauge('nira_render_in_flight',
+                                  'Render jobs submitted and not finished')
+RENDER_LATENCY = registry.histogram(
+    'nira_render_duration_seconds',
+    'Render job time including time spent queued', ('job', ))
+STATE_KEYS = registry.gauge('nira_state_keys',
+                            'Keys held by the in-memory state backend')
+STATE_EVICTIONS = registry.counter(
+    'nira_state_evictions_total',
+    'Live state keys evicted to stay under the cap')
+SHARD_LATENCY = registry.gauge('nira_shard_latency_seconds',
+                               'Gateway heartbeat latency per shard',
+                               ('shard', ))
+SHARD_GUILDS = registry.gauge('nira_shard_guilds', 'Guilds served per shard',
+                              ('shard', ))
+SHARD_EVENTS = registry.counter('nira_shard_gateway_events_total',
+                                'Gateway events received per shard',
+                                ('shard', ))
+OUTBOX_DEPTH = registry.gauge('nira_outbox_depth',
+                              'Messages queued to send per channel',
+                              ('channel', ))
+OUTBOX_SENT = registry.counter('nira_outbox_sends_total',
+                               'Messages sent from the outbox')
+OUTBOX_MERGED = registry.counter(
+    'nira_outbox_merged_total',
+    'Queued messages merged into another send instead of sent alone')
+LIVE_EDITS = registry.counter('nira_live_message_edits_total',
+                              'Edits sent for live game messages')
+LIVE_FRAMES_DROPPED = registry.counter(
+    'nira_live_message_frames_dropped_total',
+    'Live message states replaced by a newer one before being sent')
+ERROR_REPORTS_SKIPPED = registry.counter(
+    'nira_error_reports_skipped_total',
+    'Command errors not reported individually', ('reason', ))
+GAME_RESULTS_BUFFERED = registry.gauge(
+    'nira_game_results_buffered', 'Game results waiting to be written')
+GAME_RESULTS_DROPPED = registry.counter(
+    'nira_game_results_dropped_total',
+    'Game results discarded because the buffer was full')
+
+
+class LoopLagMonitor:
+    """Samples event loop lag by timing a short, repeated sleep."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL) -> None:
+        self.interval = interval
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - expected)
+            LOOP_LAG.observe(self.last_lag)
+
+
+# Instantiate a global loop lag monitor
+loop_monitor: LoopLagMonitor = LoopLagMonitor()
+
+
+def _http_trace_config() -> aiohttp.TraceConfig:
+
+    async def on_request_start(session: aiohttp.ClientSession, context: Any,
+                               params: aiohttp.TraceRequestStartParams) -> None:
+        context.start = time.perf_counter()
+
+    async def on_request_end(session: aiohttp.ClientSession, context: Any,
+                             params: aiohttp.TraceRequestEndParams) -> None:
+        HTTP_REQUEST_LATENCY.labels(params.url.host or '').observe(
+            time.perf_counter() - context.start)
+
+    async def on_request_exception(
+            session: aiohttp.ClientSession, context: Any,
+            params: aiohttp.TraceRequestExceptionParams) -> None:
+        host = params.url.host or ''
+        HTTP_REQUEST_LATENCY.labels(host).observe(time.perf_counter() -
+                                                  context.start)
+        HTTP_REQUEST_ERRORS.labels(host).inc()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+def http_session(**kwargs: Any) -> aiohttp.ClientSession:
+    """Create an aiohttp session that records per-host request timings."""
+    trace_configs = list(kwargs.pop('trace_configs', None) or [])
+    trace_configs.append(_http_trace_config())
+    return aiohttp.ClientSession(trace_configs=trace_configs, **kwargs)
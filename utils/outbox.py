@@ -0,0 +1,162 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+
+import discord
+from loguru import logger
+
+from utils.metrics import (OUTBOX_DEPTH, OUTBOX_MERGED, OUTBOX_SENT,
+                           registry)
+from utils.ratelimit import SlidingWindowLimiter
+
+CHANNEL_BURST = 5  # Messages Discord allows per channel per window
+CHANNEL_WINDOW = 5.0  # Seconds
+MAX_CONTENT = 2000  # Discord's message length limit
+MAX_EMBEDS = 10  # Embeds per message
+MAX_FILES = 10  # Attachments per message
+
+
+class OutgoingMessage:
+    __slots__ = ('content', 'embeds', 'files', 'mergeable', 'future')
+
+    def __init__(self, content: Optional[str], embeds: List[discord.Embed],
+                 files: List[discord.File], mergeable: bool,
+                 future: asyncio.Future) -> None:
+        self.content = content
+        self.embeds = embeds
+        self.files = files
+        self.mergeable = mergeable
+        self.future = future
+
+
+class ChannelOutbox:
+    """Queued messages for one channel and the task that sends them."""
+
+    def __init__(self, channel: discord.abc.Messageable) -> None:
+        self.channel = channel
+        self.pending: Deque[OutgoingMessage] = deque()
+        self.budget = SlidingWindowLimiter(CHANNEL_BURST, CHANNEL_WINDOW)
+        self.task: Optional[asyncio.Task] = None
+
+    def take_batch(self) -> List[OutgoingMessage]:
+        """The next message plus any queued after it that fit beside it."""
+        first = self.pending.popleft()
+        batch = [first]
+        if not first.mergeable:
+            return batch
+        length = len(first.content or '')
+        embeds, files = len(first.embeds), len(first.files)
+        while self.pending and self.pending[0].mergeable:
+            following = self.pending[0]
+            # +1 for the newline joining the two contents
+            added = len(following.content or '') + (1 if length else 0)
+            if length + added > MAX_CONTENT or \
+               embeds + len(following.embeds) > MAX_EMBEDS or \
+               files + len(following.files) > MAX_FILES:
+                break
+            batch.append(self.pending.popleft())
+            length += added
+            embeds += len(following.embeds)
+            files += len(following.files)
+        return batch
+
+
+class Outbox:
+    """Per-channel send queues that pace and merge outgoing messages.
+
+    Each channel gets its own queue and a task that sends at most
+    CHANNEL_BURST messages per CHANNEL_WINDOW, so bursts wait here instead
+    of in discord.py's rate limiter. Messages queued while a channel is
+    waiting are merged into one send (contents joined by newlines, embeds
+    and files combined) as long as Discord's per-message limits allow.
+    Messages that must stay separate, e.g. ones that get pinned, are sent
+    with `mergeable=False` and only paced.
+    """
+
+    def __init__(self) -> None:
+        self.channels: Dict[int, ChannelOutbox] = {}
+        registry.register_collector(self.collect_metrics)
+
+    def collect_metrics(self) -> None:
+        OUTBOX_DEPTH.clear()
+        for channel_id, outbox in self.channels.items():
+            OUTBOX_DEPTH.labels(channel_id).set(len(outbox.pending))
+
+    def depth(self, channel_id: int) -> int:
+        outbox = self.channels.get(channel_id)
+        return len(outbox.pending) if outbox else 0
+
+    async def send(self,
+                   channel: discord.abc.Messageable,
+                   content: Optional[str] = None,
+                   *,
+                   embed: Optional[discord.Embed] = None,
+                   embeds: Sequence[discord.Embed] = (),
+                   file: Optional[discord.File] = None,
+                   files: Sequence[discord.File] = (),
+                   mergeable: bool = True) -> discord.Message:
+        """Queue a message for `channel` and return the message it went out in.
+
+        Merged messages all resolve to the same `discord.Message`. Send
+        errors are raised to every caller whose message was in the batch.
+        """
+        message = OutgoingMessage(
+            content, [*([embed] if embed else []), *embeds],
+            [*([file] if file else []), *files], mergeable,
+            asyncio.get_running_loop().create_future())
+        outbox = self.channels.get(channel.id)
+        if outbox is None:
+            outbox = self.channels[channel.id] = ChannelOutbox(channel)
+        outbox.pending.append(message)
+        if outbox.task is None or outbox.task.done():
+            outbox.task = asyncio.create_task(self._drain(channel.id, outbox))
+        return await message.future
+
+    async def _drain(self, channel_id: int, outbox: ChannelOutbox) -> None:
+        try:
+            while outbox.pending:
+                await outbox.budget.acquire()
+                batch = outbox.take_batch()
+                await self._send_batch(outbox.channel, batch)
+        finally:
+            for message in outbox.pending:
+                if not message.future.done():
+                    message.future.cancel()
+            outbox.pending.clear()
+            # Keep the send history until it no longer limits a new burst
+            asyncio.get_running_loop().call_later(CHANNEL_WINDOW,
+                                                  self._forget, channel_id,
+                                                  outbox)
+
+    def _forget(self, channel_id: int, outbox: ChannelOutbox) -> None:
+        if outbox.task.done() and self.channels.get(channel_id) is outbox:
+            del self.channels[channel_id]
+
+    @staticmethod
+    async def _send_batch(channel: discord.abc.Messageable,
+                          batch: List[OutgoingMessage]) -> None:
+        content = '\n'.join(message.content for message in batch
+                            if message.content)
+        try:
+            sent = await channel.send(
+                content=content or None,
+                embeds=[embed for message in batch for embed in message.embeds],
+                files=[file for message in batch for file in message.files])
+        except Exception as e:
+            logger.warning(
+                f"Failed to send {len(batch)} queued message(s) to {channel}: {e}"
+            )
+            for message in batch:
+                if not message.future.done():
+                    message.future.set_exception(e)
+            return
+        OUTBOX_SENT.labels().inc()
+        if len(batch) > 1:
+            OUTBOX_MERGED.labels().inc(len(batch) - 1)
+        for message in batch:
+            if not message.future.done():
+                message.future.set_result(sent)
+
+
+# Instantiate a global outbox
+outbox: Outbox = Outbox()
@@ -0,0 +1,27 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque
+
+
+class SlidingWindowLimiter:
+    """Allows at most `limit` calls per `window` seconds.
+
+    `acquire` returns at once while the last `window` seconds hold fewer
+    than `limit` calls, and otherwise sleeps until the oldest one leaves the
+    window. Meant for a single consumer, e.g. one send loop.
+    """
+
+    def __init__(self, limit: int, window: float) -> None:
+        self.limit = limit
+        self.window = window
+        self.calls: Deque[float] = deque()  # Call times inside the window
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        while self.calls and self.calls[0] <= now - self.window:
+            self.calls.popleft()
+        if len(self.calls) >= self.limit:
+            await asyncio.sleep(self.calls[0] + self.window - now)
+            self.calls.popleft()
+        self.calls.append(time.monotonic())
@@ -0,0 +1,47 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from utils.metrics import RENDER_IN_FLIGHT, RENDER_LATENCY, RENDER_QUEUE_DEPTH
+
+RENDER_WORKERS = 2  # Threads available for image rendering
+
+T = TypeVar('T')
+
+
+class RenderPool:
+    """Thread pool for Pillow work that would otherwise block the event loop."""
+
+    def __init__(self, workers: int = RENDER_WORKERS) -> None:
+        self.workers = workers
+        self.in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='render')
+
+    async def run(self, func: Callable[..., T], *args: Any,
+                  **kwargs: Any) -> T:
+        """Run `func` on a render thread and return its result."""
+        loop = asyncio.get_running_loop()
+        self._track(1)
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            self._track(-1)
+            RENDER_LATENCY.labels(func.__name__).observe(time.perf_counter() -
+                                                         start)
+
+    def _track(self, delta: int) -> None:
+        self.in_flight += delta
+        RENDER_IN_FLIGHT.set(self.in_flight)
+        RENDER_QUEUE_DEPTH.set(max(0, self.in_flight - self.workers))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Instantiate a global render pool
+render_pool: RenderPool = RenderPool()
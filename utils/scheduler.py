@@ -0,0 +1,187 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+from loguru import logger
+
+from database import db, Database
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+LEASE_SECONDS = 120  # How long a claimed job is hidden from other workers
+MAX_ATTEMPTS = 5  # Attempts before a failing job is dropped
+RETRY_BASE_SECONDS = 30  # Backoff base for failed jobs (doubles per attempt)
+BATCH_SIZE = 25  # Due jobs claimed per wakeup
+MAX_SLEEP_SECONDS = 300  # Re-check the table at least this often
+ERROR_SLEEP_SECONDS = 5  # Pause after an unexpected error in the loop
+
+# Jobs whose payload has a guild_id are only claimed by the worker running
+# that guild's shard: (guild_id >> 22) % shard_count, as Discord assigns them
+SHARD_FILTER = """
+    ($1::int IS NULL OR NOT payload ? 'guild_id'
+     OR ((payload->>'guild_id')::bigint >> 22) % $1 = ANY($2::int[]))
+"""
+
+
+class JobScheduler:
+    """Persistent delayed jobs backed by the `scheduled_jobs` table.
+
+    Jobs live in Postgres, not in memory: a single loop asks the table for the
+    next due time, sleeps until then (or until a new job is scheduled), claims
+    the due rows with a lease and hands each payload to the handler registered
+    for its job type. A job is deleted only after its handler returns, so a
+    crash or restart re-delivers it (at-least-once); handlers must tolerate
+    running twice.
+    """
+
+    def __init__(self, database: Database = db) -> None:
+        self.db = database
+        self.handlers: Dict[str, JobHandler] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # (shard_count, shard_ids) when this process runs only some shards
+        self.shard_count: Optional[int] = None
+        self.shard_ids: Optional[List[int]] = None
+
+    def set_shards(self, shard_count: int, shard_ids: List[int]) -> None:
+        """Restrict guild jobs to the shards this worker runs."""
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+        self._wakeup.set()
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """Register the coroutine that runs jobs of `job_type`."""
+        self.handlers[job_type] = handler
+        self._wakeup.set()
+
+    def unregister(self, job_type: str) -> None:
+        self.handlers.pop(job_type, None)
+
+    async def start(self) -> None:
+        """Create the jobs table and start the dispatch loop."""
+        if self._task is not None:
+            return
+        if self.db.pool is None:
+            await self.db.initialize()
+        await self.db.execute("""
+            CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                id BIGSERIAL PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                run_at TIMESTAMPTZ NOT NULL,
+                payload JSONB NOT NULL DEFAULT '{}',
+                attempts INT NOT NULL DEFAULT 0,
+                locked_until TIMESTAMPTZ
+            );
+        """)
+        await self.db.execute(
+            "CREATE INDEX IF NOT EXISTS scheduled_jobs_run_at_idx "
+            "ON scheduled_jobs (run_at);")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def schedule(self, job_type: str, run_at: datetime,
+                       payload: Dict[str, Any]) -> int:
+        """Persist a job to run at `run_at` (an aware datetime)."""
+        rows = await self.db.fetch(
+            "INSERT INTO scheduled_jobs (job_type, run_at, payload) "
+            "VALUES ($1, $2, $3::jsonb) RETURNING id;", job_type, run_at,
+            json.dumps(payload))
+        self._wakeup.set()
+        return rows[0]['id']
+
+    async def cancel(self, job_id: int) -> None:
+        await self.db.execute("DELETE FROM scheduled_jobs WHERE id = $1;",
+                              job_id)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self._wakeup.clear()
+                delay = await self._next_delay()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(),
+                                               timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job scheduler loop failed")
+                await asyncio.sleep(ERROR_SLEEP_SECONDS)
+
+    async def _next_delay(self) -> float:
+        """Seconds until the next job becomes claimable."""
+        rows = await self.db.fetch(
+            """
+            SELECT EXTRACT(EPOCH FROM MIN(GREATEST(run_at,
+                   COALESCE(locked_until, run_at))) - now()) AS delay
+            FROM scheduled_jobs
+            WHERE """ + SHARD_FILTER + ";", self.shard_count, self.shard_ids)
+        delay = rows[0]['delay']
+        if delay is None:
+            return MAX_SLEEP_SECONDS
+        return min(float(delay), MAX_SLEEP_SECONDS)
+
+    async def _run_due(self) -> None:
+        jobs = await self.db.fetch(
+            """
+            UPDATE scheduled_jobs
+            SET locked_until = now() + make_interval(secs => $3),
+                attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM scheduled_jobs
+                WHERE run_at <= now()
+                  AND (locked_until IS NULL OR locked_until <= now())
+                  AND """ + SHARD_FILTER + """
+                ORDER BY run_at
+                LIMIT $4
+                FOR UPDATE SKIP LOCKED)
+            RETURNING id, job_type, payload, attempts;
+            """, self.shard_count, self.shard_ids, float(LEASE_SECONDS),
+            BATCH_SIZE)
+        await asyncio.gather(*(self._dispatch(job) for job in jobs))
+
+    async def _dispatch(self, job: asyncpg.Record) -> None:
+        handler = self.handlers.get(job['job_type'])
+        try:
+            if handler is None:
+                raise LookupError(
+                    f"No handler registered for job type {job['job_type']!r}")
+            await handler(json.loads(job['payload']))
+        except Exception as e:
+            await self._retry_or_drop(job, e)
+        else:
+            await self.cancel(job['id'])
+
+    async def _retry_or_drop(self, job: asyncpg.Record,
+                             error: Exception) -> None:
+        if job['attempts'] >= MAX_ATTEMPTS:
+            logger.error(
+                f"Dropping job {job['id']} ({job['job_type']}) after "
+                f"{job['attempts']} attempts: {error}")
+            await self.cancel(job['id'])
+            return
+        delay = RETRY_BASE_SECONDS * 2**(job['attempts'] - 1)
+        logger.warning(f"Job {job['id']} ({job['job_type']}) failed, "
+                       f"retrying in {delay}s: {error}")
+        await self.db.execute(
+            "UPDATE scheduled_jobs SET run_at = now() + make_interval(secs => $2), "
+            "locked_until = NULL WHERE id = $1;", job['id'], float(delay))
+
+
+# Instantiate a global scheduler object
+scheduler: JobScheduler = JobScheduler()
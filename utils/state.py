@@ -0,0 +1,250 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+from loguru import logger
+
+import config
+from database import db
+from utils.expiring import ExpiringMap
+from utils.metrics import STATE_EVICTIONS, STATE_KEYS, registry
+
+INVALIDATION_CHANNEL = 'nira_invalidate'  # Postgres NOTIFY channel
+RECONNECT_SECONDS = 5  # Pause before re-opening a dropped LISTEN connection
+
+# Called with the invalidated key, or None when every key may be stale
+InvalidationHandler = Callable[[Optional[str]], Awaitable[None]]
+
+
+class StateBackend(ABC):
+    """Key/value store for state that every worker process has to agree on.
+
+    Cooldowns and rate limits live here instead of in cog dicts so a cluster
+    of workers enforces them once, and every key expires on its own. Values
+    must be JSON serialisable; `ttl` is in seconds.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any,
+                  ttl: Optional[float] = None) -> None:
+        pass
+
+    @abstractmethod
+    async def set_if_absent(self, key: str, value: Any, ttl: float) -> bool:
+        """Atomically set `key` unless it exists; True if it was set."""
+
+    @abstractmethod
+    async def incr(self, key: str, ttl: float) -> int:
+        """Increment a counter whose window of `ttl` starts at the first hit."""
+
+    @abstractmethod
+    async def remaining(self, key: str) -> float:
+        """Seconds until `key` expires; 0 if it is missing."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """Single process backend; the default when no Redis is configured."""
+
+    def __init__(self, max_keys: int = config.STATE_MAX_KEYS) -> None:
+        self._data = ExpiringMap(max_entries=max_keys)
+        self._reported_evictions = 0
+        registry.register_collector(self.collect_metrics)
+
+    def collect_metrics(self) -> None:
+        STATE_KEYS.labels().set(len(self._data))
+        evictions = self._data.evictions
+        STATE_EVICTIONS.labels().inc(evictions - self._reported_evictions)
+        self._reported_evictions = evictions
+
+    async def get(self, key: str) -> Any:
+        return self._data.get(key)
+
+    async def set(self, key: str, value: Any,
+                  ttl: Optional[float] = None) -> None:
+        self._data.set(key, value, ttl)
+
+    async def set_if_absent(self, key: str, value: Any, ttl: float) -> bool:
+        return self._data.set_if_absent(key, value, ttl)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        return self._data.incr(key, ttl)
+
+    async def remaining(self, key: str) -> float:
+        return self._data.remaining(key)
+
+    async def delete(self, key: str) -> None:
+        self._data.delete(key)
+
+
+class RedisBackend(StateBackend):
+    """Backend for a Redis-compatible server shared by all workers."""
+
+    # INCR and start the window in one round trip, atomically
+    _INCR_SCRIPT = ("local value = redis.call('INCR', KEYS[1]) "
+                    "if value == 1 then redis.call('PEXPIRE', KEYS[1], ARGV[1]) end "
+                    "return value")
+
+    def __init__(self, url: str, prefix: str = 'nira:') -> None:
+        # Optional dependency: only needed when NIRA_STATE_BACKEND=redis
+        from redis import asyncio as redis_asyncio
+        self._client = redis_asyncio.from_url(url, decode_responses=True)
+        self._prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return self._prefix + key
+
+    async def get(self, key: str) -> Any:
+        value = await self._client.get(self._key(key))
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any,
+                  ttl: Optional[float] = None) -> None:
+        await self._client.set(self._key(key),
+                               json.dumps(value),
+                               px=int(ttl * 1000) if ttl is not None else None)
+
+    async def set_if_absent(self, key: str, value: Any, ttl: float) -> bool:
+        return bool(await self._client.set(self._key(key),
+                                           json.dumps(value),
+                                           px=max(int(ttl * 1000), 1),
+                                           nx=True))
+
+    async def incr(self, key: str, ttl: float) -> int:
+        return int(await self._client.eval(self._INCR_SCRIPT, 1,
+                                           self._key(key),
+                                           max(int(ttl * 1000), 1)))
+
+    async def remaining(self, key: str) -> float:
+        milliseconds = await self._client.pttl(self._key(key))
+        return max(milliseconds, 0) / 1000
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self._key(key))
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_backend(kind: str = config.STATE_BACKEND,
+                   redis_url: str = config.REDIS_URL) -> StateBackend:
+    if kind == 'memory':
+        return MemoryBackend()
+    if kind == 'redis':
+        return RedisBackend(redis_url)
+    raise ValueError(f"Unknown NIRA_STATE_BACKEND: {kind!r}")
+
+
+class InvalidationBus:
+    """Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+    Cogs keep read-mostly tables (settings, reaction roles) cached in memory.
+    After writing to Postgres they `publish` the namespace and key, and every
+    other worker's handlers for that namespace reload it. Notifications are
+    not queued while a listener is disconnected, so after a reconnect every
+    handler is called with None to reload everything.
+    """
+
+    def __init__(self, origin: str = config.WORKER_ID) -> None:
+        self.origin = origin
+        self.handlers: Dict[str, List[InvalidationHandler]] = {}
+        self._dsn: Optional[str] = None
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def subscribe(self, namespace: str, handler: InvalidationHandler) -> None:
+        self.handlers.setdefault(namespace, []).append(handler)
+
+    def unsubscribe(self, namespace: str,
+                    handler: InvalidationHandler) -> None:
+        handlers = self.handlers.get(namespace, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    async def start(self, dsn: str) -> None:
+        self._dsn = dsn
+        self._closing = False
+        await self._connect()
+
+    async def _connect(self) -> None:
+        self._conn = await asyncpg.connect(self._dsn)
+        await self._conn.add_listener(INVALIDATION_CHANNEL, self._on_notify)
+        self._conn.add_termination_listener(self._on_terminated)
+        logger.info(f"Listening for cache invalidations as {self.origin}")
+
+    def _on_terminated(self, connection: asyncpg.Connection) -> None:
+        self._conn = None
+        if not self._closing and self._reconnect is None:
+            self._reconnect = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        try:
+            while not self._closing:
+                await asyncio.sleep(RECONNECT_SECONDS)
+                try:
+                    await self._connect()
+                except Exception as e:
+                    logger.warning(f"Invalidation listener reconnect failed: {e}")
+                    continue
+                for namespace in list(self.handlers):
+                    self._dispatch(namespace, None)
+                return
+        finally:
+            self._reconnect = None
+
+    def _on_notify(self, connection: asyncpg.Connection, pid: int,
+                   channel: str, payload: str) -> None:
+        message = json.loads(payload)
+        if message['origin'] != self.origin:
+            self._dispatch(message['namespace'], message['key'])
+
+    def _dispatch(self, namespace: str, key: Optional[str]) -> None:
+        for handler in self.handlers.get(namespace, ()):
+            asyncio.create_task(self._run(handler, namespace, key))
+
+    @staticmethod
+    async def _run(handler: InvalidationHandler, namespace: str,
+                   key: Optional[str]) -> None:
+        try:
+            await handler(key)
+        except Exception:
+            logger.exception(f"Invalidation handler for {namespace} failed")
+
+    async def publish(self, namespace: str, key: Optional[Any] = None) -> None:
+        """Tell the other workers that `key` in `namespace` changed."""
+        payload = json.dumps({
+            'origin': self.origin,
+            'namespace': namespace,
+            'key': str(key) if key is not None else None,
+        })
+        try:
+            await db.execute("SELECT pg_notify($1, $2);",
+                             INVALIDATION_CHANNEL, payload)
+        except Exception as e:
+            logger.warning(f"Could not publish invalidation for {namespace}: {e}")
+
+    async def stop(self) -> None:
+        self._closing = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await conn.close()
+
+
+# Instantiate the global state backend and invalidation bus
+state: StateBackend = create_backend()
+invalidation: InvalidationBus = InvalidationBus()
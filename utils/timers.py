@@ -0,0 +1,96 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from loguru import logger
+
+TimerCallback = Callable[[], Awaitable[None]]
+
+
+class _Timer:
+    __slots__ = ('handle', 'deadline', 'delay', 'callback')
+
+    def __init__(self, handle: asyncio.TimerHandle, deadline: float,
+                 delay: float, callback: TimerCallback) -> None:
+        self.handle = handle
+        self.deadline = deadline
+        self.delay = delay
+        self.callback = callback
+
+
+class TimerService:
+    """One-shot deadlines shared by every view and game.
+
+    Each deadline is a single `loop.call_at` handle, so a pending timeout
+    costs one entry in the event loop's heap and no wakeups until it is due.
+    Touching a timer only moves its deadline forward; the handle notices the
+    new deadline when it fires and re-arms itself, so frequent touches never
+    churn the heap.
+    """
+
+    def __init__(self) -> None:
+        self._timers: Dict[Hashable, _Timer] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def schedule(self, key: Hashable, delay: float,
+                 callback: TimerCallback) -> None:
+        """Run `callback` in `delay` seconds, replacing any timer for `key`."""
+        loop = asyncio.get_running_loop()
+        self.cancel(key)
+        deadline = loop.time() + delay
+        handle = loop.call_at(deadline, self._fire, key)
+        self._timers[key] = _Timer(handle, deadline, delay, callback)
+
+    def touch(self, key: Hashable, delay: Optional[float] = None) -> bool:
+        """Push the deadline for `key` back to `delay` (default: its original delay) from now."""
+        timer = self._timers.get(key)
+        if timer is None:
+            return False
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timer.delay if delay is None else delay)
+        if deadline < timer.handle.when():
+            timer.handle.cancel()
+            timer.handle = loop.call_at(deadline, self._fire, key)
+        timer.deadline = deadline
+        return True
+
+    def cancel(self, key: Hashable) -> bool:
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        timer.handle.cancel()
+        return True
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        timer = self._timers.get(key)
+        if timer is None:
+            return None
+        return max(0.0, timer.deadline - asyncio.get_running_loop().time())
+
+    def _fire(self, key: Hashable) -> None:
+        timer = self._timers.get(key)
+        if timer is None:
+            return
+        loop = asyncio.get_running_loop()
+        if timer.deadline > loop.time():
+            timer.handle = loop.call_at(timer.deadline, self._fire, key)
+            return
+        del self._timers[key]
+        task = loop.create_task(timer.callback())
+        self._running.add(task)
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error(
+                "Timer callback failed")
+
+
+# Instantiate a global timer service
+timers: TimerService = TimerService()
@@ -1,24 +1,131 @@
-from flask import Flask
-from threading import Thread
-import logging
+import os
+from typing import Any, Dict, List, Optional
 
-app = Flask('')
+import discord
+from aiohttp import web
+from discord.ext import commands
+from loguru import logger
 
+from database import db
+from utils.metrics import registry
 
-@app.route('/')
-def home():
-  return "I'm alive"
+WEB_HOST = os.getenv('WEB_HOST', '0.0.0.0')
+WEB_PORT = int(os.getenv('WEB_PORT', '8080'))
+# Readiness, metrics and cache stats list every guild the bot is in, so they
+# are only served on this interface, never on the public one
+ADMIN_HOST = os.getenv('WEB_ADMIN_HOST', '127.0.0.1')
+# The admin port is the public port plus this, so cluster workers never clash
+ADMIN_PORT_OFFSET = int(os.getenv('WEB_ADMIN_PORT_OFFSET', '1000'))
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DB_HEALTH_TIMEOUT = 2.0  # Seconds before the readiness DB probe gives up
 
 
-def run():
-  # Suppress Flask/Werkzeug logging
-  log = logging.getLogger('werkzeug')
-  log.setLevel(
-      logging.ERROR)  # Only log errors, suppressing info and warning logs
+class WebServer:
+    """Health, readiness and metrics endpoints served on the bot's event loop.
 
-  app.run(host='0.0.0.0', port=8080)
+    Two listeners run on the same loop as the bot through aiohttp AppRunners,
+    so they start in `Bot.setup_hook`, stop in `Bot.close` and never hold the
+    process open on their own. The public one only answers `/` and
+    `/healthz`; readiness, metrics and cache stats are on the admin one,
+    which listens on loopback unless WEB_ADMIN_HOST says otherwise.
+    """
 
+    def __init__(self,
+                 bot: commands.Bot,
+                 host: str = WEB_HOST,
+                 port: int = WEB_PORT,
+                 admin_host: str = ADMIN_HOST,
+                 admin_port: Optional[int] = None) -> None:
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.admin_host = admin_host
+        self.admin_port = (admin_port if admin_port is not None else port +
+                           ADMIN_PORT_OFFSET)
+        self.app = web.Application()
+        self.app.router.add_get('/', self.home)
+        self.app.router.add_get('/healthz', self.healthz)
+        self.admin_app = web.Application()
+        self.admin_app.router.add_get('/healthz', self.healthz)
+        self.admin_app.router.add_get('/readyz', self.readyz)
+        self.admin_app.router.add_get('/metrics', self.metrics)
+        self.admin_app.router.add_get('/cache', self.cache)
+        self._runners: List[web.AppRunner] = []
 
-def keep_alive():
-  t = Thread(target=run)
-  t.start()
+    async def start(self) -> None:
+        if self._runners:
+            return
+        for app, host, port in ((self.app, self.host, self.port),
+                                (self.admin_app, self.admin_host,
+                                 self.admin_port)):
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            self._runners.append(runner)
+            await web.TCPSite(runner, host, port).start()
+        logger.info(f"Web server listening on {self.host}:{self.port}, "
+                    f"admin endpoints on {self.admin_host}:{self.admin_port}")
+
+    async def stop(self) -> None:
+        runners, self._runners = self._runners, []
+        for runner in runners:
+            await runner.cleanup()
+
+    async def home(self, request: web.Request) -> web.Response:
+        return web.Response(text="I'm alive")
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        """Liveness: the event loop is answering and the bot is not closed."""
+        if self.bot.is_closed():
+            return web.json_response({'status': 'closed'}, status=503)
+        return web.json_response({'status': 'ok'})
+
+    async def readyz(self, request: web.Request) -> web.Response:
+        """Readiness: gateway connected, database reachable, cogs loaded."""
+        checks = {
+            'gateway': self.bot.is_ready() and not self.bot.is_closed(),
+            'database': await db.is_healthy(timeout=DB_HEALTH_TIMEOUT),
+            'cogs': getattr(self.bot, 'cogs_loaded', False),
+        }
+        ready = all(checks.values())
+        body: Dict[str, Any] = {
+            'status': 'ready' if ready else 'not ready',
+            'checks': checks,
+            'failed_extensions': getattr(self.bot, 'failed_extensions', []),
+        }
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=registry.render().encode(),
+                            headers={'Content-Type': METRICS_CONTENT_TYPE})
+
+    async def cache(self, request: web.Request) -> web.Response:
+        """Per-guild cache sizes, largest member cache first."""
+        try:
+            limit = int(request.query.get('limit', '100'))
+        except ValueError:
+            raise web.HTTPBadRequest(text="limit must be an integer")
+        guilds: List[Dict[str, Any]] = [
+            self.guild_cache_sizes(guild) for guild in self.bot.guilds
+        ]
+        guilds.sort(key=lambda guild: guild['members'], reverse=True)
+        return web.json_response({
+            'guilds': len(guilds),
+            'users': len(self.bot.users),
+            'messages': len(self.bot.cached_messages),
+            'per_guild': guilds[:max(0, limit)],
+        })
+
+    @staticmethod
+    def guild_cache_sizes(guild: discord.Guild) -> Dict[str, Any]:
+        return {
+            'id': guild.id,
+            'name': guild.name,
+            'members': len(guild.members),
+            'member_count': guild.member_count,
+            'channels': len(guild.channels),
+            'threads': len(guild.threads),
+            'roles': len(guild.roles),
+            'emojis': len(guild.emojis),
+            'stickers': len(guild.stickers),
+            'chunked': guild.chunked,
+        }